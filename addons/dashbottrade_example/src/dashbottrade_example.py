@@ -1,23 +1,22 @@
 """
-Addon: EjemploAddon
-Descripción: Este es un addon de ejemplo para DashBotTrade
+Addon: Ejemplo Addon
+Descripción: Este es un addon de ejemplo para DashBotTrade.
+Versión: 2.0.0
+Autor: Jose
+
+Lógica del addon, sin Streamlit: recibe arrays del host y devuelve resultados.
+Con "execution": "process" en config.json estas funciones se ejecutan en el
+pool de procesos de los addons (ver AddonContext.run).
 """
+import numpy as np
+
 
-from services.addons_manager import register_new_addon
+def traded_notional(quantity, price):
+    """Volumen negociado (cantidad x precio) de las operaciones de un dataset."""
+    return float(np.dot(np.asarray(quantity, dtype=np.float64), np.asarray(price, dtype=np.float64)))
 
-def ejemploaddon_view():
-    # Aquí va la lógica del addon
-    return "Hola desde EjemploAddon (esto debe devolver una vista renderizada con Streamlit u otro método)"
 
-# Registro del addon en el sistema
-register_new_addon(
-    addon_id="ejemploaddon",
-    name="Ejemplo Addon",
-    description="Este es un addon de ejemplo para DashBotTrade.",
-    route="/ejemplo-addon",
-    view_func=ejemploaddon_view,
-    template="ejemploaddon.html",
-    icon="cpu",
-    version="1.0.0",
-    author="Jose"
-)
+def last_close(bars):
+    """Último cierre a partir de las barras que entrega el host."""
+    close = bars["close"]
+    return float(close[-1]) if len(close) else None
@@ -0,0 +1,24 @@
+import streamlit as st
+
+
+def render(ctx):
+    """
+    Interfaz del addon de ejemplo.
+
+    Muestra cómo leer el dataset activo de la sesión (ctx.dataset) y las barras
+    compartidas de un símbolo declarado (ctx.bars), delegando los cálculos en
+    src/dashbottrade_example.py con ctx.run.
+    """
+    st.header("Ejemplo Addon")
+    st.write("Hola desde EjemploAddon: datos del host a través de la API de addons.")
+
+    columns = ctx.dataset(columns=["quantity", "price"])
+    if columns is None:
+        st.info("Carga un dataset de operaciones para ver su volumen negociado.")
+    else:
+        st.metric("Volumen negociado", f"{ctx.run('traded_notional', columns['quantity'], columns['price']):,.2f}")
+
+    for symbol in ctx.symbols:
+        close = ctx.run("last_close", ctx.bars(symbol))
+        if close is not None:
+            st.metric(f"Último cierre {symbol}", f"{close:.2f}")
@@ -0,0 +1,16 @@
+import streamlit as st
+
+
+def render(ctx):
+    """
+    Interfaz del addon Addon de prueba nuevo.
+
+    ctx.bars(símbolo) devuelve arrays de solo lectura compartidos con el resto
+    de addons; solo se pueden pedir los símbolos declarados en config.json.
+    """
+    st.header("Addon de prueba nuevo")
+    st.write("Pues eso")
+    for symbol in ctx.symbols:
+        close = ctx.run("last_close", ctx.bars(symbol))
+        if close is not None:
+            st.metric(symbol, f"{close:.2f}")
@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
-import os, json, shutil
-from utils import refrescar  # Importamos la función reutilizable
+import math, time
+# pandas, numpy y los servicios pesados se importan dentro de cada módulo al
+# usarse por primera vez: la pantalla de inicio no los necesita
+from utils import refresh_panel, REFRESH_PANELS, get_refresh_interval
 from config import current_config
+from services.profiler import timed, begin_rerun, end_rerun, start_profile, stop_profile
+from services.shared_resources import get_session_registry
 
 # Configuración de la página
 st.set_page_config(
@@ -29,6 +32,7 @@ def set_module(mod):
     st.session_state.module = mod
 
 # Función para renderizar el contenido principal según el módulo seleccionado
+@timed("render_module")
 def render_module(module_name):
     if module_name == "Inicio":
         st.title("DashBotTrade")
@@ -41,25 +45,543 @@ def render_module(module_name):
         st.header("Carga de Datos de Trading")
         uploaded_file = st.file_uploader("Sube tu archivo CSV de trading", type="csv")
         if uploaded_file:
-            df = pd.read_csv(uploaded_file)
+            from services.data_loader import load_trades_csv
+            from services.dataset_store import load_uploaded_dataset
+            progress = st.progress(0.0, text="Cargando datos...")
+
+            def update_progress(fraction):
+                if fraction is not None:
+                    progress.progress(fraction, text=f"Cargando datos... {fraction:.0%}")
+
+            try:
+                _, df = load_uploaded_dataset(uploaded_file, load_trades_csv, progress_callback=update_progress)
+            except Exception as e:
+                progress.empty()
+                st.error(f"Error al leer el archivo CSV: {e}")
+                return
+            progress.empty()
             st.success("Datos cargados correctamente")
-            st.dataframe(df)
+            if st.button("Guardar en el diario"):
+                from services.trade_journal import get_trade_journal
+                try:
+                    result = get_trade_journal().append(df, "csv")
+                    st.success(f"{result['added']:,} operaciones añadidas al diario "
+                               f"({result['duplicates']:,} ya registradas, {result['invalid']:,} inválidas)")
+                except ValueError as e:
+                    st.error(f"No se pudo guardar en el diario: {e}")
+            render_dataframe_preview(df)
         else:
-            st.info("Sube un archivo para comenzar")
+            from services.dataset_store import list_datasets, get_dataset
+            datasets = list_datasets()
+            if datasets:
+                # Los datasets ya parseados en esta sesión siguen disponibles sin volver a subirlos
+                names = [d["name"] for d in datasets]
+                active = st.session_state.get("active_dataset")
+                selected = st.selectbox("Datasets cargados", names, index=names.index(active) if active in names else 0)
+                st.session_state.active_dataset = selected
+                render_dataframe_preview(get_dataset(selected))
+            else:
+                st.info("Sube un archivo para comenzar")
+    elif module_name == "Análisis de Trading":
+        render_trade_analysis()
     elif module_name == "Módulo de Gráficos":
-        st.title("DashBotTrade")
-        st.markdown("## Dashboard para análisis de Trading")
-        st.header("Módulo de Gráficos")
-        st.info("Aquí se mostrarán los gráficos interactivos. (Módulo pendiente de implementación)")
+        render_charts()
+    elif module_name == "Backtesting":
+        render_backtesting()
+    elif module_name == "Mercado en Vivo":
+        render_live_market()
+    elif module_name == "Cuenta":
+        render_account()
+    elif module_name == "Screener":
+        render_screener()
+    elif module_name == "Diario":
+        render_journal()
     elif module_name == "Configuración":
         render_configuration()
     elif module_name == "Gestor de Addons":
         render_addons_manager()
+    elif module_name == "Rendimiento":
+        render_performance()
     elif module_name == "Refresh":
         st.session_state.module = st.session_state.get("last_module", "Inicio")
     else:
         render_addon_ui(module_name)
 
+# Función para renderizar las métricas de las operaciones cargadas
+def render_trade_analysis():
+    st.title("DashBotTrade")
+    st.markdown("## Dashboard para análisis de Trading")
+    st.header("Análisis de Trading")
+    from services.dataset_store import get_dataset, get_dataset_hash
+    from services.trade_analytics import analyze_trades
+    df = get_dataset()
+    if df is None:
+        st.info("Carga primero un archivo de operaciones en 'Carga de Datos'.")
+        return
+    missing = {"symbol", "side", "quantity", "price", "timestamp"} - set(df.columns)
+    if missing:
+        st.error(f"Faltan columnas en los datos cargados: {', '.join(sorted(missing))}")
+        return
+    initial_capital = st.number_input("Capital inicial", min_value=0.0, value=100000.0, step=1000.0)
+    # El análisis se recalcula solo si cambia el dataset o el capital (se expulsa con la sesión inactiva)
+    cache = st.session_state.setdefault("trade_analysis_cache", {})
+    key = (get_dataset_hash(), initial_capital)
+    if cache.get("key") != key:
+        cache["result"] = analyze_trades(df, initial_capital=initial_capital)
+        cache["key"] = key
+    result = cache["result"]
+    summary = result["summary"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("P&L neto", f"{summary['net_pnl']:,.2f}")
+    col2.metric("Win rate", f"{summary['win_rate']:.1%}")
+    col3.metric("Expectancy", f"{summary['expectancy']:,.2f}")
+    col4.metric("Max drawdown", f"{summary['max_drawdown']:,.2f}", f"{summary['max_drawdown_pct']:.1%}")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Operaciones", f"{summary['trades']:,}")
+    col2.metric("Cerradas", f"{summary['closed_trades']:,}")
+    col3.metric("Sharpe", f"{summary['sharpe']:.2f}")
+    col4.metric("Sortino", f"{summary['sortino']:.2f}")
+
+    st.markdown("### Curva de equity")
+    from services.downsampling import LinePyramid
+    st.line_chart(LinePyramid(result["equity"]["equity"]).query(n_pixels=1000))
+    st.markdown("### P&L por símbolo")
+    st.dataframe(result["by_symbol"].sort_values("net_pnl", ascending=False))
+    st.markdown("### Tiempo de tenencia (horas)")
+    st.write(result["holding"]["quantiles_hours"])
+
+# Cachés del módulo de gráficos compartidas por todas las sesiones
+@st.cache_resource(max_entries=32)
+def get_ohlc_pyramid(symbol, timeframe, start, last_ts, _bars):
+    from services.downsampling import OHLCPyramid
+    return OHLCPyramid(_bars)
+
+@st.cache_resource(max_entries=32)
+def get_line_pyramid(dataset_hash, column, symbol, _df):
+    import pandas as pd
+    from services.downsampling import LinePyramid
+    subset = _df if symbol is None else _df[_df["symbol"] == symbol]
+    series = pd.Series(subset[column].to_numpy(), index=pd.DatetimeIndex(subset["timestamp"]), name=column)
+    series = series.sort_index().dropna()
+    return LinePyramid(series) if not series.empty else None
+
+def render_candles(frame):
+    import altair as alt
+    data = frame.reset_index()
+    data["direction"] = (data["close"] >= data["open"]).map({True: "up", False: "down"})
+    color = alt.Color("direction:N", scale=alt.Scale(domain=["up", "down"], range=["#58b34e", "#e4572e"]), legend=None)
+    base = alt.Chart(data).encode(x=alt.X("timestamp:T", title=None), color=color)
+    wicks = base.mark_rule().encode(y=alt.Y("low:Q", scale=alt.Scale(zero=False), title=None), y2="high:Q")
+    bodies = base.mark_bar().encode(y="open:Q", y2="close:Q")
+    st.altair_chart(wicks + bodies, use_container_width=True)
+
+@refresh_panel("Gráficos", 60)
+def render_bars_chart(symbol, timeframe, start, max_points):
+    import pandas as pd
+    try:
+        from services.shared_resources import get_market_data_cache
+        bars = get_market_data_cache().get_bars(symbol, timeframe, start=start)
+    except Exception as e:
+        st.error(f"Error al obtener barras de {symbol}: {e}")
+        return
+    if bars.empty:
+        st.info("No hay barras para el rango seleccionado.")
+        return
+    pyramid = get_ohlc_pyramid(symbol, timeframe, start, str(bars.index[-1]), bars)
+    lo, hi = bars.index[0].tz_convert(None).to_pydatetime(), bars.index[-1].tz_convert(None).to_pydatetime()
+    view = st.slider("Rango visible", min_value=lo, max_value=hi, value=(lo, hi))
+    rule, visible = pyramid.query(pd.Timestamp(view[0], tz="UTC"), pd.Timestamp(view[1], tz="UTC"), max_points=max_points)
+    st.caption(f"{len(bars):,} barras en caché · mostrando {len(visible):,} velas ({rule})")
+    render_candles(visible)
+
+    from services.indicators import DEFAULT_SPEC, compute_indicators, get_indicators
+    selected = st.multiselect("Indicadores", DEFAULT_SPEC, default=[])
+    if selected:
+        if rule == "base":
+            # Incremental: solo se procesan las barras nuevas desde el último rerun
+            values = get_indicators(f"{symbol}:{timeframe}:{start}", bars, selected).reindex(visible.index)
+        else:
+            values = compute_indicators(visible, selected)
+        st.line_chart(values)
+
+# Función para renderizar el módulo de gráficos (con reducción de puntos en servidor)
+def render_charts():
+    import pandas as pd
+    st.title("DashBotTrade")
+    st.markdown("## Dashboard para análisis de Trading")
+    st.header("Módulo de Gráficos")
+    from services.downsampling import DEFAULT_MAX_POINTS
+
+    source = st.radio("Fuente de datos", ["Barras de Alpaca", "Dataset cargado"], horizontal=True)
+    max_points = st.slider("Puntos máximos en pantalla", 200, 5000, DEFAULT_MAX_POINTS, step=100)
+
+    if source == "Barras de Alpaca":
+        col1, col2, col3 = st.columns(3)
+        symbol = col1.text_input("Símbolo", value="AAPL").strip().upper()
+        timeframe = col2.selectbox("Timeframe", ["1Min", "5Min", "15Min", "1Hour", "1Day"], index=4)
+        start = col3.date_input("Desde", value=pd.Timestamp.today() - pd.Timedelta(days=365))
+        if not symbol:
+            return
+        render_bars_chart(symbol, timeframe, str(start), max_points)
+    else:
+        from services.dataset_store import get_dataset, get_dataset_hash
+        df = get_dataset()
+        if df is None:
+            st.info("Carga primero un archivo en 'Carga de Datos'.")
+            return
+        numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        if "timestamp" not in df.columns or not numeric:
+            st.error("El dataset necesita una columna 'timestamp' y al menos una columna numérica.")
+            return
+        col1, col2, col3 = st.columns(3)
+        column = col1.selectbox("Columna", numeric)
+        symbols = ["(todos)"] + (list(df["symbol"].cat.categories) if "symbol" in df.columns and isinstance(df["symbol"].dtype, pd.CategoricalDtype) else [])
+        symbol = col2.selectbox("Símbolo", symbols)
+        method = col3.selectbox("Reducción", ["lttb", "minmax"])
+
+        pyramid = get_line_pyramid(get_dataset_hash(), column, None if symbol == "(todos)" else symbol, df)
+        if pyramid is None:
+            st.info("No hay datos para la selección.")
+            return
+        lo, hi = pyramid.start.to_pydatetime(), pyramid.end.to_pydatetime()
+        view = st.slider("Rango visible", min_value=lo, max_value=hi, value=(lo, hi))
+        visible = pyramid.query(view[0], view[1], n_pixels=max_points // 2, method=method)
+        st.caption(f"{pyramid.size:,} puntos · mostrando {len(visible):,}")
+        st.line_chart(visible)
+
+# Función para renderizar el módulo de backtesting
+def render_backtesting():
+    import pandas as pd
+    st.title("DashBotTrade")
+    st.markdown("## Dashboard para análisis de Trading")
+    st.header("Backtesting")
+    from services.backtesting import STRATEGIES, PERIODS_PER_YEAR, bars_to_arrays, backtest, parameter_sweep
+
+    col1, col2, col3 = st.columns(3)
+    symbol = col1.text_input("Símbolo", value="AAPL", key="bt_symbol").strip().upper()
+    timeframe = col2.selectbox("Timeframe", list(PERIODS_PER_YEAR), index=4, key="bt_timeframe")
+    start = col3.date_input("Desde", value=pd.Timestamp.today() - pd.Timedelta(days=3 * 365), key="bt_start")
+    strategy = st.selectbox("Estrategia", list(STRATEGIES))
+
+    col1, col2, col3, col4 = st.columns(4)
+    commission = col1.number_input("Comisión por unidad", min_value=0.0, value=0.005, format="%.4f")
+    slippage = col2.number_input("Slippage (bps)", min_value=0.0, value=1.0)
+    stop_loss = col3.number_input("Stop loss (%)", min_value=0.0, value=0.0) / 100
+    take_profit = col4.number_input("Take profit (%)", min_value=0.0, value=0.0) / 100
+
+    if strategy == "sma_crossover":
+        col1, col2 = st.columns(2)
+        params = {"fast": col1.number_input("Media rápida", 2, 500, 10), "slow": col2.number_input("Media lenta", 3, 1000, 50)}
+    else:
+        params = {"lookback": st.number_input("Lookback", 2, 1000, 20)}
+
+    try:
+        from services.shared_resources import get_market_data_cache
+        bars = get_market_data_cache().get_bars(symbol, timeframe, start=str(start))
+    except Exception as e:
+        st.error(f"Error al obtener barras de {symbol}: {e}")
+        return
+    if bars.empty:
+        st.info("No hay barras para el rango seleccionado.")
+        return
+    arrays = bars_to_arrays(bars)
+    costs = {"commission": commission, "slippage_bps": slippage, "stop_loss": stop_loss or None,
+             "take_profit": take_profit or None, "periods_per_year": PERIODS_PER_YEAR[timeframe]}
+
+    result = backtest(arrays, STRATEGIES[strategy](arrays, **params), **costs)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rentabilidad", f"{result['total_return']:.2%}")
+    col2.metric("Sharpe", f"{result['sharpe']:.2f}")
+    col3.metric("Max drawdown", f"{result['max_drawdown']:.2%}")
+    col4.metric("Operaciones", f"{result['trades']:,}")
+    from services.downsampling import LinePyramid
+    equity = pd.Series(result["equity"], index=bars.index, name="equity")
+    st.line_chart(LinePyramid(equity).query(n_pixels=1000))
+
+    st.markdown("### Barrido de parámetros")
+    if strategy == "sma_crossover":
+        col1, col2 = st.columns(2)
+        fast_range = col1.slider("Rango media rápida", 2, 200, (5, 50))
+        slow_range = col2.slider("Rango media lenta", 10, 500, (50, 200))
+        step = st.number_input("Paso", 1, 50, 5)
+        grid = {"fast": list(range(fast_range[0], fast_range[1] + 1, step)),
+                "slow": list(range(slow_range[0], slow_range[1] + 1, step))}
+    else:
+        lookback_range = st.slider("Rango lookback", 2, 500, (10, 100))
+        grid = {"lookback": list(range(lookback_range[0], lookback_range[1] + 1))}
+    n_combos = math.prod(len(v) for v in grid.values())
+    if st.button(f"Ejecutar barrido ({n_combos:,} combinaciones)"):
+        with st.spinner("Ejecutando barrido en paralelo..."):
+            sweep = parameter_sweep(arrays, strategy, grid, **costs)
+        st.dataframe(sweep.sort_values("sharpe", ascending=False).head(50), hide_index=True)
+
+# Función para renderizar cotizaciones en tiempo real desde el stream compartido
+def render_live_market():
+    st.title("DashBotTrade")
+    st.markdown("## Dashboard para análisis de Trading")
+    st.header("Mercado en Vivo")
+    from services.market_stream import get_market_stream
+    stream = get_market_stream()
+
+    symbols_text = st.text_input("Símbolos (separados por comas)", value=st.session_state.get("live_symbols", "AAPL,MSFT"))
+    st.session_state.live_symbols = symbols_text
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols_text.split(",") if s.strip()))
+    # Cada sesión mantiene una referencia por símbolo: solo se suscriben las altas y se sueltan las bajas
+    held = st.session_state.get("live_subscribed", [])
+    stream.subscribe([s for s in symbols if s not in held])
+    stream.unsubscribe([s for s in held if s not in symbols])
+    st.session_state.live_subscribed = symbols
+
+    render_live_quotes(stream, symbols)
+
+@refresh_panel("Cotizaciones", 1)
+def render_live_quotes(stream, symbols):
+    status = f"{stream.status} ({stream.last_error})" if stream.last_error else stream.status
+    st.caption(f"Stream {status} · {stream.messages:,} mensajes recibidos")
+    # Solo se reconstruye la tabla si alguna versión de los símbolos ha cambiado
+    versions = tuple(stream.version(s) for s in symbols)
+    cache = st.session_state.setdefault("live_quotes_cache", {})
+    if cache.get("key") != (tuple(symbols), versions):
+        cache["key"] = (tuple(symbols), versions)
+        cache["table"] = stream.quotes_table(symbols)
+    if cache["table"].empty:
+        st.info("Esperando cotizaciones...")
+    else:
+        st.dataframe(cache["table"], hide_index=True)
+
+# Función para renderizar la cuenta desde la instantánea que mantiene el servicio en segundo plano
+def render_account():
+    st.title("DashBotTrade")
+    st.markdown("## Dashboard para análisis de Trading")
+    st.header("Cuenta")
+    from services.account_service import get_account_service
+    service = get_account_service()
+    if st.button("Actualizar ahora"):
+        service.refresh_now()
+    render_account_snapshot(service)
+    render_order_entry()
+
+@refresh_panel("Cuenta", 5)
+def render_account_snapshot(service):
+    import pandas as pd
+    snapshot, diff = service.get_snapshot()
+    if service.last_error:
+        st.error(service.last_error)
+    if snapshot is None:
+        st.info("Esperando la primera consulta de la cuenta...")
+        return
+    age = pd.Timestamp.now(tz="UTC") - pd.Timestamp(snapshot["timestamp"], unit="s", tz="UTC")
+    st.caption(f"Instantánea de hace {age.total_seconds():.0f} s · sondeo cada {service.interval:g} s")
+
+    account = snapshot["account"]
+    cols = st.columns(3)
+    cols[0].metric("Equity", f"{float(account.get('equity') or 0):,.2f}")
+    cols[1].metric("Cash", f"{float(account.get('cash') or 0):,.2f}")
+    cols[2].metric("Buying power", f"{float(account.get('buying_power') or 0):,.2f}")
+
+    # Las tablas solo se reconstruyen cuando el servicio publica una nueva versión
+    cache = st.session_state.setdefault("account_cache", {})
+    if cache.get("version") != service.version:
+        cache["version"] = service.version
+        changed = set(diff["positions"]["added"]) | set(diff["positions"]["changed"])
+        positions = pd.DataFrame(list(snapshot["positions"].values()))
+        if not positions.empty:
+            positions = positions.reindex(columns=["symbol", "qty", "avg_entry_price", "current_price",
+                                                   "market_value", "unrealized_pl"])
+            positions.insert(0, "cambio", positions["symbol"].isin(changed).map({True: "●", False: ""}))
+        cache["positions"] = positions
+        cache["orders"] = pd.DataFrame(list(snapshot["orders"].values()))
+        cache["removed"] = diff["positions"]["removed"]
+
+    st.subheader("Posiciones")
+    if cache["positions"].empty:
+        st.info("Sin posiciones abiertas.")
+    else:
+        st.dataframe(cache["positions"], hide_index=True)
+    if cache["removed"]:
+        st.caption(f"Posiciones cerradas desde la última consulta: {', '.join(cache['removed'])}")
+
+    st.subheader("Órdenes abiertas")
+    if cache["orders"].empty:
+        st.info("Sin órdenes abiertas.")
+    else:
+        orders = cache["orders"]
+        st.dataframe(orders.reindex(columns=[c for c in ["symbol", "side", "qty", "type", "limit_price", "status",
+                                                          "submitted_at"] if c in orders.columns]), hide_index=True)
+
+    history = service.equity_history()
+    if len(history) > 1:
+        st.subheader("Histórico de equity")
+        st.line_chart(history["equity"])
+
+# Función para enviar órdenes en lote (una por línea: símbolo,cantidad,lado[,precio límite])
+def render_order_entry():
+    from services.order_manager import get_order_manager
+    manager = get_order_manager()
+    st.subheader("Envío de órdenes")
+    with st.form("order_batch"):
+        text = st.text_area("Órdenes (símbolo,cantidad,buy|sell[,precio límite])", placeholder="AAPL,10,buy\nMSFT,5,sell,410.5")
+        submitted = st.form_submit_button("Enviar lote")
+    if submitted:
+        orders = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            parts = [p.strip() for p in line.split(",") if p.strip()]
+            if not parts:
+                continue
+            try:
+                order = {"symbol": parts[0].upper(), "qty": float(parts[1]), "side": parts[2].lower()}
+                if len(parts) > 3:
+                    order.update(type="limit", limit_price=float(parts[3]))
+            except (IndexError, ValueError):
+                st.error(f"Línea {line_number} no válida: {line}")
+                return
+            orders.append(order)
+        if orders:
+            with st.spinner(f"Enviando {len(orders)} órdenes..."):
+                results = manager.submit_batch(orders)
+            # El libro lo actualiza el hilo de AccountService: se le pide un sondeo ya
+            from services.account_service import get_account_service
+            get_account_service().refresh_now()
+            errors = [r for r in results if r.get("error")]
+            if errors:
+                st.error(f"{len(errors)} de {len(results)} órdenes rechazadas.")
+            else:
+                st.success(f"{len(results)} órdenes enviadas.")
+    render_order_book(manager)
+
+@refresh_panel("Órdenes", 2)
+def render_order_book(manager):
+    stats = manager.latency_stats()
+    if stats:
+        cols = st.columns(5)
+        cols[0].metric("Órdenes confirmadas", stats["count"])
+        cols[1].metric("Latencia p50", f"{stats['p50']:.0f} ms")
+        cols[2].metric("Latencia p95", f"{stats['p95']:.0f} ms")
+        cols[3].metric("Latencia p99", f"{stats['p99']:.0f} ms")
+        cols[4].metric("Cola rate limit p95", f"{stats['queue_p95']:.0f} ms")
+    book = manager.order_book()
+    if not book.empty:
+        st.dataframe(book, hide_index=True)
+
+@st.cache_resource(max_entries=2)
+def get_feature_table(version):
+    from services.screener import FeatureTable
+    return FeatureTable()
+
+# Función para filtrar el universo completo sobre la tabla de features precalculada
+def render_screener():
+    import pandas as pd
+    from services.screener import FeatureTable, OPERATORS, build_feature_table
+    st.title("DashBotTrade")
+    st.markdown("## Dashboard para análisis de Trading")
+    st.header("Screener")
+
+    with st.expander("Tabla de features"):
+        start = st.date_input("Histórico desde", value=pd.Timestamp.today() - pd.Timedelta(days=180), key="screener_start")
+        symbols_text = st.text_input("Símbolos (vacío = universo completo de Alpaca)", key="screener_symbols")
+        if st.button("Recalcular features"):
+            symbols = [s.strip().upper() for s in symbols_text.split(",") if s.strip()] or None
+            progress = st.progress(0.0, text="Descargando barras...")
+            try:
+                info = build_feature_table(symbols, str(start), progress_callback=lambda f: progress.progress(f, text=f"Descargando barras... {f:.0%}"))
+                st.success(f"Tabla calculada: {info['symbols']:,} símbolos, {info['dates']} sesiones en {info['seconds']:.1f}s")
+            except RuntimeError as e:
+                st.error(str(e))
+            finally:
+                progress.empty()
+
+    version = FeatureTable.version()
+    if version is None:
+        st.info("Aún no hay tabla de features: recalcúlala arriba o con `python -m services.screener`.")
+        return
+    table = get_feature_table(version)
+    built = pd.Timestamp(table.built_at, unit="s", tz="UTC")
+    last_date = pd.Timestamp(int(table.dates[-1]), unit="ns", tz="UTC").date()
+    st.caption(f"{len(table.symbols):,} símbolos · última sesión {last_date} · calculada {built:%Y-%m-%d %H:%M} UTC")
+
+    filters_frame = st.data_editor(
+        pd.DataFrame([{"feature": "rsi_14", "op": "<", "value": 30.0}]),
+        num_rows="dynamic", hide_index=True, key="screener_filters_editor",
+        column_config={
+            "feature": st.column_config.SelectboxColumn("Feature", options=table.features, required=True),
+            "op": st.column_config.SelectboxColumn("Operador", options=list(OPERATORS), required=True),
+            "value": st.column_config.NumberColumn("Valor", required=True),
+        },
+    )
+    filters = [(r.feature, r.op, float(r.value)) for r in filters_frame.dropna().itertuples()]
+    col1, col2, col3 = st.columns(3)
+    sort_by = col1.selectbox("Ordenar por", table.features, index=table.features.index("ret_5d") if "ret_5d" in table.features else 0)
+    ascending = col2.toggle("Ascendente", value=False)
+    limit = col3.number_input("Máximo de filas", 10, 5000, 100, step=10)
+
+    start_time = time.perf_counter()
+    result = table.screen(filters, sort_by=sort_by, ascending=ascending, limit=int(limit))
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    st.caption(f"{len(result):,} símbolos en {elapsed_ms:.1f} ms")
+    st.dataframe(result, hide_index=True)
+
+# Función para consultar el diario de operaciones persistente
+def render_journal():
+    import pandas as pd
+    from services.trade_journal import get_trade_journal
+    st.title("DashBotTrade")
+    st.markdown("## Dashboard para análisis de Trading")
+    st.header("Diario de Operaciones")
+
+    journal = get_trade_journal()
+    if st.button("Importar ejecuciones de Alpaca"):
+        with st.spinner("Descargando actividades de la cuenta..."):
+            try:
+                result = journal.import_alpaca_activities()
+                st.success(f"{result['added']:,} ejecuciones nuevas ({result['duplicates']:,} ya registradas)")
+            except RuntimeError as e:
+                st.error(str(e))
+
+    stats = journal.stats()
+    if not stats["rows"]:
+        st.info("El diario está vacío: guarda un CSV desde 'Carga de Datos' o importa las ejecuciones de Alpaca.")
+        return
+    st.caption(f"{stats['rows']:,} operaciones · {stats['symbols']:,} símbolos · {stats['partitions']:,} días "
+               f"({stats['first_day']} a {stats['last_day']}) · {stats['bytes'] / 1e6:.1f} MB en disco")
+
+    col1, col2 = st.columns(2)
+    start = col1.date_input("Desde", value=pd.Timestamp(stats["first_day"]), key="journal_start")
+    end = col2.date_input("Hasta", value=pd.Timestamp(stats["last_day"]), key="journal_end")
+    symbols = st.multiselect("Símbolos (vacío = todos)", sorted(journal.symbols), key="journal_symbols")
+
+    # Fin de día inclusivo
+    end_ts = pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(nanoseconds=1)
+    start_time = time.perf_counter()
+    df = journal.query(start=pd.Timestamp(start), end=end_ts, symbols=symbols or None)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    st.caption(f"Consulta resuelta en {elapsed_ms:.1f} ms")
+
+    if st.button("Usar en Análisis de Trading", disabled=df.empty):
+        from services.dataset_store import content_hash, register_dataset
+        key = f"{start}|{end}|{','.join(sorted(symbols))}|{journal.version()}"
+        name = f"Diario {start} a {end}" + (f" ({', '.join(symbols)})" if symbols else "")
+        register_dataset(name, df, content_hash(key.encode("utf-8")))
+        set_module("Análisis de Trading")
+        st.rerun()
+    render_dataframe_preview(df, key="journal_preview")
+
+# Función para mostrar una vista previa paginada de un DataFrame grande
+def render_dataframe_preview(df, page_size=100, key="preview"):
+    memory_mb = df.memory_usage(deep=True).sum() / 1e6
+    st.caption(f"{len(df):,} filas · {len(df.columns)} columnas · {memory_mb:.1f} MB en memoria")
+    if df.empty:
+        st.info("El archivo no contiene filas.")
+        return
+    mode = st.radio("Vista previa", ["Paginada", "Muestra aleatoria"], horizontal=True, key=f"{key}_mode")
+    if mode == "Paginada":
+        pages = (len(df) - 1) // page_size + 1
+        page = st.number_input(f"Página (de {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+        start = (page - 1) * page_size
+        st.dataframe(df.iloc[start:start + page_size])
+    else:
+        st.dataframe(df.sample(min(page_size, len(df)), random_state=0).sort_index())
+
 # Función para renderizar la configuración de Alpaca
 def render_configuration():
     st.title("DashBotTrade")
@@ -74,8 +596,65 @@ def render_configuration():
         if submitted:
             st.success("Configuración actualizada.")
 
+    st.subheader("Refresco de paneles")
+    st.caption("Cada panel se actualiza por separado; 0 desactiva el refresco automático.")
+    intervals = st.session_state.setdefault("refresh_intervals", {})
+    for name in sorted(REFRESH_PANELS):
+        intervals[name] = st.number_input(f"{name} (segundos)", min_value=0, value=int(get_refresh_interval(name)), key=f"refresh_{name}")
+
+# Función para renderizar los tiempos de los tramos instrumentados y el perfil de un rerun
+def render_performance():
+    import pandas as pd
+    from services import profiler
+    st.title("DashBotTrade")
+    st.header("Rendimiento")
+
+    enabled = st.toggle("Instrumentación activa", value=profiler.is_enabled(),
+                        help="Mide reruns, sidebar, módulos, addons y llamadas a Alpaca. Afecta a todo el proceso.")
+    if enabled != profiler.is_enabled():
+        profiler.set_enabled(enabled)
+    if st.button("Reiniciar estadísticas"):
+        profiler.reset_stats()
+
+    stats = profiler.get_stats()
+    if not stats:
+        st.info("Sin medidas todavía: activa la instrumentación y navega por la aplicación.")
+    else:
+        st.subheader("Tiempos recientes por tramo")
+        st.dataframe(pd.DataFrame(stats).sort_values("p95_ms", ascending=False).round(2), hide_index=True)
+
+    reruns = profiler.get_recent_reruns()
+    if reruns:
+        st.subheader("Reruns recientes")
+        labels = [f"{time.strftime('%H:%M:%S', time.localtime(r['wall']))} · {r['label']} · {r['total'] * 1000:.1f} ms"
+                  for r in reruns]
+        selected = st.selectbox("Rerun", range(len(reruns)), format_func=lambda i: labels[i])
+        spans = pd.DataFrame(reruns[selected]["spans"], columns=["span", "inicio_ms", "duración_ms", "nivel"])
+        spans[["inicio_ms", "duración_ms"]] = (spans[["inicio_ms", "duración_ms"]] * 1000).round(2)
+        st.dataframe(spans.sort_values("inicio_ms"), hide_index=True)
+
+    st.subheader("Sesiones")
+    registry = get_session_registry()
+    sessions = registry.report()
+    st.caption(f"{len(sessions)} sesiones · {registry.evictions} expulsiones por inactividad "
+               f"(más de {registry.idle_seconds:.0f} s)")
+    if sessions:
+        st.dataframe(pd.DataFrame(sessions).sort_values("mb", ascending=False).round(3), hide_index=True)
+
+    st.subheader("Perfil de un rerun")
+    st.caption("Se perfila el siguiente rerun de cualquier otro módulo (pyinstrument si está instalado, si no cProfile).")
+    if st.button("Perfilar el siguiente rerun"):
+        st.session_state.profile_next_rerun = True
+    if st.session_state.get("profile_next_rerun"):
+        st.info("Perfil pendiente: navega al módulo que quieras medir.")
+    last_profile = st.session_state.get("last_profile")
+    if last_profile:
+        st.caption(f"Último perfil: {last_profile['module']}")
+        st.code(last_profile["report"], language="text")
+
 # Función para renderizar el gestor de addons
 def render_addons_manager():
+    import pandas as pd
     st.title("DashBotTrade")
     st.markdown("## Dashboard para análisis de Trading")
     st.header("Gestor de Addons")
@@ -91,11 +670,14 @@ def render_addons_manager():
     with col_import:
         # Reemplazamos el mensaje de funcionalidad pendiente por un file uploader para el zip del addon.
         uploaded_zip = st.file_uploader("Selecciona el archivo .zip del addon", type=["zip"])
-        if uploaded_zip is not None:
+        # El uploader conserva el fichero entre reruns: se importa una sola vez por subida
+        zip_id = getattr(uploaded_zip, "file_id", None) or (uploaded_zip.name, uploaded_zip.size) if uploaded_zip is not None else None
+        if uploaded_zip is not None and st.session_state.get("imported_zip_id") != zip_id:
             result = import_addon(uploaded_zip)
+            st.session_state.imported_zip_id = zip_id
             if result is not None:
-                st.success("Addon importado correctamente.")
-                addon_list = refresh_addons()
+                # import_addon ya muestra el mensaje de éxito y refresca el índice
+                addon_list = scan_addons()
                 
     with col_create:
         if st.button("Crear Nuevo Addon"):
@@ -118,14 +700,19 @@ def render_addons_manager():
     
     # Mostrar tabla con la información de los addons
     if addon_list:
+        from services.addon_loader import get_addon_stats
         data = []
         for addon in addon_list:
+            stats = get_addon_stats(addon["folder"])
             data.append({
                 "ID": addon["folder"],
                 "Nombre": addon["name"],
                 "Versión": addon.get("version", "N/A"),
                 "Descripción": addon.get("description", ""),
-                "Activo": "Sí" if addon.get("active", True) else "No"
+                "Activo": "Sí" if addon.get("active", True) else "No",
+                "API": addon.get("api_version", "-"),
+                "Import (ms)": f"{stats['import_ms']:.1f}" if stats.get("import_ms") is not None else "-",
+                "Render (ms)": f"{stats['render_ms']:.1f}" if stats.get("render_ms") is not None else "-"
             })
         df = pd.DataFrame(data)
         st.write("### Lista de Addons")
@@ -149,15 +736,24 @@ def render_addons_manager():
         st.info("No hay addons instalados.")
 
 # Función para renderizar la interfaz de un addon
+@timed("render_addon_ui")
 def render_addon_ui(module_name):
+    from services.addon_loader import resolve_addon_folder, load_addon_ui, render_addon
+    from services.addon_api import validate_manifest
+    from services.addons_manager import scan_addons
+    folder = resolve_addon_folder(module_name, addons_dir)
+    config = next((a for a in scan_addons(addons_dir) if a["folder"] == folder), {})
+    manifest_errors = validate_manifest(config)
+    if manifest_errors:
+        st.error(f"El manifiesto del addon '{module_name}' no es compatible: {'; '.join(manifest_errors)}")
+        return
     try:
-        import importlib
-        ui_module_path = f"addons.{module_name}.ui.ui"
-        ui_module = importlib.import_module(ui_module_path)
+        # Se importa en la primera navegación y se reutiliza mientras no cambie el fichero
+        ui_module = load_addon_ui(folder, addons_dir)
         if not hasattr(ui_module, "render"):
             st.error(f"El módulo '{module_name}' no tiene una función 'render'.")
             return
-        ui_module.render()
+        render_addon(folder, ui_module, config)
     except ModuleNotFoundError:
         st.error(f"No se pudo encontrar el módulo para el addon '{module_name}'. Asegúrate de que esté instalado correctamente.")
     except ImportError as e:
@@ -169,31 +765,71 @@ def render_addon_ui(module_name):
             log_file.write(f"Error en addon '{module_name}': {e}\n")
 
 # Sidebar personalizado con botones independientes
-st.sidebar.markdown("## Navegación")
-if st.sidebar.button("Inicio"):
-    set_module("Inicio")
-if st.sidebar.button("Carga de Datos"):
-    set_module("Carga de Datos")
-if st.sidebar.button("Módulo de Gráficos"):
-    set_module("Módulo de Gráficos")
-
-from services.addons_manager import scan_addons
-addon_list = scan_addons()  # Lee todos los addons (cada uno con su config)
-
-if addon_list:
-    for addon in addon_list:
-        nav = addon.get("nav_button", {})
-        if nav.get("show", False):
-            button_label = nav.get("label", addon["name"])
-            if st.sidebar.button(button_label):
-                st.session_state.module = addon["name"]
-
-st.sidebar.markdown("---")
-st.sidebar.markdown("## Herramientas")
-if st.sidebar.button("Configuración"):
-    set_module("Configuración")
-if st.sidebar.button("Gestor de Addons"):
-    set_module("Gestor de Addons")
-
-# Renderizar el módulo seleccionado
-render_module(st.session_state.module)
\ No newline at end of file
+@timed("sidebar")
+def render_sidebar():
+    st.sidebar.markdown("## Navegación")
+    if st.sidebar.button("Inicio"):
+        set_module("Inicio")
+    if st.sidebar.button("Carga de Datos"):
+        set_module("Carga de Datos")
+    if st.sidebar.button("Análisis de Trading"):
+        set_module("Análisis de Trading")
+    if st.sidebar.button("Módulo de Gráficos"):
+        set_module("Módulo de Gráficos")
+    if st.sidebar.button("Backtesting"):
+        set_module("Backtesting")
+    if st.sidebar.button("Mercado en Vivo"):
+        set_module("Mercado en Vivo")
+    if st.sidebar.button("Cuenta"):
+        set_module("Cuenta")
+    if st.sidebar.button("Screener"):
+        set_module("Screener")
+    if st.sidebar.button("Diario"):
+        set_module("Diario")
+
+    from services.addons_manager import scan_addons
+    addon_list = scan_addons()  # Lee todos los addons (cada uno con su config)
+
+    if addon_list:
+        for addon in addon_list:
+            nav = addon.get("nav_button", {})
+            if nav.get("show", False):
+                button_label = nav.get("label", addon["name"])
+                if st.sidebar.button(button_label):
+                    st.session_state.module = addon["name"]
+
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("## Herramientas")
+    if st.sidebar.button("Configuración"):
+        set_module("Configuración")
+    if st.sidebar.button("Gestor de Addons"):
+        set_module("Gestor de Addons")
+    if st.sidebar.button("Rendimiento"):
+        set_module("Rendimiento")
+
+# Instrumentación del rerun: tramos por sesión y, si se pidió, perfil completo
+begin_rerun()
+rerun_profiler = start_profile() if st.session_state.get("profile_next_rerun") else None
+try:
+    render_sidebar()
+
+    # Al salir de "Mercado en Vivo" la sesión suelta sus símbolos del stream
+    if st.session_state.module != "Mercado en Vivo" and "live_subscribed" in st.session_state:
+        from services.market_stream import release_session_symbols
+        release_session_symbols(st.session_state)
+
+    # Renderizar el módulo seleccionado
+    render_module(st.session_state.module)
+finally:
+    # st.stop() y st.rerun() salen lanzando una excepción: el rerun y el perfil se cierran igualmente
+    end_rerun(st.session_state.module)
+    if rerun_profiler is not None:
+        report = stop_profile(rerun_profiler)
+        # El perfil se guarda para el primer rerun de un módulo distinto de la propia página
+        if st.session_state.module != "Rendimiento":
+            st.session_state.last_profile = {"module": st.session_state.module, "report": report}
+            st.session_state.profile_next_rerun = False
+# Contabilidad de memoria de la sesión y expulsión de las sesiones inactivas
+session_registry = get_session_registry()
+session_registry.touch(st.session_state.module)
+session_registry.sweep()
@@ -0,0 +1,83 @@
+"""
+Benchmark del cliente de Alpaca contra el servidor stub local.
+
+Compara peticiones sueltas con requests.get, la sesión con pool y la
+descarga concurrente con asyncio, y comprueba el manejo de 429.
+
+Uso:
+    python -m benchmarks.bench_alpaca_client
+"""
+import time
+
+import requests
+
+from benchmarks.stub_alpaca_server import StubAlpacaServer
+from services.alpaca_integration import AlpacaIntegration
+
+SYMBOLS = [f"SYM{i}" for i in range(50)]
+
+
+def make_client(url, **kwargs):
+    # Límite alto: se mide el cliente, no el rate limiter
+    kwargs.setdefault("rate_per_minute", 60_000)
+    client = AlpacaIntegration(**kwargs)
+    client.base_url = url
+    return client
+
+
+def bench_bare_requests(url):
+    headers = {"APCA-API-KEY-ID": "x", "APCA-API-SECRET-KEY": "y"}
+    start = time.perf_counter()
+    for symbol in SYMBOLS:
+        requests.get(f"{url}/v2/stocks/{symbol}/bars", headers=headers, params={"timeframe": "1Day"})
+    return time.perf_counter() - start
+
+
+def bench_pooled(url):
+    client = make_client(url)
+    start = time.perf_counter()
+    for symbol in SYMBOLS:
+        client.get_bars(symbol)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+def bench_async(url, max_concurrency=10):
+    client = make_client(url, pool_size=max_concurrency)
+    start = time.perf_counter()
+    results = client.get_bars_many(SYMBOLS, max_concurrency=max_concurrency)
+    elapsed = time.perf_counter() - start
+    client.close()
+    errors = sum(1 for r in results.values() if "error" in r)
+    return elapsed, errors
+
+
+def bench_paginated(url, total_bars=200_000):
+    client = make_client(url)
+    start = time.perf_counter()
+    rows = sum(len(frame) for frame in client.iter_bars("SYM0", timeframe="1Min"))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed, rows
+
+
+def main():
+    with StubAlpacaServer(latency=0.005) as server:
+        print(f"requests.get sin pool : {bench_bare_requests(server.url):.3f}s")
+        print(f"Sesión con pool       : {bench_pooled(server.url):.3f}s")
+        elapsed, errors = bench_async(server.url)
+        print(f"asyncio (10 en vuelo) : {elapsed:.3f}s, errores={errors}")
+
+    with StubAlpacaServer(bars_per_page=10_000, total_bars=200_000) as server:
+        elapsed, rows = bench_paginated(server.url)
+        print(f"Paginado en streaming : {elapsed:.3f}s, barras={rows}")
+
+    with StubAlpacaServer(latency=0.005, rate_limit_every=7, retry_after=0.05) as server:
+        elapsed, errors = bench_async(server.url)
+        print(f"asyncio con 429       : {elapsed:.3f}s, errores={errors}, "
+              f"429 recibidos={server.rate_limited_count}")
+
+
+if __name__ == "__main__":
+    main()
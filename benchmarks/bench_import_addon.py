@@ -0,0 +1,36 @@
+"""
+Benchmark de importación de addons empaquetados en zip.
+
+Genera bundles con muchos ficheros y mide import_addon (lectura del
+config.json desde el directorio central, extracción en streaming y
+renombrado atómico).
+
+Uso:
+    python -m benchmarks.bench_import_addon
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import build_addon_bundle
+from services.addons_manager import import_addon
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        addons_dir = os.path.join(workdir, "addons")
+        temp_dir = os.path.join(workdir, "temp")
+        for files, file_size in [(100, 16 * 1024), (1000, 64 * 1024), (4000, 32 * 1024)]:
+            bundle = build_addon_bundle(os.path.join(workdir, f"bundle_{files}.zip"), f"bench_{files}", files, file_size)
+            start = time.perf_counter()
+            with open(bundle, "rb") as f:
+                result = import_addon(f, temp_dir=temp_dir, addons_dir=addons_dir)
+            elapsed = time.perf_counter() - start
+            mb = files * file_size / 1e6
+            status = "ok" if result is not None else "error"
+            print(f"{files:5d} ficheros ({mb:7.1f} MB): {elapsed:.3f}s ({mb / elapsed:.0f} MB/s) [{status}]")
+        print(f"Staging restante en temp: {os.listdir(temp_dir)}")
+
+
+if __name__ == "__main__":
+    main()
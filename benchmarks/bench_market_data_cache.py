@@ -0,0 +1,39 @@
+"""
+Benchmark de la caché de barras: tiempos en frío (miss), incremental (cola) y en caliente (hit).
+
+Uso:
+    python -m benchmarks.bench_market_data_cache
+"""
+import tempfile
+
+from benchmarks.stub_alpaca_server import StubAlpacaServer
+from services.alpaca_integration import AlpacaIntegration
+from services.market_data_cache import MarketDataCache
+
+SYMBOLS = [f"SYM{i}" for i in range(20)]
+
+
+def main():
+    with StubAlpacaServer(latency=0.02, bars_per_page=10_000, total_bars=50_000) as server, \
+            tempfile.TemporaryDirectory() as cache_dir:
+        client = AlpacaIntegration(rate_per_minute=60_000)
+        client.base_url = server.url
+        cache = MarketDataCache(client, cache_dir=cache_dir, max_age=3600)
+
+        for symbol in SYMBOLS:
+            cache.get_bars(symbol, "1Min", start="2020-01-01")
+        for _ in range(5):
+            for symbol in SYMBOLS:
+                cache.get_bars(symbol, "1Min", start="2020-09-14")
+
+        report = cache.report()
+        print(f"Peticiones      : {report['requests']}")
+        print(f"Tasa de aciertos: {report['hit_rate']:.1%}")
+        print(f"Frío (miss)     : {report['miss_ms']:.1f} ms/símbolo")
+        print(f"Caliente (hit)  : {report['hit_ms']:.1f} ms/símbolo")
+        print(f"Tamaño en disco : {report['bytes'] / 1e6:.1f} MB")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark de latencia y throughput del stream de mercado contra el feed falso.
+
+Uso:
+    python -m benchmarks.bench_market_stream [segundos] [mensajes_por_segundo]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.fake_feed_server import FakeFeedServer
+from services.market_stream import MarketStream
+
+SYMBOLS = [f"SYM{i}" for i in range(50)]
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    rate = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    latencies = []
+
+    with FakeFeedServer(rate=rate) as server:
+        stream = MarketStream(url=server.url, api_key="x", api_secret="y")
+        stream.add_listener(lambda kind, symbol, msg: latencies.append(time.time_ns() - msg["_sent"]))
+        stream.subscribe(SYMBOLS)
+        stream.start()
+        time.sleep(duration)
+        stream.stop()
+        sent = server.sent
+
+    lat_us = np.array(latencies) / 1000
+    print(f"Enviados {sent:,} · recibidos {stream.messages:,} en {duration:.0f}s "
+          f"({stream.messages / duration:,.0f} msg/s)")
+    if len(lat_us):
+        print(f"Latencia p50={np.percentile(lat_us, 50):.0f}µs p95={np.percentile(lat_us, 95):.0f}µs "
+              f"p99={np.percentile(lat_us, 99):.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark del envío de órdenes en lote contra el servidor stub local.
+
+Compara el envío secuencial con el lote concurrente, comprueba que reenviar
+los mismos client_order_id no duplica órdenes y muestra los percentiles de
+latencia envío-confirmación.
+
+Uso:
+    python -m benchmarks.bench_order_manager
+"""
+import time
+
+from benchmarks.stub_alpaca_server import StubAlpacaServer
+from services.alpaca_integration import AlpacaIntegration
+from services.order_manager import OrderManager
+
+N_ORDERS = 60
+
+
+def make_manager(url, max_workers):
+    # Límite alto para medir la concurrencia y no el throttling
+    client = AlpacaIntegration(pool_size=max_workers, rate_per_minute=60_000)
+    client.base_url = url
+    return OrderManager(client=client, max_workers=max_workers)
+
+
+def make_orders(prefix):
+    return [{"symbol": f"SYM{i % 20}", "qty": 1 + i % 5, "side": "buy" if i % 2 else "sell",
+             "client_order_id": f"{prefix}-{i}"} for i in range(N_ORDERS)]
+
+
+def main():
+    with StubAlpacaServer(latency=0.02) as server:
+        manager = make_manager(server.url, max_workers=1)
+        start = time.perf_counter()
+        for order in make_orders("seq"):
+            manager.submit(**order)
+        sequential = time.perf_counter() - start
+        manager.shutdown()
+
+        manager = make_manager(server.url, max_workers=10)
+        orders = make_orders("batch")
+        start = time.perf_counter()
+        manager.submit_batch(orders)
+        batch = time.perf_counter() - start
+
+        sent_before = len(server.orders)
+        manager.submit_batch(orders)
+        duplicated = len(server.orders) - sent_before
+
+        manager.poll()
+        book = manager.order_book()
+        stats = manager.latency_stats()
+        manager.shutdown()
+
+    print(f"{N_ORDERS} órdenes secuenciales: {sequential:.3f}s")
+    print(f"{N_ORDERS} órdenes en lote (10 hilos): {batch:.3f}s ({sequential / batch:.1f}x)")
+    print(f"Órdenes duplicadas al reenviar el lote: {duplicated}")
+    print(f"Estados tras poll(): {book['status'].value_counts().to_dict()}")
+    print("Latencia (ms): " + ", ".join(f"{k}={v:.1f}" for k, v in stats.items() if k != "count"))
+
+
+if __name__ == "__main__":
+    main()
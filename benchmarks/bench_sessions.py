@@ -0,0 +1,84 @@
+"""
+Prueba de carga: N sesiones simultáneas de app.py contra el servidor stub de Alpaca.
+
+Cada sesión es un AppTest independiente (su propio session_state) que navega
+por Inicio, Cuenta y Rendimiento y repite reruns de Cuenta. Todas comparten el
+proceso, como en un servidor de Streamlit real, así que los recursos de
+st.cache_resource (cliente de Alpaca, caché de barras, registro de sesiones)
+se crean una vez. Para cada N se mide la RSS del proceso y la latencia de los
+reruns (p50/p95).
+
+Uso:
+    python -m benchmarks.bench_sessions [--sessions 1 5 10 30] [--reruns 5]
+"""
+import argparse
+import os
+import resource
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_alpaca_server import StubAlpacaServer
+
+MODULES = ["Inicio", "Cuenta", "Rendimiento"]
+
+
+def rss_mb():
+    """RSS actual del proceso (Linux) o, si no está disponible, el pico."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_session(reruns):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file("app.py", default_timeout=60)
+    latencies = []
+    for module in MODULES + ["Cuenta"] * reruns:
+        at.session_state["module"] = module
+        start = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"Excepción en {module}: {at.exception[0].value}")
+    return latencies
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 30])
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.01, help="Latencia simulada del stub (s)")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with StubAlpacaServer(latency=args.latency) as server:
+        from config import Config
+        # Antes del primer rerun: el cliente compartido se crea con esta URL
+        Config.ALPACA_BASE_URL = server.url
+        baseline = rss_mb()
+        print(f"RSS inicial: {baseline:.1f} MB")
+        print(f"{'sesiones':>8} {'RSS MB':>8} {'Δ/sesión':>9} {'p50 ms':>8} {'p95 ms':>8} {'peticiones':>10}")
+        for n in args.sessions:
+            requests_before = server.request_count
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                results = list(pool.map(run_session, [args.reruns] * n))
+            latencies = [latency for session in results for latency in session]
+            current = rss_mb()
+            print(f"{n:>8} {current:>8.1f} {(current - baseline) / n:>9.2f} "
+                  f"{statistics.median(latencies) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+                  f"{server.request_count - requests_before:>10}")
+
+
+if __name__ == "__main__":
+    main()
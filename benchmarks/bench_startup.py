@@ -0,0 +1,113 @@
+"""
+Benchmark de arranque en frío de app.py.
+
+Lanza un proceso nuevo con `python -X importtime` que ejecuta la app con
+streamlit.testing (AppTest) hasta el primer render de "Inicio" y un rerun.
+Informa del tiempo hasta el primer render, de las importaciones que dispara
+la propia app (las de streamlit quedan fuera) ordenadas por coste acumulado,
+y termina con código 1 si se supera el presupuesto o si se cargan módulos
+que deberían ser diferidos.
+
+Uso:
+    python -m benchmarks.bench_startup [--budget-render 1.5] [--budget-imports 150]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "import time: --- app ---"
+# Módulos que la pantalla de inicio no debe importar
+DEFERRED_MODULES = ["pandas", "numpy", "requests", "zipfile", "services.alpaca_integration", "services.addon_loader"]
+
+CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=60)
+at.run()
+first_render = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{
+    "first_render_s": first_render,
+    "rerun_s": rerun,
+    "exceptions": [str(e.value) for e in at.exception],
+    "new_modules": sorted(set(sys.modules) - before),
+    "preloaded": sorted(m for m in {deferred!r} if m in before),
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Devuelve [(módulo, acumulado_us)] de las importaciones posteriores al marcador.
+
+    El nombre conserva la sangría de -X importtime (dos espacios por nivel).
+    """
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            imports.append((name[1:].rstrip(), int(cumulative)))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-render", type=float, default=float(os.getenv("STARTUP_BUDGET_RENDER_S", "1.5")),
+                        help="Segundos máximos hasta el primer render")
+    parser.add_argument("--budget-imports", type=float, default=float(os.getenv("STARTUP_BUDGET_IMPORTS_MS", "150")),
+                        help="Milisegundos máximos de importaciones disparadas por la app")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    code = CHILD.format(marker=MARKER, deferred=DEFERRED_MODULES)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr[-4000:])
+        sys.exit(proc.returncode)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(proc.stderr)
+    # Solo las importaciones de primer nivel, para no contar dos veces los submódulos
+    top_level = [(name, us) for name, us in imports if not name.startswith(" ")]
+    import_ms = sum(us for _, us in top_level) / 1000
+
+    print(f"Primer render: {result['first_render_s']:.3f}s (presupuesto {args.budget_render:.3f}s)")
+    print(f"Rerun: {result['rerun_s']:.3f}s")
+    print(f"Importaciones disparadas por la app: {import_ms:.1f} ms (presupuesto {args.budget_imports:.0f} ms)")
+    for name, us in sorted(top_level, key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    if result["preloaded"]:
+        print(f"Ya importados por streamlit (no comprobables): {', '.join(result['preloaded'])}")
+
+    failures = []
+    if result["exceptions"]:
+        failures.append(f"excepciones en la app: {result['exceptions']}")
+    if result["first_render_s"] > args.budget_render:
+        failures.append("primer render por encima del presupuesto")
+    if import_ms > args.budget_imports:
+        failures.append("importaciones por encima del presupuesto")
+    eager = [m for m in DEFERRED_MODULES if m in result["new_modules"]]
+    if eager:
+        failures.append(f"módulos que deberían cargarse al usarse: {', '.join(eager)}")
+    if failures:
+        print("FALLO: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
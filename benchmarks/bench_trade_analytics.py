@@ -0,0 +1,50 @@
+"""
+Benchmark del motor de análisis de operaciones.
+
+Objetivo: menos de 1 segundo para 5M operaciones en un núcleo. El script
+termina con código 1 si se supera el objetivo.
+
+Uso:
+    python -m benchmarks.bench_trade_analytics [n_operaciones]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.trade_analytics import analyze_trades
+
+TARGET_SECONDS = 1.0
+
+
+def make_trades(n, n_symbols=500, seed=0):
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"SYM{i:04d}" for i in range(n_symbols)])
+    start = np.datetime64("2020-01-01T00:00:00", "ns").astype(np.int64)
+    timestamps = start + np.sort(rng.integers(0, 4 * 365 * 86_400 * 10**9, n))
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(timestamps, utc=True),
+        "symbol": pd.Categorical.from_codes(rng.integers(0, n_symbols, n), categories=symbols),
+        "side": pd.Categorical.from_codes(rng.integers(0, 2, n), categories=["buy", "sell"]),
+        "quantity": rng.integers(1, 100, n).astype(np.float32),
+        "price": (100 + rng.standard_normal(n).cumsum() * 0.01).astype(np.float32),
+        "commission": np.full(n, 0.5, dtype=np.float32),
+    })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    trades = make_trades(n)
+    analyze_trades(trades.head(1000))  # calentamiento
+    start = time.perf_counter()
+    result = analyze_trades(trades)
+    elapsed = time.perf_counter() - start
+    print(f"{n:,} operaciones analizadas en {elapsed:.3f}s (objetivo {TARGET_SECONDS}s)")
+    print(f"P&L neto: {result['summary']['net_pnl']:,.2f}, cerradas: {result['summary']['closed_trades']:,}")
+    if n >= 5_000_000 and elapsed > TARGET_SECONDS:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
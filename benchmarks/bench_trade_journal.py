@@ -0,0 +1,67 @@
+"""
+Benchmark del diario de operaciones frente a releer el CSV completo.
+
+Genera N operaciones sintéticas repartidas en D días, las añade al diario en
+lotes y mide: el append, una reimportación completa (todo duplicados), la
+consulta de un rango corto de fechas y de un símbolo, y la lectura del CSV
+equivalente con data_loader.
+
+Uso:
+    python -m benchmarks.bench_trade_journal [--rows 1000000] [--days 500]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import trades_frame
+from services.data_loader import load_trades_csv
+from services.trade_journal import TradeJournal
+
+
+def timed_call(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=100_000)
+    args = parser.parse_args()
+
+    trades = trades_frame(args.rows, args.days)
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TradeJournal(os.path.join(tmp, "journal"))
+        start = time.perf_counter()
+        for lo in range(0, len(trades), args.batch):
+            journal.append(trades.iloc[lo:lo + args.batch])
+        append_time = time.perf_counter() - start
+
+        result, reimport_time = timed_call(journal.append, trades)
+        assert result["added"] == 0, result
+
+        mid = trades["timestamp"].iloc[len(trades) // 2]
+        week, week_time = timed_call(TradeJournal.query, journal, mid, mid + pd.Timedelta(days=7))
+        symbol, symbol_time = timed_call(TradeJournal.query, journal, symbols=["S0001"])
+        _, reopen_time = timed_call(TradeJournal, journal.root)
+
+        csv_path = os.path.join(tmp, "trades.csv")
+        trades.to_csv(csv_path, index=False)
+        _, csv_time = timed_call(load_trades_csv, csv_path)
+
+    print(f"Diario: {args.rows:,} operaciones en {args.days} días ({journal.stats()['bytes'] / 1e6:.1f} MB)")
+    print(f"Append en lotes de {args.batch:,}: {append_time:.2f}s")
+    print(f"Reimportación completa (todo duplicados): {reimport_time:.2f}s")
+    print(f"Reapertura del diario: {reopen_time * 1000:.1f} ms")
+    print(f"Consulta de 7 días: {week_time * 1000:.1f} ms ({len(week):,} filas)")
+    print(f"Consulta de un símbolo: {symbol_time * 1000:.1f} ms ({len(symbol):,} filas)")
+    print(f"Lectura del CSV completo con data_loader: {csv_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
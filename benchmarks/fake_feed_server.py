@@ -0,0 +1,102 @@
+"""
+Servidor websocket local que imita el feed de datos de Alpaca.
+
+Acepta auth/subscribe y emite quotes y barras de los símbolos suscritos a un
+ritmo configurable. Cada mensaje lleva "_sent" (time.time_ns()) para medir la
+latencia extremo a extremo.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+import websockets
+
+
+class FakeFeedServer:
+    def __init__(self, rate=1000, batch=10, reject_auth=False):
+        """
+        Args:
+            rate (int): Mensajes por segundo aproximados.
+            batch (int): Mensajes por frame websocket.
+            reject_auth (bool): Responde a la autenticación con un error 402 y cierra.
+        """
+        self.rate = rate
+        self.batch = batch
+        self.reject_auth = reject_auth
+        self.subscribed = set()
+        self.port = None
+        self.sent = 0
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stop = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def _handler(self, ws):
+        symbols = []
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+
+        async def reader():
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("action") == "auth":
+                    if self.reject_auth:
+                        await ws.send(json.dumps([{"T": "error", "code": 402, "msg": "auth failed"}]))
+                        await ws.close()
+                        return
+                    await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+                elif msg.get("action") == "subscribe":
+                    symbols.extend(s for s in msg.get("quotes", []) if s not in symbols)
+                elif msg.get("action") == "unsubscribe":
+                    symbols[:] = [s for s in symbols if s not in msg.get("quotes", [])]
+                self.subscribed = set(symbols)
+
+        reader_task = asyncio.ensure_future(reader())
+        interval = self.batch / self.rate
+        price = {}
+        try:
+            while not reader_task.done():
+                if symbols:
+                    frame = []
+                    for _ in range(self.batch):
+                        symbol = random.choice(symbols)
+                        p = price.get(symbol, 100.0) + random.gauss(0, 0.05)
+                        price[symbol] = p
+                        frame.append({"T": "q", "S": symbol, "bp": p - 0.01, "ap": p + 0.01, "bs": 1, "as": 1,
+                                      "t": None, "_sent": time.time_ns()})
+                    await ws.send(json.dumps(frame))
+                    self.sent += len(frame)
+                await asyncio.sleep(interval)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            reader_task.cancel()
+
+    async def _serve(self):
+        self._stop = asyncio.Event()
+        async with websockets.serve(self._handler, "127.0.0.1", 0) as server:
+            self.port = next(iter(server.sockets)).getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,328 @@
+"""
+Suite de benchmarks reproducible de los caminos críticos del dashboard.
+
+Genera datos sintéticos (benchmarks.synthetic) en una carpeta temporal que
+hace de directorio de trabajo de la app (addons/, cache/, data/) y mide:
+
+- scan_addons en frío (índice invalidado) y en caliente.
+- import_addon de un zip con muchos ficheros.
+- Carga de CSV de "Carga de Datos": load_trades_csv desde ruta y desde un
+  fichero en memoria como el de st.file_uploader, y la huella de contenido.
+- AlpacaIntegration contra el servidor stub local (cuenta, barras, descarga
+  concurrente y paginada).
+- Reruns completos de app.py sin navegador con streamlit.testing (AppTest)
+  en cada módulo, incluido un addon sintético.
+
+Cada caso se repite --repeat veces y se guarda la mediana, el p95, el mínimo
+y el máximo en milisegundos. El resultado se escribe como JSON (con el commit,
+las versiones y los parámetros) en --output, y --compare compara contra una
+ejecución anterior marcando las regresiones por encima de --threshold.
+
+Uso:
+    python -m benchmarks.run_suite [--size small|medium|large] [--repeat 5] [--only addons csv]
+    python -m benchmarks.run_suite --compare benchmarks/results/base.json [--fail-on-regression]
+    python -m benchmarks.run_suite --compare base.json nuevo.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results")
+SIZES = {
+    "small": {"csv_rows": 100_000, "addons": 50, "addon_files": 0, "bundle_files": 200, "bundle_file_size": 16 * 1024,
+              "symbols": 20, "bars": 1_000, "app_reruns": 3},
+    "medium": {"csv_rows": 1_000_000, "addons": 200, "addon_files": 5, "bundle_files": 1000,
+               "bundle_file_size": 32 * 1024, "symbols": 50, "bars": 10_000, "app_reruns": 5},
+    "large": {"csv_rows": 5_000_000, "addons": 1000, "addon_files": 10, "bundle_files": 4000,
+              "bundle_file_size": 32 * 1024, "symbols": 200, "bars": 100_000, "app_reruns": 10},
+}
+APP_MODULES = ["Inicio", "Carga de Datos", "Análisis de Trading", "Módulo de Gráficos", "Cuenta", "Screener",
+               "Diario", "Gestor de Addons", "Rendimiento"]
+
+
+def measure(fn, repeat, setup=None):
+    """
+    Ejecuta fn() repeat veces (con setup() antes de cada una, fuera del tiempo).
+
+    Returns:
+        tuple: (estadísticas en ms, resultado de la última ejecución)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    ordered = sorted(timings)
+    return {
+        "runs": len(timings),
+        "median_ms": statistics.median(timings),
+        "p95_ms": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+    }, result
+
+
+class UploadedBytes(io.BytesIO):
+    """Fichero en memoria con name/size, como el UploadedFile de st.file_uploader."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+# --- Casos ---
+
+def bench_addons(ctx):
+    from benchmarks.synthetic import build_addon_bundle
+    from services.addons_manager import scan_addons, import_addon, invalidate_addon_index
+    results = {}
+    results["scan_addons.cold"], addons = measure(lambda: scan_addons("addons"), ctx.repeat,
+                                                  setup=lambda: invalidate_addon_index("addons"))
+    results["scan_addons.cold"]["addons"] = len(addons)
+    results["scan_addons.warm"], _ = measure(lambda: scan_addons("addons"), ctx.repeat)
+
+    bundle = build_addon_bundle(os.path.join(ctx.workdir, "bench_bundle.zip"), "bench_bundle",
+                                ctx.params["bundle_files"], ctx.params["bundle_file_size"])
+
+    def run_import():
+        with open(bundle, "rb") as f:
+            return import_addon(f, temp_dir="temp", addons_dir="addons")
+
+    results["import_addon"], imported = measure(run_import, ctx.repeat)
+    results["import_addon"].update(files=ctx.params["bundle_files"], ok=imported is not None,
+                                   mb=ctx.params["bundle_files"] * ctx.params["bundle_file_size"] / 1e6)
+    return results
+
+
+def bench_csv(ctx):
+    from services.data_loader import load_trades_csv
+    from services.dataset_store import content_hash
+    with open(ctx.csv_path, "rb") as f:
+        data = f.read()
+    results = {}
+    results["csv.load_path"], df = measure(lambda: load_trades_csv(ctx.csv_path), ctx.repeat)
+    results["csv.load_path"].update(rows=len(df), mb=len(data) / 1e6)
+    results["csv.load_upload"], _ = measure(lambda: load_trades_csv(UploadedBytes(data, "trades.csv"),
+                                                                    progress_callback=lambda f: None), ctx.repeat)
+    results["csv.content_hash"], _ = measure(lambda: content_hash(data), ctx.repeat)
+    return results
+
+
+def bench_alpaca(ctx):
+    from services.alpaca_integration import AlpacaIntegration
+    client = AlpacaIntegration(rate_per_minute=60_000)  # se mide el cliente, no el límite del broker
+    client.base_url = ctx.server.url
+    symbols = [f"S{i:04d}" for i in range(ctx.params["symbols"])]
+    results = {}
+    try:
+        results["alpaca.get_account"], _ = measure(client.get_account, ctx.repeat)
+        results["alpaca.get_bars"], _ = measure(lambda: client.get_bars("S0000", "1Min"), ctx.repeat)
+        results["alpaca.get_bars_many"], bars = measure(lambda: client.get_bars_many(symbols, "1Day"), ctx.repeat)
+        results["alpaca.get_bars_many"].update(symbols=len(symbols),
+                                               errors=sum(1 for r in bars.values() if "error" in r))
+        results["alpaca.iter_bars"], rows = measure(
+            lambda: sum(len(frame) for frame in client.iter_bars("S0000", "1Min")), ctx.repeat)
+        results["alpaca.iter_bars"]["bars"] = rows
+    finally:
+        client.close()
+    return results
+
+
+def bench_app(ctx):
+    from streamlit.testing.v1 import AppTest
+    from benchmarks.synthetic import trades_frame
+    from config import Config
+    from services.dataset_store import get_dataset_store, content_hash
+
+    # Antes del primer rerun: el cliente compartido (st.cache_resource) se crea con esta URL
+    Config.ALPACA_BASE_URL = ctx.server.url
+    # Dataset ya cargado en la sesión, para que Análisis y Gráficos tengan datos
+    frame = trades_frame(min(ctx.params["csv_rows"], 200_000))
+    digest = content_hash(b"bench-app-dataset")
+    get_dataset_store().add(digest, frame, name="bench.csv")
+
+    results = {}
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.session_state["datasets"] = {"bench.csv": digest}
+    at.session_state["active_dataset"] = "bench.csv"
+    start = time.perf_counter()
+    at.run()
+    results["app.first_run"] = {"runs": 1, "median_ms": (time.perf_counter() - start) * 1000}
+
+    modules = APP_MODULES + ([ctx.addon_module] if ctx.addon_module else [])
+    for module in modules:
+        errors = []
+
+        def rerun():
+            at.session_state["module"] = module
+            at.run()
+            if at.exception:
+                errors.append(str(at.exception[0].value))
+
+        # El primer render del módulo (imports y cachés en frío) se mide aparte de los reruns
+        results[f"app.enter.{module}"], _ = measure(rerun, 1)
+        results[f"app.rerun.{module}"], _ = measure(rerun, ctx.params["app_reruns"])
+        if errors:
+            results[f"app.rerun.{module}"]["error"] = errors[0]
+    return results
+
+
+CASES = {"addons": bench_addons, "csv": bench_csv, "alpaca": bench_alpaca, "app": bench_app}
+
+
+# --- Resultados ---
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def _versions():
+    from importlib.metadata import version, PackageNotFoundError
+    result = {}
+    for package in ("streamlit", "pandas", "numpy", "requests"):
+        try:
+            result[package] = version(package)
+        except PackageNotFoundError:
+            result[package] = None
+    return result
+
+
+def metadata(args):
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": _versions(),
+        "size": args.size,
+        "params": SIZES[args.size],
+        "repeat": args.repeat,
+        "stub_latency": args.stub_latency,
+        "seed": args.seed,
+    }
+
+
+def save_results(report, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    meta = report["meta"]
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{meta['commit'] or 'nogit'}{'-dirty' if meta['dirty'] else ''}-{meta['size']}.json"
+    path = os.path.join(output_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare_results(base, current, threshold):
+    """
+    Imprime la mediana de cada caso en ambas ejecuciones y devuelve los casos que empeoran más de threshold.
+    """
+    base_results, current_results = base["results"], current["results"]
+    print(f"Base: {base['meta'].get('commit')} ({base['meta'].get('size')}) · "
+          f"actual: {current['meta'].get('commit')} ({current['meta'].get('size')})")
+    if base["meta"].get("params") != current["meta"].get("params"):
+        print("Aviso: las ejecuciones usan parámetros distintos; las diferencias no son comparables.")
+    print(f"{'caso':<40} {'base ms':>10} {'actual ms':>10} {'ratio':>7}")
+    regressions = []
+    for name in sorted(set(base_results) | set(current_results)):
+        old = base_results.get(name, {}).get("median_ms")
+        new = current_results.get(name, {}).get("median_ms")
+        if old is None or new is None:
+            print(f"{name:<40} {'-' if old is None else f'{old:.2f}':>10} {'-' if new is None else f'{new:.2f}':>10}")
+            continue
+        ratio = new / old if old else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESIÓN"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  mejora"
+        print(f"{name:<40} {old:>10.2f} {new:>10.2f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def _load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del dashboard.")
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--stub-latency", type=float, default=0.002, help="Latencia simulada del stub (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Carpeta donde se guarda el JSON")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="Ejecución base (y opcionalmente otra ejecución, sin volver a medir)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Empeoramiento relativo que cuenta como regresión")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        regressions = compare_results(_load(args.compare[0]), _load(args.compare[1]), args.threshold)
+        sys.exit(1 if regressions and args.fail_on_regression else 0)
+
+    from benchmarks.stub_alpaca_server import StubAlpacaServer
+    from benchmarks.synthetic import build_addons_dir, write_trades_csv
+
+    params = SIZES[args.size]
+    # La app usa rutas relativas (addons/, cache/, data/): se ejecuta dentro de la carpeta temporal
+    sys.path.insert(0, ROOT)
+    previous_cwd = os.getcwd()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="dashbot-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            ctx = argparse.Namespace(workdir=workdir, params=params, repeat=args.repeat, csv_path=None,
+                                     addon_module=None, server=None)
+            start = time.perf_counter()
+            addon_ids = build_addons_dir("addons", params["addons"], params["addon_files"], seed=args.seed)
+            ctx.addon_module = addon_ids[0] if addon_ids else None
+            if "csv" in args.only:
+                ctx.csv_path = os.path.join(workdir, "trades.csv")
+                write_trades_csv(ctx.csv_path, params["csv_rows"], seed=args.seed)
+            print(f"Datos sintéticos ({args.size}) generados en {time.perf_counter() - start:.1f}s")
+
+            with StubAlpacaServer(latency=args.stub_latency, bars_per_page=10_000, total_bars=params["bars"]) as server:
+                ctx.server = server
+                for name in args.only:
+                    start = time.perf_counter()
+                    case_results = CASES[name](ctx)
+                    results.update(case_results)
+                    print(f"[{name}] {len(case_results)} medidas en {time.perf_counter() - start:.1f}s")
+                    for key, stats in case_results.items():
+                        extra = f"  ERROR: {stats['error']}" if "error" in stats else ""
+                        print(f"  {key:<40} {stats['median_ms']:>10.2f} ms{extra}")
+        finally:
+            os.chdir(previous_cwd)
+
+    report = {"meta": metadata(args), "results": results}
+    path = save_results(report, args.output)
+    print(f"Resultados guardados en {path}")
+    if args.compare:
+        regressions = compare_results(_load(args.compare[0]), report, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"FALLO: {len(regressions)} regresiones")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
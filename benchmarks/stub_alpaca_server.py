@@ -0,0 +1,167 @@
+"""
+Servidor HTTP local que imita la API de Alpaca para benchmarks sin red.
+
+Permite simular latencia y respuestas 429 con Retry-After para medir el
+rendimiento del cliente y su política de reintentos.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubAlpacaServer:
+    def __init__(self, latency=0.0, rate_limit_every=0, retry_after=0.05, bars_per_page=100, total_bars=None):
+        """
+        Args:
+            latency (float): Segundos de espera por respuesta.
+            rate_limit_every (int): Devuelve 429 cada N peticiones (0 = nunca).
+            retry_after (float): Valor de la cabecera Retry-After en los 429.
+            bars_per_page (int): Número de barras por respuesta.
+            total_bars (int): Barras totales por símbolo; si se indica, se pagina con next_page_token.
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.bars_per_page = bars_per_page
+        self.total_bars = total_bars
+        self.request_count = 0
+        self.orders = {}
+        self.rate_limited_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def make_bars(self, count, start_ts=1_600_000_000):
+        return [
+            {"t": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start_ts + i * 60)),
+             "o": 100.0 + i, "h": 101.0 + i, "l": 99.0 + i, "c": 100.5 + i, "v": 1000 + i}
+            for i in range(count)
+        ]
+
+    def page_bars(self, query):
+        """Devuelve (barras, next_page_token) usando el token como desplazamiento."""
+        if self.total_bars is None:
+            return self.make_bars(self.bars_per_page), None
+        offset = int(query.get("page_token", ["0"])[0])
+        limit = min(int(query.get("limit", [self.bars_per_page])[0]), self.bars_per_page)
+        count = max(0, min(limit, self.total_bars - offset))
+        bars = self.make_bars(count, start_ts=1_600_000_000 + offset * 60)
+        next_offset = offset + count
+        return bars, (str(next_offset) if next_offset < self.total_bars else None)
+
+    def handle_orders(self, method, path, query, body):
+        """Órdenes en memoria: se rechazan client_order_id duplicados y se llenan al listarlas."""
+        with self._lock:
+            if method == "POST":
+                client_order_id = body.get("client_order_id") or f"auto-{len(self.orders)}"
+                if client_order_id in self.orders:
+                    return 422, {"message": "client_order_id must be unique"}
+                order = dict(body, id=f"order-{len(self.orders)}", client_order_id=client_order_id,
+                             status="accepted", filled_qty="0", filled_avg_price=None)
+                self.orders[client_order_id] = order
+                return 200, order
+            if path.endswith(":by_client_order_id"):
+                order = self.orders.get(query.get("client_order_id", [""])[0])
+                return (200, order) if order else (404, {"message": "order not found"})
+            for order in self.orders.values():
+                if order["status"] == "accepted":
+                    order.update(status="filled", filled_qty=order["qty"], filled_avg_price="100.0")
+            return 200, list(self.orders.values())
+
+    def handle_path(self, path, query, method="GET", body=None):
+        """Devuelve (status, payload) para una ruta; se puede ampliar en subclases."""
+        if "/orders" in path:
+            return self.handle_orders(method, path, query, body or {})
+        if path.endswith("/positions"):
+            return 200, []
+        if path.endswith("/account"):
+            return 200, {"id": "stub", "equity": "100000", "cash": "100000", "status": "ACTIVE"}
+        if path.endswith("/stocks/bars"):
+            symbols = query.get("symbols", [""])[0].split(",")
+            bars, token = self.page_bars(query)
+            return 200, {"bars": {symbol: bars for symbol in symbols}, "next_page_token": token}
+        if "/bars" in path:
+            symbol = path.split("/stocks/")[-1].split("/")[0]
+            bars, token = self.page_bars(query)
+            return 200, {"symbol": symbol, "bars": bars, "next_page_token": token}
+        return 404, {"message": "not found"}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                # Cabeceras y cuerpo en una sola escritura: dos write() pequeños en una
+                # conexión keep-alive chocan con Nagle + ACK retrasado (~40 ms por respuesta)
+                self._headers_buffer.extend([b"\r\n", body])
+                self.flush_headers()
+
+            def _dispatch(self):
+                # El cuerpo se lee siempre, también en los 429: si se queda en el socket
+                # la siguiente petición de la conexión keep-alive llega corrupta
+                length = int(self.headers.get("Content-Length") or 0)
+                self.body = json.loads(self.rfile.read(length)) if length else None
+                with stub._lock:
+                    stub.request_count += 1
+                    count = stub.request_count
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if stub.rate_limit_every and count % stub.rate_limit_every == 0:
+                    with stub._lock:
+                        stub.rate_limited_count += 1
+                    self._send(429, {"message": "too many requests"}, {"Retry-After": str(stub.retry_after)})
+                    return
+                parsed = urlparse(self.path)
+                status, payload = stub.handle_path(parsed.path, parse_qs(parsed.query), self.command, self.body)
+                self._send(status, payload)
+
+            do_GET = _dispatch
+            do_POST = _dispatch
+            do_DELETE = _dispatch
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with StubAlpacaServer(latency=0.01) as server:
+        print(f"Servidor stub escuchando en {server.url} (Ctrl+C para salir)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,191 @@
+"""
+Generador de datos sintéticos reproducibles para los benchmarks.
+
+Todo depende de una semilla, así que dos ejecuciones con los mismos
+parámetros producen exactamente los mismos ficheros:
+
+- trades_frame / write_trades_csv: operaciones con el esquema de data_loader
+  (el CSV usa cabeceras de broker para pasar por la normalización de columnas).
+- bar_series: barras OHLCV (paseo aleatorio) de uno o varios símbolos.
+- build_addons_dir / build_addon_bundle: carpetas de addons y zips con la
+  estructura de addons_manager.create_addon.
+
+Uso:
+    python -m benchmarks.synthetic trades data.csv --rows 1000000
+    python -m benchmarks.synthetic addons addons_bench --count 200
+"""
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from services.addon_api import HOST_API_VERSION
+
+# Cabeceras de exporte de broker -> columnas del esquema (ver data_loader.COLUMN_ALIASES)
+CSV_HEADERS = {
+    "fill_id": "Execution_ID",
+    "order_id": "Order ID",
+    "symbol": "Ticker",
+    "side": "Action",
+    "quantity": "Qty",
+    "price": "Fill_Price",
+    "commission": "Commissions",
+    "timestamp": "Time",
+}
+TIMEFRAME_FREQ = {"1Min": "min", "5Min": "5min", "15Min": "15min", "1Hour": "h", "1Day": "B"}
+
+
+def symbols_list(n_symbols):
+    return [f"S{i:04d}" for i in range(n_symbols)]
+
+
+def trades_frame(n_rows, n_days=250, n_symbols=500, seed=0):
+    """Operaciones ordenadas por tiempo repartidas en n_days días."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2023-01-02", tz="UTC").value
+    t = np.sort(start + rng.integers(0, n_days * 86_400 * 10**9, n_rows))
+    price = rng.uniform(5, 500, n_rows).round(2)
+    quantity = rng.integers(1, 500, n_rows).astype(np.float64)
+    return pd.DataFrame({
+        "fill_id": [f"F{i:012d}" for i in range(n_rows)],
+        "order_id": [f"O{i // 2:012d}" for i in range(n_rows)],
+        "symbol": pd.Categorical.from_codes(rng.integers(0, n_symbols, n_rows), categories=symbols_list(n_symbols)),
+        "side": pd.Categorical.from_codes(rng.integers(0, 2, n_rows), categories=["buy", "sell"]),
+        "quantity": quantity,
+        "price": price,
+        "commission": (quantity * 0.005).round(2),
+        "timestamp": pd.to_datetime(t, utc=True),
+    })
+
+
+def write_trades_csv(path, n_rows, n_days=250, n_symbols=500, seed=0):
+    """Escribe un CSV de operaciones con cabeceras de broker y devuelve su tamaño en bytes."""
+    frame = trades_frame(n_rows, n_days, n_symbols, seed).rename(columns=CSV_HEADERS)
+    frame.to_csv(path, index=False, date_format="%Y-%m-%dT%H:%M:%S.%fZ")
+    return os.path.getsize(path)
+
+
+def bar_series(n_bars, symbols=("S0000",), timeframe="1Day", seed=0):
+    """
+    Barras OHLCV con el formato de AlpacaIntegration.get_bars_frame.
+
+    Returns:
+        dict: {símbolo: pd.DataFrame indexado por timestamp (UTC)}
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=n_bars, freq=TIMEFRAME_FREQ[timeframe], tz="UTC", name="timestamp")
+    result = {}
+    for symbol in symbols:
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+        open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.002, n_bars))
+        spread = np.abs(rng.normal(0, 0.005, n_bars)) * close
+        result[symbol] = pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": rng.lognormal(10, 1, n_bars).round(),
+        }, index=index)
+    return result
+
+
+def _addon_config(addon_id, active=True):
+    return {
+        "name": addon_id,
+        "description": "Addon sintético de benchmark",
+        "version": "1.0.0",
+        "author": "benchmarks",
+        "active": active,
+        "api_version": HOST_API_VERSION,
+        "requires": {"datasets": False, "bars": {"symbols": ["S0000"], "timeframes": ["1Day"], "start": None}},
+        "nav_button": {"show": active, "label": addon_id},
+    }
+
+
+def _addon_source(addon_id):
+    return (f'"""Addon sintético {addon_id}."""\n\n\n'
+            'def last_close(bars):\n    close = bars["close"]\n    return float(close[-1]) if len(close) else None\n')
+
+
+_ADDON_UI = """import streamlit as st
+
+
+def render(ctx):
+    for symbol in ctx.symbols:
+        bars = ctx.bars(symbol)
+        if len(bars["close"]):
+            st.metric(symbol, f"{bars['close'][-1]:.2f}")
+"""
+
+
+def build_addons_dir(root, count, extra_files=0, file_size=4 * 1024, inactive_ratio=0.2, seed=0):
+    """
+    Crea count carpetas de addon en root (src/, ui/, config.json y ficheros de datos opcionales).
+
+    Returns:
+        list: Identificadores de los addons creados.
+    """
+    rng = np.random.default_rng(seed)
+    payload = rng.bytes(file_size)
+    os.makedirs(root, exist_ok=True)
+    ids = [f"bench_addon_{i:04d}" for i in range(count)]
+    for addon_id in ids:
+        addon_path = os.path.join(root, addon_id)
+        os.makedirs(os.path.join(addon_path, "src"), exist_ok=True)
+        os.makedirs(os.path.join(addon_path, "ui"), exist_ok=True)
+        with open(os.path.join(addon_path, "config.json"), "w", encoding="utf-8") as f:
+            json.dump(_addon_config(addon_id, active=rng.random() >= inactive_ratio), f)
+        with open(os.path.join(addon_path, "src", f"{addon_id}.py"), "w", encoding="utf-8") as f:
+            f.write(_addon_source(addon_id))
+        with open(os.path.join(addon_path, "ui", "ui.py"), "w", encoding="utf-8") as f:
+            f.write(_ADDON_UI)
+        if extra_files:
+            os.makedirs(os.path.join(addon_path, "data"), exist_ok=True)
+            for i in range(extra_files):
+                with open(os.path.join(addon_path, "data", f"file_{i:05d}.bin"), "wb") as f:
+                    f.write(payload)
+    return ids
+
+
+def build_addon_bundle(path, addon_id, files=500, file_size=64 * 1024, seed=0):
+    """Crea un zip importable con import_addon con files ficheros de datos de file_size bytes."""
+    payload = np.random.default_rng(seed).bytes(file_size)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(f"{addon_id}/config.json", json.dumps(_addon_config(addon_id)))
+        z.writestr(f"{addon_id}/src/{addon_id}.py", _addon_source(addon_id))
+        z.writestr(f"{addon_id}/ui/ui.py", _ADDON_UI)
+        for i in range(files):
+            z.writestr(f"{addon_id}/data/file_{i:05d}.bin", payload)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para benchmarks.")
+    sub = parser.add_subparsers(dest="kind", required=True)
+    trades = sub.add_parser("trades")
+    trades.add_argument("path")
+    trades.add_argument("--rows", type=int, default=1_000_000)
+    trades.add_argument("--days", type=int, default=250)
+    trades.add_argument("--symbols", type=int, default=500)
+    addons = sub.add_parser("addons")
+    addons.add_argument("path")
+    addons.add_argument("--count", type=int, default=100)
+    addons.add_argument("--files", type=int, default=0)
+    bundle = sub.add_parser("bundle")
+    bundle.add_argument("path")
+    bundle.add_argument("--files", type=int, default=500)
+    bundle.add_argument("--file-size", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.kind == "trades":
+        size = write_trades_csv(args.path, args.rows, args.days, args.symbols, args.seed)
+        print(f"{args.rows:,} operaciones en {args.path} ({size / 1e6:.1f} MB)")
+    elif args.kind == "addons":
+        print(f"{len(build_addons_dir(args.path, args.count, args.files, seed=args.seed))} addons en {args.path}")
+    else:
+        addon_id = os.path.splitext(os.path.basename(args.path))[0]
+        build_addon_bundle(args.path, addon_id, args.files, args.file_size, args.seed)
+        print(f"Bundle {args.path}")
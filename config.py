@@ -5,6 +5,16 @@ class Config:
     ALPACA_API_KEY = os.getenv("ALPACA_API_KEY", "tu_api_key")
     ALPACA_API_SECRET = os.getenv("ALPACA_API_SECRET", "tu_api_secret")
     ALPACA_BASE_URL = os.getenv("ALPACA_BASE_URL", "https://paper-api.alpaca.markets/v2")
+    ALPACA_STREAM_URL = os.getenv("ALPACA_STREAM_URL", "wss://stream.data.alpaca.markets/v2/iex")
+    ACCOUNT_POLL_SECONDS = float(os.getenv("ACCOUNT_POLL_SECONDS", "15"))
+    # Límite de peticiones por minuto de la API de trading de Alpaca
+    ALPACA_RATE_LIMIT = int(os.getenv("ALPACA_RATE_LIMIT", "200"))
+    # Conexiones del cliente de Alpaca compartido por todas las sesiones
+    ALPACA_POOL_SIZE = int(os.getenv("ALPACA_POOL_SIZE", "20"))
+    # Segundos sin actividad tras los que se vacían las cachés de una sesión
+    SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+    # Instrumentación de rendimiento activa desde el arranque (se puede cambiar en "Rendimiento")
+    PERF_TRACING = os.getenv("PERF_TRACING", "0") == "1"
 
 # Configuración actual
 current_config = Config()
\ No newline at end of file
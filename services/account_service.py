@@ -0,0 +1,164 @@
+import os
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+EQUITY_DTYPE = np.dtype([("t", "i8"), ("equity", "f8"), ("cash", "f8"), ("buying_power", "f8")])
+DEFAULT_HISTORY_PATH = os.path.join("cache", "equity_history.bin")
+# Campos de una posición que se comparan para detectar cambios
+POSITION_FIELDS = ("qty", "avg_entry_price", "market_value", "unrealized_pl", "current_price")
+ORDER_FIELDS = ("status", "filled_qty", "filled_avg_price")
+
+
+def _diff(previous, current, fields):
+    """Compara dos diccionarios {id: registro} y devuelve altas, bajas y cambios."""
+    added = [key for key in current if key not in previous]
+    removed = [key for key in previous if key not in current]
+    changed = [
+        key for key in current
+        if key in previous and any(current[key].get(f) != previous[key].get(f) for f in fields)
+    ]
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+class AccountService:
+    """
+    Servicio de estado de la cuenta con sondeo en segundo plano.
+
+    Un hilo consulta cuenta, posiciones y órdenes cada `interval` segundos y
+    guarda la última instantánea con su timestamp, de modo que la interfaz
+    pinta desde memoria sin esperar a la API. También calcula qué posiciones
+    y órdenes han cambiado respecto a la instantánea anterior y añade cada
+    cambio de equity a un histórico binario compacto (append-only).
+
+    Otros servicios pueden engancharse al mismo hilo con subscribe() (p. ej. el
+    poll() del OrderManager), en lugar de sondear la API desde cada sesión.
+    """
+
+    def __init__(self, client=None, interval=None, history_path=DEFAULT_HISTORY_PATH):
+        if client is None:
+            from services.shared_resources import get_alpaca_client
+            client = get_alpaca_client()
+        self.client = client
+        self.interval = interval or Config.ACCOUNT_POLL_SECONDS
+        self.history_path = history_path
+        self.snapshot = None
+        self.diff = None
+        self.version = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """Ejecuta callback() en el hilo de sondeo tras cada instantánea."""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="account-service", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def refresh_now(self):
+        """Pide al hilo un sondeo inmediato (sin bloquear al llamador)."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.last_error = str(e)
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                try:
+                    callback()
+                except Exception as e:
+                    self.last_error = f"Error en {getattr(callback, '__qualname__', callback)}: {e}"
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def poll(self):
+        """Consulta la API una vez y actualiza la instantánea, el diff y el histórico."""
+        account = self.client.get_account()
+        positions = self.client.get_positions()
+        orders = self.client.get_orders()
+        for name, data in (("cuenta", account), ("posiciones", positions), ("órdenes", orders)):
+            if isinstance(data, dict) and "error" in data:
+                self.last_error = f"Error al obtener {name}: {data['error']}"
+                return None
+
+        snapshot = {
+            "timestamp": time.time(),
+            "account": account,
+            "positions": {p["symbol"]: p for p in positions},
+            "orders": {o["id"]: o for o in orders},
+        }
+        with self._lock:
+            previous = self.snapshot
+            self.diff = {
+                "positions": _diff(previous["positions"] if previous else {}, snapshot["positions"], POSITION_FIELDS),
+                "orders": _diff(previous["orders"] if previous else {}, snapshot["orders"], ORDER_FIELDS),
+            }
+            self.snapshot = snapshot
+            self.version += 1
+            self.last_error = None
+        self._append_equity(account, previous["account"] if previous else None)
+        return snapshot
+
+    def _append_equity(self, account, previous_account):
+        """Añade un registro al histórico solo si cambia el equity, el cash o el buying power."""
+        values = tuple(float(account.get(k) or "nan") for k in ("equity", "cash", "buying_power"))
+        if previous_account is not None:
+            previous = tuple(float(previous_account.get(k) or "nan") for k in ("equity", "cash", "buying_power"))
+            if previous == values:
+                return
+        os.makedirs(os.path.dirname(self.history_path) or ".", exist_ok=True)
+        record = np.array([(time.time_ns(), *values)], dtype=EQUITY_DTYPE)
+        with open(self.history_path, "ab") as f:
+            f.write(record.tobytes())
+
+    def get_snapshot(self):
+        """Última instantánea (o None si aún no hay ninguna) y su diff."""
+        with self._lock:
+            return self.snapshot, self.diff
+
+    def equity_history(self):
+        """Histórico de equity leído con memoria mapeada."""
+        if not os.path.exists(self.history_path) or os.path.getsize(self.history_path) < EQUITY_DTYPE.itemsize:
+            return pd.DataFrame(columns=["equity", "cash", "buying_power"])
+        count = os.path.getsize(self.history_path) // EQUITY_DTYPE.itemsize
+        data = np.memmap(self.history_path, dtype=EQUITY_DTYPE, mode="r", shape=(count,))
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(data["t"]), utc=True), name="timestamp")
+        return pd.DataFrame({k: np.asarray(data[k]) for k in ("equity", "cash", "buying_power")}, index=index)
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_account_service():
+    """Servicio único para todo el proceso; el hilo de sondeo arranca la primera vez."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = AccountService().start()
+        return _SERVICE
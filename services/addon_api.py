@@ -0,0 +1,247 @@
+"""
+API del host para addons.
+
+Cada addon declara en su config.json la versión de la API que usa y los datos
+que necesita:
+
+    {
+        "api_version": 1,
+        "requires": {
+            "datasets": true,
+            "bars": {"symbols": ["AAPL", "MSFT"], "timeframes": ["1Day"], "start": "2023-01-01"}
+        }
+    }
+
+El host entrega esos datos a través de un AddonContext como vistas NumPy de
+solo lectura. Las barras viven una sola vez por proceso en SharedBarStore: si
+varios addons piden el mismo símbolo y timeframe se descarga una vez y todos
+reciben los mismos arrays, sin copias.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+HOST_API_VERSION = 1
+SUPPORTED_API_VERSIONS = {1}
+DEFAULT_BARS_MAX_AGE = 60.0
+# Máximo de (símbolo, timeframe, inicio) en memoria; se expulsa la menos usada
+DEFAULT_BARS_MAX_ENTRIES = 64
+
+
+class AddonCapabilityError(Exception):
+    """El addon pide datos que no declaró en su manifiesto."""
+
+
+def get_manifest(config):
+    """
+    Normaliza la sección de capacidades de un config.json.
+
+    Los addons sin "api_version" son anteriores a la API: no reciben datos del host.
+    """
+    requires = config.get("requires") or {}
+    bars = requires.get("bars") or {}
+    return {
+        "api_version": config.get("api_version"),
+        "datasets": bool(requires.get("datasets", False)),
+        "symbols": [s.upper() for s in bars.get("symbols", [])],
+        "timeframes": list(bars.get("timeframes", ["1Day"] if bars.get("symbols") else [])),
+        "start": bars.get("start"),
+    }
+
+
+def validate_manifest(config):
+    """Devuelve una lista de errores del manifiesto (vacía si es compatible con este host)."""
+    manifest = get_manifest(config)
+    errors = []
+    version = manifest["api_version"]
+    if version is not None and version not in SUPPORTED_API_VERSIONS:
+        errors.append(f"api_version {version} no soportada (el host implementa {sorted(SUPPORTED_API_VERSIONS)})")
+    if manifest["symbols"] and version is None:
+        errors.append("El addon declara barras pero no api_version")
+    from services.indicators import TIMEFRAME_RULES
+    for timeframe in manifest["timeframes"]:
+        if timeframe not in TIMEFRAME_RULES:
+            errors.append(f"Timeframe no soportado: {timeframe}")
+    return errors
+
+
+def _readonly(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class SharedBarStore:
+    """
+    Barras compartidas por todos los addons del proceso.
+
+    Cada (símbolo, timeframe, inicio) se guarda como diccionario de arrays de
+    solo lectura ("timestamp" en ns UTC más las columnas OHLCV). Las peticiones
+    concurrentes de la misma clave esperan a una única descarga (single-flight);
+    las entradas se refrescan a través de MarketDataCache pasado max_age. Como
+    mucho se guardan max_entries claves (LRU) y las caducadas se descartan al
+    añadir otras nuevas.
+    """
+
+    def __init__(self, cache=None, max_age=DEFAULT_BARS_MAX_AGE, max_entries=DEFAULT_BARS_MAX_ENTRIES):
+        self._cache = cache
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.hits = 0
+        self.evictions = 0
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from services.shared_resources import get_market_data_cache
+            self._cache = get_market_data_cache()
+        return self._cache
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _fresh(self, key):
+        """Arrays de la clave si no han caducado (y la marca como usada); None si no."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry["fetched_at"] >= self.max_age:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["arrays"]
+
+    def _put(self, key, arrays):
+        with self._lock:
+            now = time.monotonic()
+            self._entries[key] = {"arrays": arrays, "fetched_at": now}
+            self._entries.move_to_end(key)
+            self.fetches += 1
+            for old_key in [k for k, e in self._entries.items() if now - e["fetched_at"] >= self.max_age]:
+                self._drop(old_key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        # Los arrays ya entregados siguen siendo válidos: solo se suelta la referencia del almacén
+        del self._entries[key]
+        lock = self._key_locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._key_locks[key]
+        self.evictions += 1
+
+    def get(self, symbol, timeframe="1Day", start=None):
+        key = (symbol, timeframe, start)
+        arrays = self._fresh(key)
+        if arrays is not None:
+            return arrays
+        with self._key_lock(key):
+            # Otro hilo pudo completar la descarga mientras esperábamos
+            arrays = self._fresh(key)
+            if arrays is not None:
+                return arrays
+            frame = self.cache.get_bars(symbol, timeframe, start=start)
+            arrays = {"timestamp": _readonly(frame.index.as_unit("ns").asi8)}
+            arrays.update({name: _readonly(frame[name].to_numpy()) for name in frame.columns})
+            self._put(key, arrays)
+            return arrays
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "fetches": self.fetches, "hits": self.hits,
+                    "evictions": self.evictions}
+
+
+_BAR_STORE = None
+_BAR_STORE_LOCK = threading.Lock()
+
+
+def get_shared_bar_store():
+    """Almacén de barras compartido por todo el proceso."""
+    global _BAR_STORE
+    with _BAR_STORE_LOCK:
+        if _BAR_STORE is None:
+            _BAR_STORE = SharedBarStore()
+        return _BAR_STORE
+
+
+class AddonContext:
+    """
+    Lo que el host expone a un addon: se pasa a ui.render(ctx) si render acepta un argumento.
+
+    Todo lo que devuelve son vistas de solo lectura sobre datos compartidos;
+    un addon que necesite modificarlos debe copiarlos antes (array.copy()).
+    """
+
+    def __init__(self, folder, config, bar_store=None, addons_dir="addons"):
+        self.folder = folder
+        self.config = config
+        self.addons_dir = addons_dir
+        self.manifest = get_manifest(config)
+        self.api_version = HOST_API_VERSION
+        self._bar_store = bar_store
+
+    @property
+    def symbols(self):
+        return list(self.manifest["symbols"])
+
+    @property
+    def timeframes(self):
+        return list(self.manifest["timeframes"])
+
+    def bars(self, symbol, timeframe=None):
+        """
+        Barras de un símbolo declarado como {columna: array de solo lectura}.
+
+        Raises:
+            AddonCapabilityError: Si el símbolo o el timeframe no están en el manifiesto.
+        """
+        timeframe = timeframe or (self.manifest["timeframes"] or ["1Day"])[0]
+        if symbol.upper() not in self.manifest["symbols"] or timeframe not in self.manifest["timeframes"]:
+            raise AddonCapabilityError(f"El addon '{self.folder}' no declara barras de {symbol} {timeframe}")
+        store = self._bar_store or get_shared_bar_store()
+        return store.get(symbol.upper(), timeframe, self.manifest["start"])
+
+    def dataset(self, name=None, columns=None):
+        """
+        Columnas de un dataset de la sesión como arrays de solo lectura (sin copia para columnas numéricas).
+
+        Raises:
+            AddonCapabilityError: Si el addon no declara "datasets".
+        """
+        if not self.manifest["datasets"]:
+            raise AddonCapabilityError(f"El addon '{self.folder}' no declara acceso a datasets")
+        import numpy as np
+        from services.dataset_store import get_dataset
+        frame = get_dataset(name)
+        if frame is None:
+            return None
+        return {column: _readonly(np.asarray(frame[column].to_numpy())) for column in (columns or frame.columns)}
+
+    def list_datasets(self):
+        if not self.manifest["datasets"]:
+            raise AddonCapabilityError(f"El addon '{self.folder}' no declara acceso a datasets")
+        from services.dataset_store import list_datasets
+        return list_datasets()
+
+    def run(self, func_name, *args, **kwargs):
+        """
+        Ejecuta una función de src/<folder>.py según "execution" de config.json.
+
+        Con "execution": "process" corre en el pool de procesos compartido de los
+        addons, con el "timeout" del manifiesto (ver services.addon_executor).
+
+        Raises:
+            AddonTimeoutError: Si la llamada en proceso supera el timeout.
+        """
+        from services.addon_executor import run_addon_function
+        return run_addon_function(self.folder, func_name, *args, addons_dir=self.addons_dir,
+                                  config=self.config, **kwargs)
+
+
+def get_addon_context(folder, config):
+    return AddonContext(folder, config)
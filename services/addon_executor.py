@@ -0,0 +1,244 @@
+import os
+import threading
+import concurrent.futures
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    import resource  # Solo disponible en sistemas Unix
+except ImportError:
+    resource = None
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MEMORY_LIMIT_MB = 2048
+# Arrays a partir de este tamaño se devuelven por memoria compartida en lugar de pickle
+SHM_MIN_BYTES = 1024 * 1024
+
+_SHM_MARKER = "__addon_shm__"
+
+
+class AddonTimeoutError(TimeoutError):
+    """La función del addon superó su tiempo máximo y su proceso fue terminado."""
+
+
+def _init_worker(memory_limit_mb):
+    """Inicializa un proceso del pool limitando su memoria virtual."""
+    if resource is not None and memory_limit_mb:
+        limit = int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _export(value):
+    """Convierte los arrays grandes del resultado en descriptores de memoria compartida."""
+    if isinstance(value, np.ndarray) and value.nbytes >= SHM_MIN_BYTES and value.dtype != object:
+        shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)[...] = value
+        # El proceso principal libera el segmento (unlink en _import/_release). No se
+        # llama a resource_tracker.unregister: el tracker es el del proceso principal
+        # (ver backtesting._open_segment) y, si el worker muere antes, lo limpia él
+        descriptor = (_SHM_MARKER, shm.name, value.shape, value.dtype.str)
+        shm.close()
+        return descriptor
+    if isinstance(value, dict):
+        return {k: _export(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_export(v) for v in value)
+    return value
+
+
+def _import(value):
+    """Reconstruye los arrays recibidos por memoria compartida y libera los segmentos."""
+    if isinstance(value, tuple) and len(value) == 4 and value[0] == _SHM_MARKER:
+        _, name, shape, dtype = value
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+    if isinstance(value, dict):
+        return {k: _import(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_import(v) for v in value)
+    return value
+
+
+def _release(value):
+    """Libera los segmentos de memoria compartida de un resultado que no se va a importar."""
+    if isinstance(value, tuple) and len(value) == 4 and value[0] == _SHM_MARKER:
+        try:
+            shm = shared_memory.SharedMemory(name=value[1])
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
+    elif isinstance(value, dict):
+        for v in value.values():
+            _release(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _release(v)
+
+
+def _release_future(future):
+    if not future.cancelled() and future.exception() is None:
+        _release(future.result())
+
+
+def _call_addon_function(addons_dir, folder, func_name, args, kwargs):
+    """Se ejecuta en el proceso del pool: importa el addon (una vez por proceso) y llama a la función."""
+    from services.addon_loader import load_addon_source
+    module = load_addon_source(folder, addons_dir)
+    func = getattr(module, func_name)
+    return _export(func(*args, **kwargs))
+
+
+class AddonExecutor:
+    """
+    Ejecuta funciones de cálculo de addons en un único pool de procesos acotado.
+
+    Cada llamada tiene un timeout; si se supera, se terminan los procesos del
+    pool y se sustituye por uno nuevo (solo si nadie lo ha sustituido ya). Las
+    llamadas de otros addons que estaban en ese pool no fallan: detectan que su
+    pool fue terminado por un timeout ajeno y se reenvían una vez al nuevo. Los
+    procesos tienen un límite de memoria (RLIMIT_AS) y los arrays grandes del
+    resultado vuelven por memoria compartida.
+    """
+
+    def __init__(self, max_workers=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, addons_dir="addons"):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.memory_limit_mb = memory_limit_mb
+        self.addons_dir = addons_dir
+        self._pool = None
+        self._killed = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_mb,)
+                )
+            return self._pool
+
+    def _kill_pool(self, pool):
+        """Termina el pool que se atascó (si otra llamada ya lo reemplazó, el nuevo no se toca)."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+            self._killed.add(pool)
+        # ProcessPoolExecutor no permite cancelar una tarea en curso: se terminan sus procesos
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, addons_dir, folder, func_name, args, kwargs):
+        pool = self._get_pool()
+        return pool, pool.submit(_call_addon_function, addons_dir or self.addons_dir, folder, func_name, args, kwargs)
+
+    def _result(self, pool, future, timeout, folder, func_name):
+        """
+        Espera el resultado (sin importar).
+
+        Returns:
+            tuple: (resultado, False) o (None, True) si el pool lo terminó el timeout de otra llamada.
+        """
+        try:
+            return future.result(timeout=timeout), False
+        except concurrent.futures.TimeoutError:
+            self._kill_pool(pool)
+            raise AddonTimeoutError(f"El addon '{folder}' superó el tiempo máximo de {timeout}s en '{func_name}'.")
+        except BrokenProcessPool:
+            with self._lock:
+                killed = pool in self._killed
+            if not killed:
+                raise
+            return None, True
+
+    def submit(self, folder, func_name, *args, addons_dir=None, **kwargs):
+        """Envía la llamada al pool y devuelve el Future (el resultado aún sin importar)."""
+        return self._submit(addons_dir, folder, func_name, args, kwargs)[1]
+
+    def run(self, folder, func_name, *args, timeout=DEFAULT_TIMEOUT, addons_dir=None, **kwargs):
+        """
+        Ejecuta <addons_dir>/<folder>/src/<folder>.py:<func_name>(*args, **kwargs) en el pool.
+
+        Raises:
+            AddonTimeoutError: Si la llamada supera el timeout.
+        """
+        for attempt in range(2):
+            pool, future = self._submit(addons_dir, folder, func_name, args, kwargs)
+            result, retry = self._result(pool, future, timeout, folder, func_name)
+            if not retry:
+                return _import(result)
+        raise BrokenProcessPool(f"El pool se terminó dos veces durante '{func_name}' de '{folder}'.")
+
+    def map(self, folder, func_name, args_list, timeout=DEFAULT_TIMEOUT, addons_dir=None):
+        """Ejecuta la misma función con varios argumentos en paralelo (p. ej. un backtest por parámetro)."""
+        submitted = [self._submit(addons_dir, folder, func_name, args, {}) for args in args_list]
+        results = []
+        try:
+            for args in args_list:
+                pool, future = submitted[len(results)]
+                raw, retry = self._result(pool, future, timeout, folder, func_name)
+                if retry:
+                    submitted[len(results)] = pool, future = self._submit(addons_dir, folder, func_name, args, {})
+                    raw, retry = self._result(pool, future, timeout, folder, func_name)
+                    if retry:
+                        raise BrokenProcessPool(f"El pool se terminó dos veces durante '{func_name}' de '{folder}'.")
+                results.append(_import(raw))
+            return results
+        finally:
+            # Si se sale antes de importarlo todo, los segmentos del resto se liberan
+            # ahora o, para las tareas aún en curso, en cuanto terminen
+            for _, future in submitted[len(results):]:
+                future.add_done_callback(_release_future)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_addon_executor():
+    """Pool de procesos único para todo el proceso de Streamlit."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = AddonExecutor()
+        return _EXECUTOR
+
+
+def run_addon_function(folder, func_name, *args, addons_dir="addons", config=None, **kwargs):
+    """
+    Ejecuta una función de cálculo de un addon según su modo de ejecución.
+
+    Los addons la usan a través de AddonContext.run(). En config.json:
+        "execution": "process"   -> en el pool de procesos (por defecto "inline")
+        "timeout": 120           -> segundos por llamada
+
+    Args:
+        config (dict): config.json del addon; si no se indica se busca con scan_addons.
+    """
+    if config is None:
+        from services.addons_manager import scan_addons
+        config = next((addon for addon in scan_addons(addons_dir) if addon["folder"] == folder), {})
+
+    if config.get("execution", "inline") == "process":
+        return get_addon_executor().run(folder, func_name, *args, timeout=config.get("timeout", DEFAULT_TIMEOUT),
+                                        addons_dir=addons_dir, **kwargs)
+
+    from services.addon_loader import load_addon_source
+    module = load_addon_source(folder, addons_dir)
+    return getattr(module, func_name)(*args, **kwargs)
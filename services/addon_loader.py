@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import threading
+import inspect
+import importlib.util
+
+from services.addons_manager import scan_addons
+
+# Caché de módulos de addons: {ruta del fichero: {"module", "mtime"}}
+_MODULE_CACHE = {}
+_MODULE_LOCK = threading.RLock()
+
+# Tiempos por addon: {folder: {"import_ms", "imports", "render_ms", "renders"}}; los reruns
+# de varias sesiones lo actualizan a la vez, así que todo acceso pasa por _STATS_LOCK
+ADDON_STATS = {}
+_STATS_LOCK = threading.Lock()
+
+
+def _record_stat(folder, kind, elapsed_ms):
+    """Registra una importación ("import") o un renderizado ("render") de un addon."""
+    with _STATS_LOCK:
+        stats = ADDON_STATS.setdefault(folder, {"import_ms": None, "imports": 0, "render_ms": None, "renders": 0})
+        stats[f"{kind}_ms"] = elapsed_ms
+        stats[f"{kind}s"] += 1
+
+
+def resolve_addon_folder(module_name, addons_dir="addons"):
+    """
+    Devuelve la carpeta de un addon a partir de su carpeta o de su nombre visible.
+
+    La barra lateral guarda en st.session_state.module el "name" del config.json,
+    que no tiene por qué coincidir con la carpeta.
+    """
+    if os.path.isdir(os.path.join(addons_dir, module_name)):
+        return module_name
+    for addon in scan_addons(addons_dir):
+        if addon.get("name") == module_name:
+            return addon["folder"]
+    return module_name
+
+
+def load_addon_file(folder, relative_path, module_name, addons_dir="addons"):
+    """
+    Importa un fichero de un addon bajo demanda y lo mantiene en caché.
+
+    El módulo solo se vuelve a ejecutar si cambia el mtime del fichero (recarga en
+    caliente). Cada importación real queda registrada en ADDON_STATS.
+
+    Raises:
+        ModuleNotFoundError: Si el fichero no existe.
+    """
+    path = os.path.join(addons_dir, folder, relative_path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        raise ModuleNotFoundError(f"No existe {path}", name=module_name)
+
+    with _MODULE_LOCK:
+        cached = _MODULE_CACHE.get(path)
+        if cached is not None and cached["mtime"] == mtime:
+            return cached["module"]
+
+        start = time.perf_counter()
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        _record_stat(folder, "import", 1000 * (time.perf_counter() - start))
+        _MODULE_CACHE[path] = {"module": module, "mtime": mtime}
+        return module
+
+
+def load_addon_ui(folder, addons_dir="addons"):
+    """Importa (o reutiliza) el módulo ui/ui.py de un addon."""
+    return load_addon_file(folder, os.path.join("ui", "ui.py"), f"addons.{folder}.ui.ui", addons_dir)
+
+
+def load_addon_source(folder, addons_dir="addons"):
+    """Importa (o reutiliza) el módulo principal src/<folder>.py de un addon."""
+    return load_addon_file(folder, os.path.join("src", f"{folder}.py"), folder, addons_dir)
+
+
+def render_addon(folder, ui_module, config=None):
+    """
+    Ejecuta ui_module.render() registrando su tiempo de renderizado.
+
+    Si render acepta un argumento recibe un AddonContext (ver services.addon_api)
+    construido con el manifiesto de config.json; los addons antiguos siguen
+    llamándose sin argumentos.
+    """
+    start = time.perf_counter()
+    try:
+        if inspect.signature(ui_module.render).parameters:
+            from services.addon_api import get_addon_context
+            return ui_module.render(get_addon_context(folder, config or {}))
+        return ui_module.render()
+    finally:
+        _record_stat(folder, "render", 1000 * (time.perf_counter() - start))
+
+
+def unload_addon(folder, addons_dir="addons"):
+    """Descarta de la caché los módulos de un addon (p. ej. al desinstalarlo)."""
+    prefix = os.path.join(addons_dir, folder) + os.sep
+    with _MODULE_LOCK:
+        for path in [p for p in _MODULE_CACHE if p.startswith(prefix)]:
+            del _MODULE_CACHE[path]
+    with _STATS_LOCK:
+        ADDON_STATS.pop(folder, None)
+
+
+def get_addon_stats(folder):
+    """Copia de los tiempos de un addon (vacía si aún no se ha cargado)."""
+    with _STATS_LOCK:
+        return dict(ADDON_STATS.get(folder, {}))
@@ -1,13 +1,22 @@
 import os
 import json
-import importlib.util
+import time
+import threading
 import streamlit as st  # Si necesitas usar st.warning; alternativamente, puedes manejar otro sistema de log
-import shutil
-import zipfile
-import io
+import re
+
+from services.profiler import timed
+from services.addon_api import HOST_API_VERSION
 
 REGISTERED_ADDONS = {}
 
+# Índice de addons en memoria por carpeta: {addons_dir: {...}}. Se valida con el
+# mtime de la carpeta en cada llamada y con el de cada config.json como mucho cada
+# ADDON_INDEX_REVALIDATE_SECONDS; las operaciones que modifican addons lo invalidan.
+_ADDON_INDEX = {}
+_ADDON_INDEX_LOCK = threading.Lock()
+ADDON_INDEX_REVALIDATE_SECONDS = 5.0
+
 def create_addon(addon_id, name, description, version="1.0.0", author="Tu Nombre"):
     """
     Crea la estructura básica de un nuevo addon.
@@ -18,7 +27,7 @@ def create_addon(addon_id, name, description, version="1.0.0", author="Tu Nombre
             src/
                 addon_id.py
             ui/
-                addon_id.html
+                ui.py
             config.json
 
     Parámetros:
@@ -36,7 +45,7 @@ def create_addon(addon_id, name, description, version="1.0.0", author="Tu Nombre
     os.makedirs(src_dir, exist_ok=True)
     os.makedirs(ui_dir, exist_ok=True)
 
-    # Crear el archivo Python en src: addon_id.py
+    # Crear el archivo Python en src: addon_id.py (lógica del addon, sin Streamlit)
     py_file_path = os.path.join(src_dir, f"{addon_id}.py")
     if not os.path.exists(py_file_path):
         py_content = f'''"""
@@ -45,79 +54,57 @@ Descripción: {description}
 Versión: {version}
 Autor: {author}
 """
-from addon_system import AddonRegistry, custom_render_template
-from flask import redirect, url_for, flash, request
 
-def {addon_id}_view():
-    """
-    Función principal del addon {name}.
-    """
-    # Aquí implementa la lógica del addon.
-    return custom_render_template(
-        '{addon_id}',
-        '{addon_id}.html'
-    )
-
-def register_addon():
-    """Registra este addon en el sistema"""
-    AddonRegistry.register('{addon_id}', {{
-        'name': '{name}',
-        'description': '{description}',
-        'route': '/{addon_id}',  # Puedes ajustar la ruta pública si lo deseas
-        'view_func': {addon_id}_view,
-        'template': '{addon_id}.html',
-        'icon': 'chart-bar',  # Cambia el icono según tus preferencias
-        'active': True,
-        'version': '{version}',
-        'author': '{author}'
-    }})
-
-if __name__ != '__main__':
-    register_addon()
+
+def last_close(bars):
+    """Ejemplo de lógica del addon: último cierre a partir de las barras que entrega el host."""
+    close = bars["close"]
+    return float(close[-1]) if len(close) else None
 '''
         with open(py_file_path, "w", encoding="utf-8") as f:
             f.write(py_content)
 
-    # Crear la plantilla HTML en ui: addon_id.html
-    html_file_path = os.path.join(ui_dir, f"{addon_id}.html")
-    if not os.path.exists(html_file_path):
-        html_content = f'''{{% extends 'base.html' %}}
-
-{{% block title %}}{name} - DashBotTrade{{% endblock %}}
-
-{{% block header %}}{name}{{% endblock %}}
-
-{{% block content %}}
-<div class="row">
-    <div class="col-md-12 mb-4">
-        <div class="card shadow">
-            <div class="card-header py-3">
-                <h6 class="m-0 font-weight-bold text-primary">{name}</h6>
-            </div>
-            <div class="card-body">
-                <p>{description}</p>
-                <!-- Agrega aquí el contenido personalizado de tu addon -->
-            </div>
-        </div>
-    </div>
-</div>
-{{% endblock %}}
+    # Crear la interfaz en ui/ui.py: render(ctx) recibe el AddonContext del host
+    ui_file_path = os.path.join(ui_dir, "ui.py")
+    if not os.path.exists(ui_file_path):
+        ui_content = f'''import streamlit as st
+
+
+def render(ctx):
+    """
+    Interfaz del addon {name}.
+
+    ctx.bars(símbolo) devuelve arrays de solo lectura compartidos con el resto
+    de addons; solo se pueden pedir los símbolos declarados en config.json.
+    """
+    st.header({name!r})
+    st.write({description!r})
+    for symbol in ctx.symbols:
+        bars = ctx.bars(symbol)
+        if len(bars["close"]):
+            st.metric(symbol, f"{{bars['close'][-1]:.2f}}")
 '''
-        with open(html_file_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
+        with open(ui_file_path, "w", encoding="utf-8") as f:
+            f.write(ui_content)
 
-    # Crear un archivo de configuración (config.json) con los metadatos del addon
+    # Crear un archivo de configuración (config.json) con los metadatos y el manifiesto del addon
     config_path = os.path.join(base_dir, "config.json")
     config_data = {
         "name": name,
         "active": True,
         "version": version,
         "description": description,
-        "author": author
+        "author": author,
+        "api_version": HOST_API_VERSION,
+        "requires": {
+            "datasets": False,
+            "bars": {"symbols": ["AAPL"], "timeframes": ["1Day"], "start": None}
+        }
     }
     with open(config_path, "w", encoding="utf-8") as f:
         json.dump(config_data, f, indent=4)
 
+    invalidate_addon_index("addons")
     return f"Addon '{name}' creado en: {base_dir}"
 
 def register_new_addon(addon_id, name, description, route, view_func, template, icon="chart-bar", version="1.0.0", author="Desconocido", active=True):
@@ -144,9 +131,9 @@ def get_all_addons():
     """
     return REGISTERED_ADDONS
 
-def load_addons_from_directory(addons_dir="addons"):
+def load_addons_from_directory(addons_dir="addons", eager=False):
     """
-    Escanea todos los addons en la carpeta 'addons' y ejecuta su archivo .py principal.
+    Escanea todos los addons en la carpeta 'addons' y localiza su archivo .py principal.
     Espera que cada addon tenga la siguiente estructura:
 
     addons/
@@ -156,45 +143,119 @@ def load_addons_from_directory(addons_dir="addons"):
             ui/
                 (opcional: archivos estáticos o recursos)
             config.json
+
+    Por defecto no ejecuta nada: los módulos se importan la primera vez que se
+    usan (ver services.addon_loader). Con eager=True se importan todos ahora.
+
+    Returns:
+        list: Carpetas de los addons con archivo principal.
     """
     if not os.path.exists(addons_dir):
         print(f"[INFO] No existe la carpeta '{addons_dir}'.")
-        return
+        return []
+
+    from services.addon_loader import load_addon_source
 
+    found = []
     for folder in os.listdir(addons_dir):
         addon_path = os.path.join(addons_dir, folder)
         src_path = os.path.join(addon_path, "src", f"{folder}.py")
         if os.path.isfile(src_path):
+            found.append(folder)
+            if not eager:
+                continue
             try:
-                spec = importlib.util.spec_from_file_location(folder, src_path)
-                addon_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(addon_module)
+                load_addon_source(folder, addons_dir)
                 print(f"[OK] Addon cargado: {folder}")
             except Exception as e:
                 print(f"[ERROR] Falló la carga del addon '{folder}': {e}")
+    return found
+
+def invalidate_addon_index(addons_dir=None):
+    """
+    Invalida el índice de addons en memoria.
 
+    Args:
+        addons_dir (str): Carpeta a invalidar; si es None se invalidan todas.
+    """
+    with _ADDON_INDEX_LOCK:
+        if addons_dir is None:
+            _ADDON_INDEX.clear()
+        else:
+            _ADDON_INDEX.pop(os.path.abspath(addons_dir), None)
+
+def _default_addon_config(folder):
+    return {"name": folder, "active": True, "version": "1.0.0", "description": "Sin descripción"}
+
+def _read_addon_config(config_path, folder):
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            return _default_addon_config(folder)
+    return _default_addon_config(folder)
+
+def _rebuild_addon_index(addons_dir, previous):
+    """Recorre la carpeta de addons releyendo solo los config.json cuyo mtime ha cambiado."""
+    old_entries = previous["entries"] if previous else {}
+    entries = {}
+    with os.scandir(addons_dir) as it:
+        for dir_entry in sorted(it, key=lambda e: e.name):
+            # Las carpetas ocultas (.old-*, .git, ...) no son addons
+            if not dir_entry.is_dir() or dir_entry.name.startswith("."):
+                continue
+            folder = dir_entry.name
+            config_path = os.path.join(addons_dir, folder, "config.json")
+            try:
+                config_mtime = os.stat(config_path).st_mtime_ns
+            except OSError:
+                config_mtime = None
+            cached = old_entries.get(folder)
+            if cached is not None and cached["mtime"] == config_mtime:
+                entries[folder] = cached
+                continue
+            config_data = _read_addon_config(config_path, folder)
+            config_data["folder"] = folder
+            entries[folder] = {"mtime": config_mtime, "config": config_data}
+    return entries
+
+@timed("scan_addons")
 def scan_addons(addons_dir="addons"):
-    temp_list = []
-    if os.path.exists(addons_dir):
-        for folder in os.listdir(addons_dir):
-            addon_path = os.path.join(addons_dir, folder)
-            if os.path.isdir(addon_path):
-                config_path = os.path.join(addons_dir, folder, "config.json")
-                if os.path.exists(config_path):
-                    try:
-                        with open(config_path, "r", encoding="utf-8") as f:
-                            config_data = json.load(f)
-                    except Exception as e:
-                        config_data = {"name": folder, "active": True, "version": "1.0.0", "description": "Sin descripción"}
-                else:
-                    config_data = {"name": folder, "active": True, "version": "1.0.0", "description": "Sin descripción"}
-                config_data["folder"] = folder
-                temp_list.append(config_data)
-    else:
+    """
+    Devuelve la lista de addons (config.json de cada carpeta más la clave "folder").
+
+    El resultado sale de un índice en memoria; solo se vuelve a recorrer el disco
+    si cambia la carpeta de addons, si el índice fue invalidado o si han pasado
+    ADDON_INDEX_REVALIDATE_SECONDS desde la última validación.
+    """
+    try:
+        dir_mtime = os.stat(addons_dir).st_mtime_ns
+    except OSError:
         st.warning("No existe la carpeta de addons.")
-    return temp_list
+        return []
+
+    key = os.path.abspath(addons_dir)
+    now = time.monotonic()
+    with _ADDON_INDEX_LOCK:
+        index = _ADDON_INDEX.get(key)
+        fresh = (
+            index is not None
+            and index["dir_mtime"] == dir_mtime
+            and now - index["checked_at"] < ADDON_INDEX_REVALIDATE_SECONDS
+        )
+        if not fresh:
+            index = {
+                "dir_mtime": dir_mtime,
+                "checked_at": now,
+                "entries": _rebuild_addon_index(addons_dir, index)
+            }
+            _ADDON_INDEX[key] = index
+        # Se devuelven copias: los llamadores (p. ej. toggle_addons) modifican los diccionarios
+        return [dict(entry["config"]) for entry in index["entries"].values()]
 
 def refresh_addons(addons_dir="addons"):
+    invalidate_addon_index(addons_dir)
     return scan_addons(addons_dir)
 
 def toggle_addons(addon_list, selected, addons_dir="addons"):
@@ -211,94 +272,177 @@ def toggle_addons(addon_list, selected, addons_dir="addons"):
     return refresh_addons(addons_dir)
 
 def uninstall_addons(addon_list, selected, addons_dir="addons"):
+    import shutil
     for addon in addon_list:
         if addon["folder"] in selected:
             try:
                 shutil.rmtree(os.path.join(addons_dir, addon["folder"]))
+                from services.addon_loader import unload_addon
+                unload_addon(addon["folder"], addons_dir)
                 st.success(f"{addon['name']} desinstalado.")
             except Exception as e:
                 st.error(f"Error al desinstalar {addon['name']}: {e}")
     
     return refresh_addons(addons_dir)
 
-def import_addon(uploaded_zip, temp_dir="temp"):
+# Límites de seguridad para la importación de addons
+MAX_ADDON_ENTRIES = 5000
+MAX_ADDON_UNCOMPRESSED_BYTES = 256 * 1024 * 1024
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+class AddonImportError(Exception):
+    """El zip del addon no es válido o supera los límites de importación."""
+
+def _find_zip_config(z):
+    """Localiza config.json en el directorio central del zip (el menos profundo) y devuelve su prefijo."""
+    candidates = [
+        info.filename for info in z.infolist()
+        if not info.is_dir() and info.filename.rsplit("/", 1)[-1] == "config.json"
+    ]
+    if not candidates:
+        raise AddonImportError("No se encontró el archivo config.json en el addon.")
+    config_name = min(candidates, key=lambda name: name.count("/"))
+    prefix = config_name[:-len("config.json")]
+    return config_name, prefix
+
+def _safe_member_path(filename, prefix):
+    """Devuelve la ruta relativa de un miembro dentro del addon o lanza error si escapa de él."""
+    relative = filename[len(prefix):]
+    normalized = os.path.normpath(relative)
+    if (
+        filename.startswith("/") or "\\" in filename or os.path.isabs(normalized)
+        or normalized == ".." or normalized.startswith(".." + os.sep) or ":" in normalized.split(os.sep)[0]
+    ):
+        raise AddonImportError(f"Ruta no permitida en el zip: {filename}")
+    return normalized
+
+def _extract_addon_members(z, prefix, staging_dir, max_bytes):
+    """Extrae en streaming los miembros bajo el prefijo, contando los bytes realmente escritos."""
+    written = 0
+    for info in z.infolist():
+        if not info.filename.startswith(prefix) or info.filename == prefix:
+            continue
+        # Los enlaces simbólicos (bits de modo Unix) no se extraen
+        if (info.external_attr >> 16) & 0o170000 == 0o120000:
+            raise AddonImportError(f"Enlace simbólico no permitido en el zip: {info.filename}")
+        target = os.path.join(staging_dir, _safe_member_path(info.filename, prefix))
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with z.open(info) as src, open(target, "wb") as dst:
+            while True:
+                chunk = src.read(_COPY_BUFFER_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise AddonImportError("El addon supera el tamaño máximo descomprimido permitido.")
+                dst.write(chunk)
+    return written
+
+def _swap_addon_dir(staging_dir, destination, backup_dir):
+    """
+    Sustituye la carpeta del addon por la preparada usando renombrados (sin copias).
+
+    La copia anterior se aparta a backup_dir (fuera de la carpeta de addons, en el
+    mismo disco) para que scan_addons nunca la liste como un addon más.
+    """
+    import shutil
+    backup = None
+    if os.path.exists(destination):
+        backup = os.path.join(backup_dir, f".old-{os.path.basename(destination)}-{os.getpid()}-{threading.get_ident()}")
+        os.rename(destination, backup)
+    try:
+        os.rename(staging_dir, destination)
+    except Exception:
+        if backup is not None:
+            os.rename(backup, destination)
+        raise
+    if backup is not None:
+        shutil.rmtree(backup, ignore_errors=True)
+
+def import_addon(uploaded_zip, temp_dir="temp", addons_dir="addons",
+                 max_entries=MAX_ADDON_ENTRIES, max_bytes=MAX_ADDON_UNCOMPRESSED_BYTES):
     """
     Importa un addon a partir de un archivo zip subido.
-    1. Descomprime el zip en una carpeta temporal.
-    2. Busca y lee el config.json del addon.
-    3. Registra el addon usando los datos de configuración.
-    
+    1. Lee config.json directamente del zip, sin extraerlo.
+    2. Valida número de entradas, tamaño descomprimido y rutas (path traversal).
+    3. Extrae el addon en una carpeta de staging única dentro de temp_dir.
+    4. Sustituye la carpeta del addon con un renombrado.
+
     Args:
-        uploaded_zip: Archivo subido (Zip) desde st.file_uploader.
-        temp_dir (str): Carpeta temporal para extraer el addon.
-        
+        uploaded_zip: Archivo subido (Zip) desde st.file_uploader (o cualquier fichero binario con .name).
+        temp_dir (str): Carpeta donde se crean las carpetas de staging (mismo disco que addons_dir).
+        addons_dir (str): Carpeta de addons de destino.
+        max_entries (int): Número máximo de entradas del zip.
+        max_bytes (int): Tamaño máximo descomprimido en bytes.
+
     Returns:
         dict: Datos de configuración del addon o None si falla.
     """
-    # Crear carpeta temporal si no existe
+    # zipfile/shutil/tempfile solo se cargan al importar un addon, no en cada arranque
+    import shutil
+    import tempfile
+    import zipfile
+
     os.makedirs(temp_dir, exist_ok=True)
-    
+    staging_dir = None
     try:
-        # Leer el contenido del zip
-        with zipfile.ZipFile(io.BytesIO(uploaded_zip.read()), "r") as z:
-            # Extraer todo en la carpeta temporal
-            z.extractall(temp_dir)
-    except Exception as e:
-        st.error(f"Error al descomprimir el addon: {e}")
+        if hasattr(uploaded_zip, "seek"):
+            uploaded_zip.seek(0)
+        # ZipFile lee el directorio central del propio fichero, sin cargarlo entero en memoria
+        with zipfile.ZipFile(uploaded_zip, "r") as z:
+            infos = z.infolist()
+            if len(infos) > max_entries:
+                raise AddonImportError(f"El addon tiene demasiadas entradas ({len(infos)} > {max_entries}).")
+            if sum(info.file_size for info in infos) > max_bytes:
+                raise AddonImportError("El addon supera el tamaño máximo descomprimido permitido.")
+
+            config_name, prefix = _find_zip_config(z)
+            try:
+                config_data = json.loads(z.read(config_name).decode("utf-8"))
+            except Exception as e:
+                raise AddonImportError(f"Error al leer config.json: {e}")
+
+            # Usamos la clave "name" para determinar el nombre de la carpeta
+            addon_folder = config_data.get("name")
+            if not addon_folder:
+                addon_folder = os.path.splitext(os.path.basename(uploaded_zip.name))[0]
+            else:
+                addon_folder = addon_folder.replace(" ", "_").lower()
+            addon_folder = re.sub(r"[^\w\-]", "_", addon_folder)
+            if not addon_folder.strip("_"):
+                raise AddonImportError("El nombre del addon no es válido.")
+
+            staging_dir = tempfile.mkdtemp(prefix=f"{addon_folder}-", dir=temp_dir)
+            # mkdtemp crea la carpeta con 0700; tras el renombrado sería la carpeta del addon
+            os.chmod(staging_dir, 0o755)
+            _extract_addon_members(z, prefix, staging_dir, max_bytes)
+
+        os.makedirs(addons_dir, exist_ok=True)
+        _swap_addon_dir(staging_dir, os.path.join(addons_dir, addon_folder), temp_dir)
+        staging_dir = None
+    except AddonImportError as e:
+        st.error(str(e))
         return None
-
-    # Buscar el archivo config.json en la carpeta extraída
-    config_path = None
-    for root, dirs, files in os.walk(temp_dir):
-        if "config.json" in files:
-            config_path = os.path.join(root, "config.json")
-            break
-
-    if not config_path:
-        st.error("No se encontró el archivo config.json en el addon.")
+    except zipfile.BadZipFile as e:
+        st.error(f"Error al descomprimir el addon: {e}")
         return None
-
-    try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config_data = json.load(f)
     except Exception as e:
-        st.error(f"Error al leer config.json: {e}")
+        st.error(f"Error al importar el addon: {type(e).__name__}: {e}")
         return None
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
-    # Usamos la clave "name" para determinar el nombre de la carpeta
-    addon_folder = config_data.get("name")
-    if not addon_folder:
-        addon_folder = os.path.splitext(uploaded_zip.name)[0]
-    else:
-        addon_folder = addon_folder.replace(" ", "_").lower()
-
-    destination = os.path.join("addons", addon_folder)
-    source = os.path.join(temp_dir, addon_folder)
-
-    try:
-        # Si la carpeta extraída existe, muévela
-        if os.path.isdir(source):
-            if os.path.exists(destination):
-                shutil.rmtree(destination)
-            shutil.move(source, destination)
-        else:
-            # Si no existe, se asume que los archivos se extrajeron directamente en temp
-            # Creamos el destino y movemos todos los archivos desde temp al destino
-            os.makedirs(destination, exist_ok=True)
-            for item in os.listdir(temp_dir):
-                s = os.path.join(temp_dir, item)
-                d = os.path.join(destination, item)
-                shutil.move(s, d)
-    except Exception as e:
-        st.error(f"Error al mover el addon a la carpeta definitiva: {e}")
-        return None
+    from services.addon_loader import unload_addon
+    unload_addon(addon_folder, addons_dir)
 
     st.success(f"Addon '{config_data.get('name', '')}' importado correctamente.")
 
     # Trigger: actualizar la lista de addons luego de la importación
-    updated_addons = refresh_addons()
-    
-    # Opcional: podrías devolver ambos, config_data y updated_addons, o simplemente config_data.
+    refresh_addons(addons_dir)
     return config_data
 
 if __name__ == "__main__":
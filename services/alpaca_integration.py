@@ -1,40 +1,346 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from config import Config
+from services.profiler import timed
+
+# Timeout por defecto (conexión, lectura) en segundos
+DEFAULT_TIMEOUT = (3.05, 10)
+# Códigos HTTP que se reintentan (rate limit y errores transitorios del servidor)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Métodos que se pueden repetir sin efectos duplicados; el resto solo con client_order_id
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Máximo de barras por página que admite la API de datos
+MAX_PAGE_LIMIT = 10000
+
+# Columnas de una barra en la API -> (nombre de columna, dtype)
+BAR_FIELDS = {
+    "o": ("open", np.float64),
+    "h": ("high", np.float64),
+    "l": ("low", np.float64),
+    "c": ("close", np.float64),
+    "v": ("volume", np.int64),
+    "n": ("trade_count", np.int64),
+    "vw": ("vwap", np.float64),
+}
+
+
+class RateLimiter:
+    """Token bucket compartido por todos los hilos que envían peticiones."""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1, int(rate_per_minute // 10))
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible. Devuelve los segundos de espera."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def bars_to_frame(bars):
+    """
+    Convierte una lista de barras de la API en un DataFrame columnar.
+
+    Las columnas se construyen directamente como arrays tipados (float64/int64)
+    con un índice datetime64[ns] en UTC, sin pasar por un DataFrame de diccionarios.
+    La resolución se fija en ns (pandas 3 infiere us o s de las cadenas) para que
+    los consumidores de .asi8 (caché, screener, addons) comparen en la misma unidad.
+    """
+    index = pd.DatetimeIndex(pd.to_datetime([bar["t"] for bar in bars], utc=True), name="timestamp").as_unit("ns")
+    columns = {}
+    for key, (name, dtype) in BAR_FIELDS.items():
+        if not bars or key in bars[0]:
+            fill = np.nan if dtype is np.float64 else 0
+            columns[name] = np.fromiter((bar.get(key, fill) for bar in bars), dtype=dtype, count=len(bars))
+    return pd.DataFrame(columns, index=index)
+
 
 class AlpacaIntegration:
-    def __init__(self):
+    def __init__(self, pool_size=10, timeout=DEFAULT_TIMEOUT, max_retries=3, backoff_factor=0.5, max_backoff=30.0,
+                 rate_per_minute=None):
         # Cargar las credenciales de Alpaca desde el objeto Config.
         self.api_key = Config.ALPACA_API_KEY
         self.api_secret = Config.ALPACA_API_SECRET
         self.base_url = Config.ALPACA_BASE_URL
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
 
-    def get_account(self):
-        """Ejemplo: Obtiene información de la cuenta."""
-        endpoint = f"{self.base_url}/v2/account"
-        headers = {
+        # Sesión con pool de conexiones: reutiliza TCP/TLS entre llamadas y
+        # las cabeceras de autenticación se construyen una sola vez.
+        self.session = requests.Session()
+        self.session.headers.update({
             "APCA-API-KEY-ID": self.api_key,
             "APCA-API-SECRET-KEY": self.api_secret
-        }
-        response = requests.get(endpoint, headers=headers)
-        if response.status_code == 200:
-            return response.json()
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Si el servidor responde 429, todas las peticiones en curso esperan
+        # hasta este instante antes de volver a llamar a la API.
+        self._cooldown_until = 0.0
+        self._cooldown_lock = threading.Lock()
+
+        # Todas las peticiones del cliente (cuenta, órdenes, barras) comparten el
+        # límite del broker; la espera de cada hilo queda en last_rate_wait()
+        self.limiter = RateLimiter(rate_per_minute or Config.ALPACA_RATE_LIMIT)
+        self._local = threading.local()
+
+    def close(self):
+        """Cierra las conexiones abiertas del pool."""
+        self.session.close()
+
+    def _retry_delay(self, response, attempt):
+        """Calcula la espera antes de reintentar, respetando la cabecera Retry-After."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(delay, 0.0), self.max_backoff)
+                except (TypeError, ValueError):
+                    pass
+        # Backoff exponencial con jitter
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(delay + random.uniform(0, self.backoff_factor), self.max_backoff)
+
+    def _wait_cooldown(self):
+        with self._cooldown_lock:
+            remaining = self._cooldown_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def last_rate_wait(self):
+        """Segundos que la última petición de este hilo esperó en el rate limiter."""
+        return getattr(self._local, "rate_wait", 0.0)
+
+    def _set_cooldown(self, delay):
+        with self._cooldown_lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    def _request(self, method, path, params=None, json=None, timeout=None):
+        """
+        Ejecuta una petición contra la API reutilizando la sesión.
+
+        Reintenta errores de conexión, timeouts y respuestas 429/5xx con backoff,
+        pero solo en métodos idempotentes o cuando el cuerpo lleva client_order_id
+        (clave de idempotencia): un POST sin ella que expira pudo haber llegado
+        al broker y repetirlo duplicaría la orden.
+
+        Args:
+            timeout: Timeout de requests para cada intento (por defecto, self.timeout).
+
+        Returns:
+            dict: JSON de la respuesta o {"error": ...} si falla.
+        """
+        url = f"{self.base_url}{path}"
+        retryable = method.upper() in IDEMPOTENT_METHODS or bool((json or {}).get("client_order_id"))
+        max_retries = self.max_retries if retryable else 0
+        response = None
+        self._local.rate_wait = 0.0
+        for attempt in range(max_retries + 1):
+            self._local.rate_wait += self.limiter.acquire()
+            self._wait_cooldown()
+            try:
+                response = self.session.request(method, url, params=params, json=json, timeout=timeout or self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == max_retries:
+                    return {"error": str(e)}
+                time.sleep(self._retry_delay(None, attempt))
+                continue
+            if response.status_code in RETRY_STATUS and attempt < max_retries:
+                delay = self._retry_delay(response, attempt)
+                if response.status_code == 429:
+                    self._set_cooldown(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            break
+        if response.ok:
+            # DELETE y algunas acciones responden 204 sin cuerpo
+            return response.json() if response.content else {}
         else:
-            return {"error": response.text}
+            return {"error": response.text, "status": response.status_code}
 
-    def get_bars(self, symbol, timeframe="1Day", start=None, end=None):
-        """Ejemplo: Obtiene barras de precios para un símbolo dado."""
-        endpoint = f"{self.base_url}/v2/stocks/{symbol}/bars"
-        headers = {
-            "APCA-API-KEY-ID": self.api_key,
-            "APCA-API-SECRET-KEY": self.api_secret
-        }
+    @timed("alpaca.get_account")
+    def get_account(self):
+        """Ejemplo: Obtiene información de la cuenta."""
+        return self._request("GET", "/v2/account")
+
+    @timed("alpaca.get_assets")
+    def get_assets(self, status="active", asset_class="us_equity"):
+        """Obtiene el universo de activos (por defecto, acciones de EE. UU. activas)."""
+        return self._request("GET", "/v2/assets", params={"status": status, "asset_class": asset_class})
+
+    @timed("alpaca.get_activities")
+    def get_activities(self, activity_type="FILL", after=None, page_size=100, page_token=None):
+        """Obtiene una página de actividades de la cuenta (por defecto, ejecuciones), de la más reciente a la más antigua."""
+        params = {"page_size": page_size, "direction": "desc"}
+        if after:
+            params["after"] = after
+        if page_token:
+            params["page_token"] = page_token
+        return self._request("GET", f"/v2/account/activities/{activity_type}", params=params)
+
+    @timed("alpaca.get_positions")
+    def get_positions(self):
+        """Obtiene las posiciones abiertas de la cuenta."""
+        return self._request("GET", "/v2/positions")
+
+    @timed("alpaca.get_orders")
+    def get_orders(self, status="open", limit=500):
+        """Obtiene las órdenes de la cuenta (por defecto, las abiertas)."""
+        return self._request("GET", "/v2/orders", params={"status": status, "limit": limit})
+
+    @timed("alpaca.submit_order")
+    def submit_order(self, symbol, qty, side, type="market", time_in_force="day", limit_price=None,
+                     client_order_id=None):
+        """
+        Envía una orden.
+
+        Solo se reintenta con client_order_id: si el primer envío llegó al broker,
+        el reintento se rechaza por id duplicado en vez de crear una segunda orden.
+        Sin él, un fallo se devuelve tal cual.
+        """
+        payload = {"symbol": symbol, "qty": str(qty), "side": side, "type": type, "time_in_force": time_in_force}
+        if limit_price is not None:
+            payload["limit_price"] = str(limit_price)
+        if client_order_id:
+            payload["client_order_id"] = client_order_id
+        return self._request("POST", "/v2/orders", json=payload)
+
+    @timed("alpaca.get_order_by_client_id")
+    def get_order_by_client_id(self, client_order_id):
+        """Obtiene una orden por su client_order_id."""
+        return self._request("GET", "/v2/orders:by_client_order_id", params={"client_order_id": client_order_id})
+
+    @timed("alpaca.cancel_order")
+    def cancel_order(self, order_id):
+        """Cancela una orden abierta."""
+        return self._request("DELETE", f"/v2/orders/{order_id}")
+
+    @timed("alpaca.get_bars")
+    def get_bars(self, symbol, timeframe="1Day", start=None, end=None, limit=None, page_token=None, timeout=None):
+        """Ejemplo: Obtiene barras de precios para un símbolo dado (una página)."""
         params = {"timeframe": timeframe}
         if start:
             params["start"] = start
         if end:
             params["end"] = end
-        response = requests.get(endpoint, headers=headers, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": response.text}
+        if limit:
+            params["limit"] = limit
+        if page_token:
+            params["page_token"] = page_token
+        return self._request("GET", f"/v2/stocks/{symbol}/bars", params=params, timeout=timeout)
+
+    def iter_bars(self, symbol, timeframe="1Day", start=None, end=None, limit=MAX_PAGE_LIMIT):
+        """
+        Descarga barras siguiendo next_page_token y las devuelve por lotes.
+
+        Cada lote es un DataFrame columnar (ver bars_to_frame), de modo que un
+        histórico largo nunca se acumula en memoria como lista de diccionarios.
+
+        Raises:
+            RuntimeError: Si la API devuelve un error a mitad de la descarga.
+        """
+        page_token = None
+        while True:
+            data = self.get_bars(symbol, timeframe, start, end, limit=limit, page_token=page_token)
+            if "error" in data:
+                raise RuntimeError(f"Error al obtener barras de {symbol}: {data['error']}")
+            bars = data.get("bars") or []
+            if bars:
+                yield bars_to_frame(bars)
+            page_token = data.get("next_page_token")
+            if not page_token:
+                break
+
+    @timed("alpaca.get_bars_frame")
+    def get_bars_frame(self, symbol, timeframe="1Day", start=None, end=None):
+        """Descarga el rango completo de barras y lo devuelve como un único DataFrame."""
+        frames = list(self.iter_bars(symbol, timeframe, start, end))
+        if not frames:
+            return bars_to_frame([])
+        return pd.concat(frames)
+
+    def iter_bars_multi(self, symbols, timeframe="1Day", start=None, end=None, limit=MAX_PAGE_LIMIT):
+        """
+        Usa el endpoint multi-símbolo para cubrir varios símbolos en cada petición.
+
+        Yields:
+            dict: {símbolo: DataFrame} con las barras de cada página.
+        """
+        params = {"symbols": ",".join(symbols), "timeframe": timeframe, "limit": limit}
+        if start:
+            params["start"] = start
+        if end:
+            params["end"] = end
+        while True:
+            data = self._request("GET", "/v2/stocks/bars", params=params)
+            if "error" in data:
+                raise RuntimeError(f"Error al obtener barras: {data['error']}")
+            page = {symbol: bars_to_frame(bars) for symbol, bars in (data.get("bars") or {}).items() if bars}
+            if page:
+                yield page
+            page_token = data.get("next_page_token")
+            if not page_token:
+                break
+            params["page_token"] = page_token
+
+    async def get_bars_async(self, symbol, timeframe="1Day", start=None, end=None, timeout=None):
+        """Versión asyncio de get_bars; la petición se ejecuta en un hilo sobre el pool compartido."""
+        return await asyncio.to_thread(self.get_bars, symbol, timeframe, start, end, timeout=timeout)
+
+    async def get_bars_many_async(self, symbols, timeframe="1Day", start=None, end=None, max_concurrency=None, timeout=None):
+        """
+        Descarga barras de varios símbolos de forma concurrente.
+
+        Args:
+            symbols (list): Lista de símbolos.
+            max_concurrency (int): Máximo de peticiones simultáneas (por defecto, el tamaño del pool).
+            timeout (float): Timeout de requests (conexión y lectura) de cada petición, en segundos.
+                Se aplica dentro de la petición y no cancelando la espera: así el hilo
+                termina a la vez que libera el semáforo y el límite de concurrencia se cumple.
+
+        Returns:
+            dict: {símbolo: respuesta JSON o {"error": ...}}
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.pool_size)
+
+        async def fetch(symbol):
+            async with semaphore:
+                return await self.get_bars_async(symbol, timeframe, start, end, timeout=timeout)
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    @timed("alpaca.get_bars_many")
+    def get_bars_many(self, symbols, timeframe="1Day", start=None, end=None, max_concurrency=None, timeout=None):
+        """Envoltorio síncrono de get_bars_many_async para usar desde el script de Streamlit."""
+        return asyncio.run(self.get_bars_many_async(symbols, timeframe, start, end, max_concurrency, timeout))
@@ -0,0 +1,235 @@
+"""
+Backtesting vectorizado sobre barras OHLC.
+
+- backtest(): señales -> posiciones -> P&L con comisiones y slippage, todo en
+  operaciones de arrays. Las órdenes se ejecutan en la apertura de la barra
+  siguiente a la señal.
+- Con stop loss / take profit (dependientes del camino) se usa un bucle de
+  eventos por operación, no por barra: cada salida se busca con una búsqueda
+  vectorizada sobre las barras posteriores a la entrada.
+- parameter_sweep(): barrido de parámetros en un pool de procesos; las barras
+  se publican una sola vez en memoria compartida y los procesos las leen como
+  arrays de solo lectura.
+"""
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ("open", "high", "low", "close")
+PERIODS_PER_YEAR = {"1Min": 252 * 390, "5Min": 252 * 78, "15Min": 252 * 26, "1Hour": 252 * 7, "1Day": 252}
+
+
+def bars_to_arrays(bars):
+    """Extrae las columnas OHLC como arrays float64 contiguos."""
+    return {name: np.ascontiguousarray(bars[name].to_numpy(dtype=np.float64)) for name in BAR_COLUMNS}
+
+
+def _apply_stops(arrays, position, stop_loss, take_profit):
+    """
+    Recorre las operaciones (no las barras) cerrando la posición al tocar el stop o el objetivo.
+
+    Args:
+        position (np.ndarray): Posición mantenida en cada barra (ya desplazada a la ejecución).
+
+    Returns:
+        tuple: (posición ajustada, precio de salida por barra o NaN)
+    """
+    opens, highs, lows = arrays["open"], arrays["high"], arrays["low"]
+    n = len(position)
+    position = position.copy()
+    exit_price = np.full(n, np.nan)
+    # Tramos de posición constante: cada uno es una operación
+    bounds = np.r_[0, np.flatnonzero(np.diff(position) != 0) + 1, n]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        size = position[start]
+        if size == 0:
+            continue
+        entry = opens[start]
+        direction = np.sign(size)
+        stop_px = entry * (1 - direction * stop_loss) if stop_loss else np.nan
+        take_px = entry * (1 + direction * take_profit) if take_profit else np.nan
+        window_low, window_high = lows[start:end], highs[start:end]
+        if direction > 0:
+            stop_hits, take_hits = window_low <= stop_px, window_high >= take_px
+        else:
+            stop_hits, take_hits = window_high >= stop_px, window_low <= take_px
+        hits = stop_hits | take_hits
+        if not hits.any():
+            continue
+        offset = int(np.argmax(hits))
+        bar_open = opens[start + offset]
+        # Si en la misma barra se tocan ambos, se asume el stop (peor caso). Con hueco
+        # en la apertura la orden se ejecuta al open, no al nivel del stop/objetivo.
+        if stop_hits[offset]:
+            exit_price[start + offset] = min(bar_open, stop_px) if direction > 0 else max(bar_open, stop_px)
+        else:
+            exit_price[start + offset] = max(bar_open, take_px) if direction > 0 else min(bar_open, take_px)
+        # Plano hasta la siguiente señal distinta
+        position[start + offset + 1:end] = 0.0
+    return position, exit_price
+
+
+def backtest(arrays, signals, commission=0.0, slippage_bps=0.0, initial_capital=100_000.0,
+             stop_loss=None, take_profit=None, periods_per_year=252):
+    """
+    Simula una estrategia a partir de una señal de posición objetivo por barra.
+
+    Args:
+        arrays (dict): Arrays OHLC (ver bars_to_arrays).
+        signals (np.ndarray): Posición objetivo en unidades tras el cierre de cada barra.
+        commission (float): Comisión por unidad negociada.
+        slippage_bps (float): Slippage en puntos básicos sobre el precio de ejecución.
+        stop_loss / take_profit (float): Porcentajes (0.02 = 2%); activan el bucle de eventos.
+
+    Returns:
+        dict: "equity", "position", "trades", "pnl" (arrays) y métricas.
+    """
+    opens, closes = arrays["open"], arrays["close"]
+    target = np.nan_to_num(np.asarray(signals, dtype=np.float64))
+    # La posición de la barra t es la señal de t-1 ejecutada en la apertura de t
+    position = np.r_[0.0, target[:-1]]
+    if stop_loss or take_profit:
+        position, exit_price = _apply_stops(arrays, position, stop_loss, take_profit)
+    else:
+        exit_price = np.full(len(position), np.nan)
+
+    exited = ~np.isnan(exit_price)
+    prev_close = np.r_[opens[0], closes[:-1]]
+    # Posición que llega abierta desde la barra anterior (cero si salió por stop)
+    carried = np.where(np.r_[False, exited[:-1]], 0.0, np.r_[0.0, position[:-1]])
+    mark = np.where(exited, exit_price, closes)
+
+    pnl = carried * (opens - prev_close) + position * (mark - opens)
+    entries = position - carried
+    exits = np.where(exited, position, 0.0)
+    costs = np.abs(entries) * (commission + opens * slippage_bps / 10_000)
+    costs += np.abs(exits) * (commission + np.nan_to_num(exit_price) * slippage_bps / 10_000)
+    pnl -= costs
+    equity = initial_capital + np.cumsum(pnl)
+    trades = entries - exits
+    return {
+        "equity": equity, "position": position, "trades": trades, "pnl": pnl,
+        **performance(equity, np.count_nonzero(entries) + np.count_nonzero(exits), periods_per_year)
+    }
+
+
+def performance(equity, n_trades, periods_per_year=252):
+    returns = np.diff(equity, prepend=equity[0]) / np.r_[equity[0], equity[:-1]]
+    std = returns.std()
+    peak = np.maximum.accumulate(equity)
+    return {
+        "total_return": float(equity[-1] / equity[0] - 1) if len(equity) else 0.0,
+        "sharpe": float(returns.mean() / std * np.sqrt(periods_per_year)) if std else 0.0,
+        "max_drawdown": float(((equity - peak) / peak).min()) if len(equity) else 0.0,
+        "trades": int(n_trades),
+    }
+
+
+# --- Estrategias (funciones de módulo para poder usarlas en el pool) ---
+
+def _rolling_mean(values, period):
+    csum = np.cumsum(np.r_[0.0, values])
+    out = np.full(len(values), np.nan)
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def sma_crossover(arrays, fast=10, slow=50, size=1.0):
+    """Largo cuando la media rápida está por encima de la lenta, corto en caso contrario."""
+    close = arrays["close"]
+    fast_ma, slow_ma = _rolling_mean(close, int(fast)), _rolling_mean(close, int(slow))
+    return np.where(np.isnan(slow_ma), 0.0, np.where(fast_ma > slow_ma, size, -size))
+
+
+def breakout(arrays, lookback=20, size=1.0):
+    """Largo al superar el máximo de las últimas lookback barras, plano al perder el mínimo."""
+    high = pd.Series(arrays["high"]).rolling(int(lookback)).max().shift(1).to_numpy()
+    low = pd.Series(arrays["low"]).rolling(int(lookback)).min().shift(1).to_numpy()
+    close = arrays["close"]
+    signal = np.where(close > high, size, np.where(close < low, 0.0, np.nan))
+    return pd.Series(signal).ffill().fillna(0.0).to_numpy()
+
+
+STRATEGIES = {"sma_crossover": sma_crossover, "breakout": breakout}
+
+
+# --- Barridos de parámetros ---
+
+_WORKER_ARRAYS = None
+_WORKER_SHM = []
+
+
+def _open_segment(name):
+    """
+    Abre un segmento ya creado sin hacerse cargo de él: lo libera el proceso principal.
+
+    No se llama a resource_tracker.unregister: los workers comparten el tracker del
+    proceso principal y desregistrar desde aquí le quitaría el registro al dueño.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _attach_arrays(descriptors):
+    """Inicializador del pool: abre la memoria compartida como arrays de solo lectura."""
+    global _WORKER_ARRAYS
+    _WORKER_ARRAYS = {}
+    for name, (shm_name, length) in descriptors.items():
+        shm = _open_segment(shm_name)
+        _WORKER_SHM.append(shm)
+        array = np.ndarray((length,), dtype=np.float64, buffer=shm.buf)
+        array.flags.writeable = False
+        _WORKER_ARRAYS[name] = array
+
+
+def _run_combo(strategy, params, backtest_kwargs):
+    signals = strategy(_WORKER_ARRAYS, **params)
+    result = backtest(_WORKER_ARRAYS, signals, **backtest_kwargs)
+    return {k: result[k] for k in ("total_return", "sharpe", "max_drawdown", "trades")}
+
+
+def parameter_sweep(bars, strategy, param_grid, processes=None, chunksize=8, **backtest_kwargs):
+    """
+    Ejecuta el backtest para todas las combinaciones de param_grid en paralelo.
+
+    Args:
+        bars (pd.DataFrame | dict): Barras OHLC o arrays ya extraídos.
+        strategy (callable | str): Función de señales (de módulo) o nombre en STRATEGIES.
+        param_grid (dict): {parámetro: lista de valores}.
+        processes (int): Procesos del pool (por defecto, núcleos disponibles).
+
+    Returns:
+        pd.DataFrame: Una fila por combinación con sus parámetros y métricas.
+    """
+    strategy = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    arrays = bars if isinstance(bars, dict) else bars_to_arrays(bars)
+    keys = list(param_grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+    segments = {}
+    try:
+        descriptors = {}
+        for name, values in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[...] = values
+            segments[name] = shm
+            descriptors[name] = (shm.name, len(values))
+
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=_attach_arrays,
+                                 initargs=(descriptors,)) as pool:
+            results = list(pool.map(
+                _run_combo, itertools.repeat(strategy), combos, itertools.repeat(backtest_kwargs),
+                chunksize=chunksize
+            ))
+    finally:
+        for shm in segments.values():
+            shm.close()
+            shm.unlink()
+
+    return pd.DataFrame([{**combo, **result} for combo, result in zip(combos, results)])
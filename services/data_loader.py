@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Esquema de columnas de un fichero de operaciones (nombre normalizado -> dtype)
+TRADE_SCHEMA = {
+    "fill_id": "string",
+    "order_id": "string",
+    "symbol": "category",
+    "side": "category",
+    "quantity": "float32",
+    "price": "float32",
+    "commission": "float32",
+    "fees": "float32",
+    "pnl": "float32",
+}
+TIMESTAMP_COLUMNS = ["timestamp"]
+
+# Nombres habituales en los exportes de brokers -> nombre normalizado
+COLUMN_ALIASES = {
+    "id": "fill_id",
+    "trade_id": "fill_id",
+    "execution_id": "fill_id",
+    "fill id": "fill_id",
+    "order id": "order_id",
+    "ticker": "symbol",
+    "instrument": "symbol",
+    "action": "side",
+    "buy/sell": "side",
+    "qty": "quantity",
+    "shares": "quantity",
+    "size": "quantity",
+    "fill_price": "price",
+    "avg_price": "price",
+    "precio": "price",
+    "commissions": "commission",
+    "fee": "fees",
+    "time": "timestamp",
+    "date": "timestamp",
+    "datetime": "timestamp",
+    "transaction_time": "timestamp",
+    "fecha": "timestamp",
+}
+
+# Columnas de fecha y hora separadas que se unen en un único timestamp
+DATE_ALIASES = ("date", "fecha")
+TIME_ALIASES = ("time", "hora")
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def normalize_column(name):
+    """Normaliza el nombre de una columna del CSV al nombre del esquema."""
+    key = str(name).strip().lower()
+    return COLUMN_ALIASES.get(key, key.replace(" ", "_"))
+
+
+def _column_key(name):
+    return str(name).strip().lower()
+
+
+def _rename_map(columns):
+    """
+    Decide el nombre final de cada columna sin generar duplicados.
+
+    Un nombre del esquema lo toma primero la columna que ya se llama así y, si
+    no hay ninguna, la primera columna cuyo alias lleva a él; el resto de
+    columnas que llevarían al mismo nombre conservan el suyo. Si hay columnas
+    de fecha y de hora separadas (y ninguna otra da el timestamp) se unen en
+    "timestamp".
+
+    Returns:
+        tuple: ({columna original: nombre final}, (columna fecha, columna hora) o None)
+    """
+    targets = {name: normalize_column(name) for name in columns}
+    claimed = {}
+    for name in columns:
+        if _column_key(name).replace(" ", "_") == targets[name]:
+            claimed.setdefault(targets[name], name)
+
+    date_time = None
+    if "timestamp" not in claimed:
+        keys = {_column_key(name): name for name in columns}
+        date_col = next((keys[k] for k in DATE_ALIASES if k in keys), None)
+        time_col = next((keys[k] for k in TIME_ALIASES if k in keys), None)
+        others = [name for name in columns if targets[name] == "timestamp" and name not in (date_col, time_col)]
+        if date_col is not None and time_col is not None and not others:
+            date_time = (date_col, time_col)
+            claimed["timestamp"] = None
+
+    for name in columns:
+        if date_time is None or name not in date_time:
+            claimed.setdefault(targets[name], name)
+    renamed = {name: targets[name] if claimed.get(targets[name]) == name else name for name in columns}
+    return renamed, date_time
+
+
+def _read_header(source):
+    try:
+        header = pd.read_csv(source, nrows=0)
+    except pd.errors.EmptyDataError:
+        raise ValueError("El archivo CSV está vacío.")
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return list(header.columns)
+
+
+def _concat_chunks(chunks):
+    """Une los bloques conservando las columnas categóricas (une las categorías)."""
+    if len(chunks) == 1:
+        return chunks[0]
+    categorical = [name for name, dtype in chunks[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    unified = {name: union_categoricals([chunk[name] for chunk in chunks]) for name in categorical}
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for name in categorical:
+        df[name] = pd.Categorical.from_codes(unified[name].codes, dtype=unified[name].dtype)
+    return df[list(chunks[0].columns)]
+
+
+def load_trades_csv(source, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None):
+    """
+    Lee un CSV de operaciones por bloques aplicando un esquema explícito.
+
+    Las columnas conocidas se renombran al esquema (TRADE_SCHEMA) sin duplicar
+    nombres (ver _rename_map), los símbolos y lados se leen como categorías, los
+    precios como float32 y la fecha como datetime64 en UTC. El resto de columnas
+    numéricas se reducen al tipo más pequeño que las representa.
+
+    Args:
+        source: Ruta o fichero subido (st.file_uploader).
+        chunksize (int): Filas por bloque.
+        progress_callback (callable): Recibe la fracción leída (0.0-1.0) tras cada bloque.
+
+    Returns:
+        pd.DataFrame: Operaciones con tipos compactos.
+    """
+    original_columns = _read_header(source)
+    renamed, date_time = _rename_map(original_columns)
+    dtypes = {name: TRADE_SCHEMA[norm] for name, norm in renamed.items() if norm in TRADE_SCHEMA}
+    if date_time is not None:
+        dtypes.update(dict.fromkeys(date_time, "string"))
+    total_bytes = getattr(source, "size", None)
+
+    chunks = []
+    rows = 0
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=dtypes, low_memory=False):
+        if date_time is not None:
+            date_col, time_col = date_time
+            position = chunk.columns.get_loc(date_col)
+            position -= int(chunk.columns.get_loc(time_col) < position)
+            combined = chunk[date_col].str.strip() + " " + chunk[time_col].str.strip()
+            chunk = chunk.drop(columns=[date_col, time_col])
+            chunk.insert(position, "timestamp", combined)
+        chunk = chunk.rename(columns=renamed)
+        for name in TIMESTAMP_COLUMNS:
+            if name in chunk.columns:
+                chunk[name] = pd.to_datetime(chunk[name], utc=True, errors="coerce")
+        for name, dtype in chunk.dtypes.items():
+            if name in TRADE_SCHEMA:
+                continue
+            if dtype == np.float64:
+                chunk[name] = pd.to_numeric(chunk[name], downcast="float")
+            elif dtype == np.int64:
+                chunk[name] = pd.to_numeric(chunk[name], downcast="integer")
+        chunks.append(chunk)
+        rows += len(chunk)
+        if progress_callback is not None:
+            if total_bytes and hasattr(source, "tell"):
+                progress_callback(min(source.tell() / total_bytes, 1.0))
+            else:
+                progress_callback(None)
+
+    if not chunks:
+        columns = [renamed[name] for name in original_columns]
+        if date_time is not None:
+            columns = ["timestamp" if name == date_time[0] else name for name in columns if name != date_time[1]]
+        return pd.DataFrame(columns=columns)
+    df = _concat_chunks(chunks)
+    if progress_callback is not None:
+        progress_callback(1.0)
+    return df
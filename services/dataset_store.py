@@ -0,0 +1,162 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def content_hash(data):
+    """Huella del contenido de un fichero (bytes) usada como clave del dataset."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class DatasetStore:
+    """
+    Registro en memoria de datasets ya parseados, indexados por huella de contenido.
+
+    Los DataFrames se entregan sin copiar: los consumidores (módulo de gráficos,
+    addons) deben tratarlos como de solo lectura. Cuando el tamaño total supera
+    max_bytes se expulsan los datasets menos usados recientemente.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, digest, frame, name=None):
+        size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            self._datasets[digest] = {
+                "hash": digest,
+                "name": name or digest,
+                "frame": frame,
+                "bytes": size,
+                "rows": len(frame),
+                "loaded_at": time.time()
+            }
+            self._datasets.move_to_end(digest)
+            self._evict(keep=digest)
+        return frame
+
+    def get(self, digest):
+        """Devuelve el DataFrame registrado (sin copia) o None si no está o fue expulsado."""
+        with self._lock:
+            entry = self._datasets.get(digest)
+            if entry is None:
+                return None
+            self._datasets.move_to_end(digest)
+            return entry["frame"]
+
+    def remove(self, digest):
+        with self._lock:
+            self._datasets.pop(digest, None)
+
+    def info(self, digest):
+        with self._lock:
+            entry = self._datasets.get(digest)
+            return {k: v for k, v in entry.items() if k != "frame"} if entry else None
+
+    def size_bytes(self):
+        with self._lock:
+            return sum(entry["bytes"] for entry in self._datasets.values())
+
+    def _evict(self, keep=None):
+        total = sum(entry["bytes"] for entry in self._datasets.values())
+        for digest in list(self._datasets):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            total -= self._datasets.pop(digest)["bytes"]
+
+
+@st.cache_resource
+def get_dataset_store():
+    """Instancia única del registro de datasets para todo el proceso."""
+    return DatasetStore()
+
+
+def _session_datasets():
+    if "datasets" not in st.session_state:
+        st.session_state.datasets = {}
+    return st.session_state.datasets
+
+
+def load_uploaded_dataset(uploaded_file, parser, progress_callback=None):
+    """
+    Parsea un fichero subido una sola vez y lo registra en la sesión.
+
+    En los reruns posteriores se reutiliza la huella calculada para el mismo
+    fichero (por su file_id), así que ni se vuelve a leer ni a hashear.
+
+    Args:
+        uploaded_file: Fichero devuelto por st.file_uploader.
+        parser (callable): parser(fichero, progress_callback=...) -> DataFrame.
+
+    Returns:
+        tuple: (huella, DataFrame)
+    """
+    store = get_dataset_store()
+    hashes = st.session_state.setdefault("dataset_file_hashes", {})
+    file_id = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    digest = hashes.get(file_id)
+    if digest is None:
+        digest = content_hash(uploaded_file.getvalue())
+        hashes[file_id] = digest
+
+    frame = store.get(digest)
+    if frame is None:
+        uploaded_file.seek(0)
+        frame = store.add(digest, parser(uploaded_file, progress_callback=progress_callback), name=uploaded_file.name)
+    _session_datasets()[uploaded_file.name] = digest
+    st.session_state.active_dataset = uploaded_file.name
+    return digest, frame
+
+
+def register_dataset(name, frame, digest):
+    """Registra en la sesión un DataFrame generado en la app (p. ej. una consulta al diario) y lo activa."""
+    store = get_dataset_store()
+    if store.get(digest) is None:
+        store.add(digest, frame, name=name)
+    _session_datasets()[name] = digest
+    st.session_state.active_dataset = name
+    return digest
+
+
+# --- API para módulos y addons ---
+
+def list_datasets():
+    """Lista los datasets cargados en la sesión actual con sus metadatos."""
+    store = get_dataset_store()
+    result = []
+    for name, digest in list(_session_datasets().items()):
+        info = store.info(digest)
+        if info is None:
+            # Expulsado por el presupuesto de memoria
+            del _session_datasets()[name]
+            continue
+        result.append(dict(info, name=name))
+    return result
+
+
+def get_dataset(name=None):
+    """
+    Devuelve un dataset de la sesión (el activo si no se indica nombre) sin copiarlo.
+
+    El DataFrame es compartido: no debe modificarse en sitio.
+    """
+    name = name or st.session_state.get("active_dataset")
+    digest = _session_datasets().get(name)
+    if digest is None:
+        return None
+    return get_dataset_store().get(digest)
+
+
+def get_dataset_hash(name=None):
+    """Huella de contenido de un dataset de la sesión (útil como clave de caché)."""
+    name = name or st.session_state.get("active_dataset")
+    return _session_datasets().get(name)
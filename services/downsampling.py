@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+# Temporalidades de la pirámide OHLC (de más fina a más gruesa)
+PYRAMID_RULES = ["1min", "5min", "15min", "1h", "4h", "1D", "1W"]
+DEFAULT_MAX_POINTS = 2000
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: reduce una serie a n_out puntos conservando su forma.
+
+    Un bucle por bucket (n_out iteraciones) con operaciones vectorizadas dentro,
+    de modo que el coste total es O(n).
+
+    Returns:
+        np.ndarray: Índices de los puntos seleccionados.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_downsample(x, y, n_buckets):
+    """
+    Conserva el mínimo y el máximo de cada bucket (equivalente a un píxel horizontal).
+
+    Returns:
+        np.ndarray: Índices ordenados de los puntos seleccionados (hasta 2 * n_buckets).
+    """
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    y = np.asarray(y)
+    x = np.asarray(x, dtype=np.float64)
+    # Buckets de igual anchura en el eje x (el viewport), no en número de puntos
+    edges = np.linspace(x[0], x[-1], n_buckets + 1)
+    starts = np.unique(np.searchsorted(x, edges[:-1], side="left"))
+    starts = starts[starts < n]
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    # Primer índice de cada bucket que alcanza su mínimo / máximo
+    min_candidates = np.flatnonzero(y == mins[bucket])
+    max_candidates = np.flatnonzero(y == maxs[bucket])
+    _, first_min = np.unique(bucket[min_candidates], return_index=True)
+    _, first_max = np.unique(bucket[max_candidates], return_index=True)
+    return np.unique(np.concatenate([min_candidates[first_min], max_candidates[first_max]]))
+
+
+def resample_ohlc(frame, rule):
+    """Reagrega barras OHLC(V) a una temporalidad más gruesa."""
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last"}
+    if "volume" in frame.columns:
+        agg["volume"] = "sum"
+    return frame.resample(rule).agg(agg).dropna(subset=["open"])
+
+
+class OHLCPyramid:
+    """
+    Pirámide multirresolución de velas precalculada una sola vez.
+
+    Al hacer zoom se elige el nivel más fino cuyo número de velas en el rango
+    visible no supera max_points, por lo que el payload está acotado.
+    """
+
+    def __init__(self, frame, rules=PYRAMID_RULES):
+        self.levels = [("base", frame)]
+        for rule in rules:
+            coarser = resample_ohlc(self.levels[-1][1], rule)
+            # Solo se añaden niveles que de verdad reducen el número de velas
+            if len(coarser) < len(self.levels[-1][1]):
+                self.levels.append((rule, coarser))
+
+    def query(self, start=None, end=None, max_points=DEFAULT_MAX_POINTS):
+        """
+        Returns:
+            tuple: (regla del nivel elegido, DataFrame recortado al rango)
+        """
+        for rule, frame in self.levels:
+            lo = frame.index.searchsorted(start, side="left") if start is not None else 0
+            hi = frame.index.searchsorted(end, side="right") if end is not None else len(frame)
+            if hi - lo <= max_points:
+                return rule, frame.iloc[lo:hi]
+        rule, frame = self.levels[-1]
+        lo = frame.index.searchsorted(start, side="left") if start is not None else 0
+        hi = frame.index.searchsorted(end, side="right") if end is not None else len(frame)
+        # Incluso el nivel más grueso es demasiado denso: se toman las últimas max_points velas
+        return rule, frame.iloc[max(lo, hi - max_points):hi]
+
+
+class LinePyramid:
+    """
+    Pirámide de una serie temporal: cada nivel reduce el anterior x4 con min/max.
+
+    Una consulta toma el nivel más fino con pocos puntos en el viewport y lo
+    reduce con LTTB o min/max al número de píxeles pedido.
+    """
+
+    def __init__(self, series, factor=4, min_points=DEFAULT_MAX_POINTS):
+        x = series.index.as_unit("ns").asi8 if isinstance(series.index, pd.DatetimeIndex) else np.asarray(series.index, dtype=np.int64)
+        y = series.to_numpy(dtype=np.float64)
+        self.tz = getattr(series.index, "tz", None)
+        self.name = series.name
+        self.levels = [(x, y)]
+        while len(self.levels[-1][0]) > min_points * factor:
+            lx, ly = self.levels[-1]
+            idx = minmax_downsample(lx, ly, len(lx) // (2 * factor))
+            self.levels.append((lx[idx], ly[idx]))
+
+    @property
+    def size(self):
+        return len(self.levels[0][0])
+
+    @property
+    def start(self):
+        """Primer instante de la serie (UTC, sin zona horaria)."""
+        return pd.Timestamp(int(self.levels[0][0][0]))
+
+    @property
+    def end(self):
+        return pd.Timestamp(int(self.levels[0][0][-1]))
+
+    def query(self, start=None, end=None, n_pixels=1000, method="lttb"):
+        """
+        Args:
+            start, end: Límites del viewport (pd.Timestamp).
+            n_pixels (int): Anchura en píxeles; el resultado tiene como mucho 2 * n_pixels puntos.
+            method (str): "lttb" o "minmax".
+
+        Returns:
+            pd.Series: Serie reducida con índice datetime.
+        """
+        lo_value = pd.Timestamp(start).value if start is not None else None
+        hi_value = pd.Timestamp(end).value if end is not None else None
+        for x, y in self.levels:
+            lo = np.searchsorted(x, lo_value, side="left") if lo_value is not None else 0
+            hi = np.searchsorted(x, hi_value, side="right") if hi_value is not None else len(x)
+            if hi - lo <= 8 * n_pixels:
+                break
+        x, y = x[lo:hi], y[lo:hi]
+        if method == "minmax":
+            idx = minmax_downsample(x, y, n_pixels)
+        else:
+            idx = lttb(x, y, 2 * n_pixels)
+        index = pd.DatetimeIndex(pd.to_datetime(x[idx], unit="ns", utc=self.tz is not None), name="timestamp")
+        return pd.Series(y[idx], index=index, name=self.name)
@@ -0,0 +1,494 @@
+"""
+Indicadores técnicos con dos caminos equivalentes:
+
+- Batch: funciones vectorizadas sobre un DataFrame de barras (open/high/low/close/volume).
+- Streaming: clases con update() en O(1) por barra nueva y seed() para
+  inicializar su estado a partir de un histórico con operaciones vectorizadas.
+
+Ambos dan el mismo resultado (salvo redondeo de coma flotante), de modo que un
+histórico se puede calcular en batch y las barras que llegan después se añaden
+en streaming sin recalcular todo (ver IndicatorEngine).
+
+Los indicadores se piden con una especificación de texto:
+    "sma_20", "ema_50", "rsi_14", "macd_12_26_9", "atr_14", "bb_20_2", "vwap"
+"""
+import threading
+from collections import deque, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from services.downsampling import resample_ohlc
+
+DEFAULT_SPEC = ["sma_20", "ema_20", "rsi_14", "macd_12_26_9", "atr_14", "bb_20_2", "vwap"]
+
+# Timeframes de Alpaca -> reglas de pandas
+TIMEFRAME_RULES = {
+    "1Min": "1min",
+    "5Min": "5min",
+    "15Min": "15min",
+    "30Min": "30min",
+    "1Hour": "1h",
+    "4Hour": "4h",
+    "1Day": "1D",
+    "1Week": "1W",
+}
+
+
+# --- Batch ---
+
+def sma(close, period):
+    return close.rolling(period, min_periods=period).mean()
+
+
+def ema(close, period):
+    return close.ewm(span=period, adjust=False).mean()
+
+
+def _rsi_averages(close, period):
+    delta = close.diff()
+    alpha = 1.0 / period
+    avg_gain = delta.clip(lower=0).ewm(alpha=alpha, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=alpha, adjust=False).mean()
+    return avg_gain, avg_loss
+
+
+def rsi(close, period=14):
+    avg_gain, avg_loss = _rsi_averages(close, period)
+    rs = avg_gain / avg_loss
+    return 100 - 100 / (1 + rs)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = line.ewm(span=signal, adjust=False).mean()
+    return pd.DataFrame({"macd": line, "macd_signal": signal_line, "macd_hist": line - signal_line})
+
+
+def true_range(high, low, close):
+    prev_close = close.shift(1)
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    return tr
+
+
+def atr(high, low, close, period=14):
+    return true_range(high, low, close).ewm(alpha=1.0 / period, adjust=False).mean()
+
+
+def bollinger(close, period=20, width=2.0):
+    mid = close.rolling(period, min_periods=period).mean()
+    std = close.rolling(period, min_periods=period).std(ddof=0)
+    return pd.DataFrame({"bb_mid": mid, "bb_upper": mid + width * std, "bb_lower": mid - width * std})
+
+
+def vwap(high, low, close, volume):
+    """VWAP acumulado por sesión (se reinicia cada día UTC)."""
+    typical = (high + low + close) / 3
+    day = close.index.floor("D") if isinstance(close.index, pd.DatetimeIndex) else np.zeros(len(close))
+    pv = (typical * volume).groupby(day).cumsum()
+    vol = volume.groupby(day).cumsum()
+    return pv / vol
+
+
+def _parse(name):
+    parts = name.split("_")
+    return parts[0], [float(p) if "." in p else int(p) for p in parts[1:]]
+
+
+def compute_indicators(bars, spec=DEFAULT_SPEC):
+    """
+    Calcula en batch los indicadores de spec sobre un DataFrame de barras.
+
+    Returns:
+        pd.DataFrame: Una columna por indicador (varias para macd y bb), mismo índice que bars.
+    """
+    close = bars["close"].astype(np.float64)
+    out = {}
+    for name in spec:
+        kind, args = _parse(name)
+        if kind == "sma":
+            out[name] = sma(close, *args)
+        elif kind == "ema":
+            out[name] = ema(close, *args)
+        elif kind == "rsi":
+            out[name] = rsi(close, *args)
+        elif kind == "macd":
+            for column, values in macd(close, *args).items():
+                out[f"{name}:{column}"] = values
+        elif kind == "atr":
+            out[name] = atr(bars["high"], bars["low"], close, *args)
+        elif kind == "bb":
+            for column, values in bollinger(close, *args).items():
+                out[f"{name}:{column}"] = values
+        elif kind == "vwap":
+            out[name] = vwap(bars["high"], bars["low"], close, bars["volume"].astype(np.float64))
+        else:
+            raise ValueError(f"Indicador desconocido: {name}")
+    return pd.DataFrame(out, index=bars.index)
+
+
+# --- Streaming ---
+
+def _last_valid(values):
+    """Último valor no NaN de una Series (o None si no hay ninguno)."""
+    index = values.last_valid_index()
+    return None if index is None else float(values.loc[index])
+
+
+class StreamingSMA:
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+
+    def update(self, value):
+        self.window.append(value)
+        self.total += value
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        return self.total / self.period if len(self.window) == self.period else np.nan
+
+    def seed(self, close):
+        self.window = deque(close[-self.period:].tolist())
+        self.total = float(np.sum(self.window))
+
+
+class StreamingEMA:
+    def __init__(self, period=None, alpha=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.value = None
+
+    def update(self, value):
+        if np.isnan(value):
+            return self.value if self.value is not None else np.nan
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        return self.value
+
+    def seed(self, values):
+        self.value = _last_valid(pd.Series(values).ewm(alpha=self.alpha, adjust=False).mean())
+
+
+class StreamingRSI:
+    def __init__(self, period=14):
+        self.gain = StreamingEMA(alpha=1.0 / period)
+        self.loss = StreamingEMA(alpha=1.0 / period)
+        self.prev = None
+
+    def update(self, close):
+        if self.prev is None:
+            self.prev = close
+            return np.nan
+        delta, self.prev = close - self.prev, close
+        avg_gain = self.gain.update(max(delta, 0.0))
+        avg_loss = self.loss.update(max(-delta, 0.0))
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else np.nan
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    def seed(self, close):
+        if not len(close):
+            return
+        avg_gain, avg_loss = _rsi_averages(pd.Series(close), round(1.0 / self.gain.alpha))
+        self.gain.value, self.loss.value = _last_valid(avg_gain), _last_valid(avg_loss)
+        self.prev = float(close[-1])
+
+
+class StreamingMACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = StreamingEMA(fast), StreamingEMA(slow), StreamingEMA(signal)
+
+    def update(self, close):
+        line = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(line)
+        return line, signal, line - signal
+
+    def seed(self, close):
+        close = pd.Series(close)
+        fast = close.ewm(alpha=self.fast.alpha, adjust=False).mean()
+        slow = close.ewm(alpha=self.slow.alpha, adjust=False).mean()
+        self.fast.value, self.slow.value = _last_valid(fast), _last_valid(slow)
+        self.signal.seed((fast - slow).to_numpy())
+
+
+class StreamingATR:
+    def __init__(self, period=14):
+        self.avg = StreamingEMA(alpha=1.0 / period)
+        self.prev_close = None
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.avg.update(tr)
+
+    def seed(self, high, low, close):
+        if not len(close):
+            return
+        self.avg.seed(true_range(pd.Series(high), pd.Series(low), pd.Series(close)).to_numpy())
+        self.prev_close = float(close[-1])
+
+
+class StreamingBollinger:
+    def __init__(self, period=20, width=2.0):
+        self.period, self.width = period, width
+        self.window = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, close):
+        self.window.append(close)
+        self.total += close
+        self.total_sq += close * close
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        if len(self.window) < self.period:
+            return np.nan, np.nan, np.nan
+        mid = self.total / self.period
+        std = np.sqrt(max(self.total_sq / self.period - mid * mid, 0.0))
+        return mid, mid + self.width * std, mid - self.width * std
+
+    def seed(self, close):
+        window = close[-self.period:]
+        self.window = deque(window.tolist())
+        self.total = float(np.sum(window))
+        self.total_sq = float(np.sum(window * window))
+
+
+class StreamingVWAP:
+    def __init__(self):
+        self.day = None
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def update(self, timestamp, high, low, close, volume):
+        day = pd.Timestamp(timestamp).floor("D")
+        if day != self.day:
+            self.day, self.pv, self.volume = day, 0.0, 0.0
+        self.pv += (high + low + close) / 3 * volume
+        self.volume += volume
+        return self.pv / self.volume if self.volume else np.nan
+
+    def seed(self, timestamps, high, low, close, volume):
+        if not len(timestamps):
+            return
+        self.day = pd.Timestamp(timestamps[-1]).floor("D")
+        today = timestamps >= self.day
+        self.pv = float(np.sum((high[today] + low[today] + close[today]) / 3 * volume[today]))
+        self.volume = float(np.sum(volume[today]))
+
+
+class StreamingIndicators:
+    """Conjunto de indicadores en streaming con la misma especificación y columnas que compute_indicators."""
+
+    def __init__(self, spec=DEFAULT_SPEC):
+        self.spec = list(spec)
+        self.states = []
+        self.columns = []
+        for name in self.spec:
+            kind, args = _parse(name)
+            if kind == "sma":
+                self.states.append((kind, StreamingSMA(*args)))
+            elif kind == "ema":
+                self.states.append((kind, StreamingEMA(*args)))
+            elif kind == "rsi":
+                self.states.append((kind, StreamingRSI(*args)))
+            elif kind == "macd":
+                self.states.append((kind, StreamingMACD(*args)))
+            elif kind == "atr":
+                self.states.append((kind, StreamingATR(*args)))
+            elif kind == "bb":
+                self.states.append((kind, StreamingBollinger(*args)))
+            elif kind == "vwap":
+                self.states.append((kind, StreamingVWAP()))
+            else:
+                raise ValueError(f"Indicador desconocido: {name}")
+            if kind == "macd":
+                self.columns += [f"{name}:macd", f"{name}:macd_signal", f"{name}:macd_hist"]
+            elif kind == "bb":
+                self.columns += [f"{name}:bb_mid", f"{name}:bb_upper", f"{name}:bb_lower"]
+            else:
+                self.columns.append(name)
+
+    def update(self, timestamp, high, low, close, volume):
+        """Procesa una barra y devuelve la fila de valores (en el orden de self.columns)."""
+        row = []
+        for kind, state in self.states:
+            if kind in ("sma", "ema", "rsi"):
+                row.append(state.update(close))
+            elif kind in ("macd", "bb"):
+                row.extend(state.update(close))
+            elif kind == "atr":
+                row.append(state.update(high, low, close))
+            else:
+                row.append(state.update(timestamp, high, low, close, volume))
+        return row
+
+    def seed(self, timestamps, high, low, close, volume):
+        """Deja el estado como si se hubieran procesado todas las barras dadas (arrays NumPy)."""
+        for kind, state in self.states:
+            if kind == "atr":
+                state.seed(high, low, close)
+            elif kind == "vwap":
+                state.seed(timestamps, high, low, close, volume)
+            else:
+                state.seed(close)
+
+
+class IndicatorEngine:
+    """
+    Mantiene los indicadores de una serie entre reruns.
+
+    La primera llamada calcula el histórico en batch (vectorizado) e inicializa
+    el estado de streaming a partir de él; las siguientes solo recorren las
+    barras con timestamp posterior a la última procesada, en O(1) por barra.
+    Los valores se guardan en arrays preasignados que crecen por duplicación.
+    """
+
+    def __init__(self, spec=DEFAULT_SPEC):
+        self.spec = list(spec)
+        self.streaming = StreamingIndicators(spec)
+        self.last_ts = None
+        self._tz = None
+        self._size = 0
+        self._values = np.empty((0, len(self.streaming.columns)))
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._frame = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _arrays(bars):
+        volume = bars["volume"].to_numpy(dtype=np.float64) if "volume" in bars.columns else np.zeros(len(bars))
+        return (bars.index.as_unit("ns").asi8, bars["high"].to_numpy(dtype=np.float64),
+                bars["low"].to_numpy(dtype=np.float64), bars["close"].to_numpy(dtype=np.float64), volume)
+
+    def _reserve(self, size):
+        if size <= len(self._timestamps):
+            return
+        capacity = max(size, 2 * len(self._timestamps), 1024)
+        values = np.empty((capacity, self._values.shape[1]))
+        values[:self._size] = self._values[:self._size]
+        timestamps = np.empty(capacity, dtype=np.int64)
+        timestamps[:self._size] = self._timestamps[:self._size]
+        self._values, self._timestamps = values, timestamps
+
+    def _seed(self, bars):
+        batch = compute_indicators(bars, self.spec).to_numpy(dtype=np.float64)
+        timestamps, high, low, close, volume = self._arrays(bars)
+        self._reserve(len(bars))
+        self._values[:len(bars)] = batch
+        self._timestamps[:len(bars)] = timestamps
+        self._size = len(bars)
+        self.streaming.seed(bars.index, high, low, close, volume)
+
+    def _advance(self, bars):
+        timestamps, high, low, close, volume = self._arrays(bars)
+        self._reserve(self._size + len(bars))
+        for i, ts in enumerate(bars.index):
+            self._values[self._size] = self.streaming.update(ts, high[i], low[i], close[i], volume[i])
+            self._timestamps[self._size] = timestamps[i]
+            self._size += 1
+
+    def update(self, bars):
+        """
+        Args:
+            bars (pd.DataFrame): Barras completas o solo las nuevas (índice datetime ordenado).
+
+        Returns:
+            pd.DataFrame: Indicadores de todas las barras procesadas hasta ahora.
+        """
+        with self._lock:
+            if self.last_ts is not None:
+                bars = bars.iloc[bars.index.searchsorted(self.last_ts, side="right"):]
+            if len(bars):
+                if self.last_ts is None:
+                    self._tz = bars.index.tz
+                    self._seed(bars)
+                else:
+                    self._advance(bars)
+                self.last_ts = bars.index[-1]
+                self._frame = None
+            if self._frame is None:
+                # Las filas ya escritas no se modifican, así que la vista se puede compartir sin copia
+                index = pd.DatetimeIndex(self._timestamps[:self._size].view("M8[ns]"), name="timestamp")
+                if self._tz is not None:
+                    index = index.tz_localize("UTC").tz_convert(self._tz)
+                self._frame = pd.DataFrame(self._values[:self._size], index=index,
+                                           columns=self.streaming.columns, copy=False)
+            return self._frame
+
+
+class ResampleCache:
+    """
+    Caché de barras remuestreadas (1Min -> 5Min -> 1H -> 1Day...).
+
+    Al llegar barras nuevas solo se reagrega desde el inicio del último bucket
+    (que puede estar incompleto) en lugar de todo el histórico.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resample(self, key, bars, timeframe):
+        rule = TIMEFRAME_RULES.get(timeframe, timeframe)
+        cache_key = (key, rule)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and len(bars) and bars.index[-1] == entry["last_ts"]:
+                self._entries.move_to_end(cache_key)
+                return entry["frame"]
+            if entry is None or not len(entry["frame"]) or not len(bars) or bars.index[0] != entry["first_ts"]:
+                # Serie nueva o con otro inicio: se remuestrea completa
+                frame = resample_ohlc(bars, rule)
+            else:
+                last_bucket = entry["frame"].index[-1]
+                tail = resample_ohlc(bars[bars.index >= last_bucket], rule)
+                frame = pd.concat([entry["frame"][entry["frame"].index < last_bucket], tail])
+            self._entries[cache_key] = {
+                "frame": frame,
+                "first_ts": bars.index[0] if len(bars) else None,
+                "last_ts": bars.index[-1] if len(bars) else None
+            }
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return frame
+
+
+# --- API para addons ---
+
+MAX_ENGINES = 256
+_ENGINES = OrderedDict()
+_ENGINES_LOCK = threading.Lock()
+_RESAMPLE_CACHE = ResampleCache()
+
+
+def resample_bars(key, bars, timeframe):
+    """Remuestrea barras a otro timeframe usando la caché compartida (key identifica la serie, p. ej. "AAPL:1Min")."""
+    return _RESAMPLE_CACHE.resample(key, bars, timeframe)
+
+
+def get_indicators(key, bars, spec=DEFAULT_SPEC):
+    """
+    Devuelve los indicadores de una serie actualizándolos de forma incremental.
+
+    Args:
+        key (str): Identificador de la serie (p. ej. "AAPL:1Day").
+        bars (pd.DataFrame): Barras de la serie; solo se procesan las nuevas.
+        spec (list): Indicadores a calcular.
+    """
+    engine_key = (key, tuple(spec))
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(engine_key)
+        if engine is None:
+            engine = _ENGINES[engine_key] = IndicatorEngine(spec)
+        _ENGINES.move_to_end(engine_key)
+        # LRU: se descartan las series que hace más tiempo que no se piden
+        while len(_ENGINES) > MAX_ENGINES:
+            _ENGINES.popitem(last=False)
+    return engine.update(bars)
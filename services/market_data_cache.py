@@ -0,0 +1,294 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from services.alpaca_integration import AlpacaIntegration, bars_to_frame
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "market_data")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Tiempos recientes que se conservan por tipo de acceso para report()
+TIMINGS_WINDOW = 1000
+# Segundos mínimos entre escrituras de index.json cuando solo cambia last_access
+INDEX_SAVE_INTERVAL = 5.0
+
+
+def _to_timestamp(value):
+    """Convierte fechas ISO/datetime a pd.Timestamp en UTC (None se mantiene)."""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+class MarketDataCache:
+    """
+    Caché local en disco de barras históricas.
+
+    Cada (símbolo, timeframe) se guarda como un conjunto de columnas .npy que se
+    abren con memoria mapeada. El índice recuerda el rango de fechas cubierto, de
+    modo que una petición dentro del rango no llama a la API y una petición que
+    se sale por el final solo descarga la cola que falta y la fusiona. La cola
+    se pide desde la última barra guardada (incluida), que puede estar aún en
+    curso y se sustituye por la descargada.
+
+    Cada escritura crea una carpeta nueva (AAPL_1Day.<versión>) y el índice pasa
+    a apuntar a ella; la anterior se borra si se puede. Así nunca se borra una
+    carpeta cuyos ficheros sigan mapeados por un lector (en Windows fallaría).
+
+    Estructura:
+        cache/market_data/
+            index.json
+            AAPL_1Day.1718000000000000000/
+                timestamp.npy
+                open.npy
+                ...
+    """
+
+    def __init__(self, client=None, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=60.0):
+        """
+        Args:
+            client (AlpacaIntegration): Cliente para descargar lo que falte.
+            cache_dir (str): Carpeta de la caché.
+            max_bytes (int): Presupuesto de disco; se expulsan entradas por LRU al superarlo.
+            max_age (float): Segundos durante los que una entrada abierta (sin fecha fin)
+                se considera al día sin volver a pedir la cola.
+        """
+        self.client = client or AlpacaIntegration()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.stats = {"hits": 0, "partial": 0, "misses": 0, "evictions": 0,
+                      "timings": {kind: deque(maxlen=TIMINGS_WINDOW) for kind in ("hit", "partial", "miss")}}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+        self._index_dirty = False
+        self._index_saved_at = 0.0
+        self._purge_stale_dirs()
+
+    def _load_index(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    return {key: entry for key, entry in json.load(f).items() if "dir" in entry}
+            except Exception:
+                pass
+        return {}
+
+    def _save_index(self, force=True):
+        """
+        Escribe index.json. Con force=False (solo cambió last_access) se limita a
+        una escritura cada INDEX_SAVE_INTERVAL segundos; flush() escribe lo pendiente.
+        """
+        now = time.monotonic()
+        if not force and now - self._index_saved_at < INDEX_SAVE_INTERVAL:
+            self._index_dirty = True
+            return
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_dirty, self._index_saved_at = False, now
+
+    def flush(self):
+        """Guarda el índice si hay cambios de last_access pendientes."""
+        with self._lock:
+            if self._index_dirty:
+                self._save_index()
+
+    def _purge_stale_dirs(self):
+        """Borra las carpetas que ya no referencia el índice (versiones antiguas aún mapeadas al escribir)."""
+        live = {entry["dir"] for entry in self.index.values()}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name not in live and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _key(symbol, timeframe):
+        return f"{symbol}_{timeframe}"
+
+    def _entry_dir(self, entry):
+        return os.path.join(self.cache_dir, entry["dir"])
+
+    def _read(self, entry):
+        """Abre las columnas de una entrada con memoria mapeada (sin copiar a RAM)."""
+        entry_dir = self._entry_dir(entry)
+        timestamps = np.load(os.path.join(entry_dir, "timestamp.npy"), mmap_mode="r")
+        columns = {name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode="r") for name in entry["columns"]}
+        return timestamps, columns
+
+    def _write(self, key, frame):
+        """
+        Escribe un DataFrame de barras como columnas .npy en una carpeta nueva.
+
+        Returns:
+            tuple: (nombre de la carpeta, tamaño en bytes)
+        """
+        dir_name = f"{key}.{time.time_ns()}"
+        entry_dir = os.path.join(self.cache_dir, dir_name)
+        tmp_dir = entry_dir + ".tmp"
+        os.makedirs(tmp_dir)
+        # Siempre en ns: es la unidad de los límites (Timestamp.value) con los que se compara
+        timestamps = frame.index.as_unit("ns").asi8 if len(frame) else np.empty(0, dtype=np.int64)
+        np.save(os.path.join(tmp_dir, "timestamp.npy"), timestamps)
+        for name in frame.columns:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), frame[name].to_numpy())
+        os.replace(tmp_dir, entry_dir)
+        return dir_name, sum(os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir))
+
+    def _to_frame(self, timestamps, columns, start=None, end=None):
+        """Recorta por fecha con búsqueda binaria sobre los timestamps mapeados."""
+        lo = np.searchsorted(timestamps, start.value, side="left") if start is not None else 0
+        hi = np.searchsorted(timestamps, end.value, side="right") if end is not None else len(timestamps)
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(timestamps[lo:hi]), unit="ns", utc=True), name="timestamp")
+        return pd.DataFrame({name: np.asarray(values[lo:hi]) for name, values in columns.items()}, index=index)
+
+    def _fetch(self, symbol, timeframe, start, end):
+        frames = list(self.client.iter_bars(
+            symbol, timeframe,
+            start.isoformat() if start is not None else None,
+            end.isoformat() if end is not None else None
+        ))
+        return pd.concat(frames) if frames else bars_to_frame([])
+
+    def _store(self, key, symbol, timeframe, frame, start, end):
+        dir_name, size = self._write(key, frame)
+        previous = self.index.get(key)
+        first = int(frame.index[0].value) if len(frame) else (start.value if start is not None else None)
+        last = int(frame.index[-1].value) if len(frame) else None
+        self.index[key] = {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "start": start.value if start is not None else first,
+            "end": end.value if end is not None else None,
+            "first": first,
+            "last": last,
+            "rows": len(frame),
+            "columns": list(frame.columns),
+            "bytes": size,
+            "fetched_at": time.time(),
+            "last_access": time.time(),
+            "dir": dir_name
+        }
+        self._save_index()
+        if previous is not None:
+            # Si sigue mapeada (Windows) queda para _purge_stale_dirs
+            shutil.rmtree(self._entry_dir(previous), ignore_errors=True)
+
+    def get_bars(self, symbol, timeframe="1Day", start=None, end=None):
+        """
+        Devuelve las barras de (symbol, timeframe) en [start, end] usando la caché.
+
+        Returns:
+            pd.DataFrame: Barras con índice datetime64 en UTC.
+        """
+        t0 = time.perf_counter()
+        start, end = _to_timestamp(start), _to_timestamp(end)
+        key = self._key(symbol, timeframe)
+        # El lock por clave evita descargas duplicadas del mismo símbolo entre
+        # sesiones; el lock global solo protege el índice, nunca una descarga.
+        with self._key_lock(key):
+            with self._lock:
+                entry = self.index.get(key)
+                if entry is not None and not os.path.isdir(self._entry_dir(entry)):
+                    entry = None
+                entry = dict(entry) if entry is not None else None
+
+            covers_start = entry is not None and (start is None or (entry["start"] is not None and start.value >= entry["start"]))
+            if not covers_start:
+                # Miss: se descarga el rango pedido completo
+                frame = self._fetch(symbol, timeframe, start, end)
+                with self._lock:
+                    self._store(key, symbol, timeframe, frame, start, end)
+                kind = "miss"
+            else:
+                if entry["end"] is None:
+                    # Entrada abierta: se refresca la cola solo si ha caducado
+                    stale = time.time() - entry["fetched_at"] > self.max_age
+                    needs_tail = stale and (end is None or entry["last"] is None or end.value > entry["last"])
+                else:
+                    needs_tail = end is None or end.value > entry["end"]
+                if needs_tail:
+                    # Hit parcial: se pide desde la última barra guardada (incluida), que
+                    # pudo guardarse en curso (la diaria de hoy, el minuto actual) y se sustituye
+                    tail_start = pd.Timestamp(entry["last"], tz="UTC") if entry["last"] is not None else start
+                    tail = self._fetch(symbol, timeframe, tail_start, end)
+                    if entry["last"] is not None:
+                        tail = tail[tail.index.as_unit("ns").asi8 >= entry["last"]]
+                    with self._lock:
+                        timestamps, columns = self._read(entry)
+                        cached = self._to_frame(timestamps, columns)
+                        if len(tail):
+                            cached = cached[cached.index.as_unit("ns").asi8 < tail.index.as_unit("ns").asi8[0]]
+                        merged = pd.concat([cached, tail]) if len(tail) else cached
+                        del timestamps, columns, cached
+                        self._store(key, symbol, timeframe, merged, pd.Timestamp(entry["start"], tz="UTC") if entry["start"] is not None else None, end)
+                    kind = "partial"
+                else:
+                    kind = "hit"
+
+            with self._lock:
+                entry = self.index[key]
+                entry["last_access"] = time.time()
+                timestamps, columns = self._read(entry)
+                result = self._to_frame(timestamps, columns, start, end)
+                evicted = self._evict(keep=key)
+                # En un hit solo cambia last_access: el índice se escribe como mucho cada pocos segundos
+                self._save_index(force=evicted > 0)
+                self.stats["hits" if kind == "hit" else "misses" if kind == "miss" else "partial"] += 1
+                self.stats["timings"][kind].append(time.perf_counter() - t0)
+        return result
+
+    def _evict(self, keep=None):
+        """Expulsa las entradas menos usadas recientemente hasta cumplir max_bytes. Devuelve cuántas."""
+        evicted = 0
+        total = sum(entry["bytes"] for entry in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_dir(entry), ignore_errors=True)
+            total -= entry["bytes"]
+            del self.index[key]
+            self.stats["evictions"] += 1
+            evicted += 1
+        return evicted
+
+    def invalidate(self, symbol=None, timeframe=None):
+        """Elimina de la caché las entradas que coincidan (todas si no se indica nada)."""
+        with self._lock:
+            for key, entry in list(self.index.items()):
+                if (symbol is None or entry["symbol"] == symbol) and (timeframe is None or entry["timeframe"] == timeframe):
+                    shutil.rmtree(self._entry_dir(entry), ignore_errors=True)
+                    del self.index[key]
+            self._save_index()
+
+    def size_bytes(self):
+        return sum(entry["bytes"] for entry in self.index.values())
+
+    def report(self):
+        """Resumen de aciertos y tiempos medios recientes en frío (miss) y en caliente (hit), en milisegundos."""
+        total = self.stats["hits"] + self.stats["partial"] + self.stats["misses"]
+        report = {
+            "requests": total,
+            "hit_rate": (self.stats["hits"] + self.stats["partial"]) / total if total else 0.0,
+            "evictions": self.stats["evictions"],
+            "bytes": self.size_bytes()
+        }
+        for kind, values in self.stats["timings"].items():
+            report[f"{kind}_ms"] = 1000 * float(np.mean(values)) if values else None
+        return report
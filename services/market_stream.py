@@ -0,0 +1,320 @@
+import json
+import time
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+import websockets
+
+from config import Config
+
+QUOTE_DTYPE = np.dtype([
+    ("t", "i8"), ("bid", "f8"), ("ask", "f8"), ("bid_size", "f8"), ("ask_size", "f8"), ("received", "i8")
+])
+BAR_DTYPE = np.dtype([
+    ("t", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"), ("volume", "f8"), ("received", "i8")
+])
+DEFAULT_CAPACITY = 4096
+# Segundos máximos esperando la respuesta a la autenticación
+AUTH_TIMEOUT = 10.0
+MAX_BACKOFF = 30.0
+
+
+class StreamAuthError(Exception):
+    """El servidor rechazó la autenticación del stream (credenciales, plan o límite de conexiones)."""
+
+
+class RingBuffer:
+    """Buffer circular de tamaño fijo sobre un array estructurado de NumPy."""
+
+    def __init__(self, dtype, capacity=DEFAULT_CAPACITY):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def append(self, row):
+        with self._lock:
+            self.data[self.count % self.capacity] = row
+            self.count += 1
+
+    def latest(self):
+        with self._lock:
+            return self.data[(self.count - 1) % self.capacity].copy() if self.count else None
+
+    def snapshot(self, n=None):
+        """Copia de los últimos n elementos en orden cronológico."""
+        with self._lock:
+            size = min(self.count, self.capacity)
+            n = size if n is None else min(n, size)
+            end = self.count % self.capacity
+            idx = np.arange(end - n, end) % self.capacity
+            return self.data[idx]
+
+
+def _parse_ts(value):
+    return pd.Timestamp(value).value if value else time.time_ns()
+
+
+class MarketStream:
+    """
+    Consumidor websocket único por proceso con buffers circulares por símbolo.
+
+    Un hilo en segundo plano ejecuta un bucle asyncio que mantiene la conexión
+    (reconectando con backoff) y escribe cada quote/bar en el buffer de su
+    símbolo. Las sesiones de Streamlit y los addons leen de esos buffers, sin
+    abrir conexiones propias. Cada símbolo lleva un contador de versión para
+    que la interfaz solo redibuje lo que ha cambiado.
+
+    Solo se da por conectado tras la confirmación "authenticated" del servidor;
+    los rechazos de autenticación y los mensajes "T": "error" quedan en status y
+    last_error. Las suscripciones llevan un contador de referencias: un símbolo
+    se da de baja en el servidor cuando lo suelta el último que lo pidió.
+    """
+
+    def __init__(self, url=None, api_key=None, api_secret=None, capacity=DEFAULT_CAPACITY):
+        self.url = url or Config.ALPACA_STREAM_URL
+        self.api_key = api_key or Config.ALPACA_API_KEY
+        self.api_secret = api_secret or Config.ALPACA_API_SECRET
+        self.capacity = capacity
+        self.quotes = {}
+        self.bars = {}
+        self.versions = {}
+        self.symbols = set()
+        self.listeners = []
+        self.connected = False
+        self.status = "detenido"
+        self.last_error = None
+        self.messages = 0
+        self._refs = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._ws = None
+        self._thread = None
+        self._stop = None
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._loop = asyncio.new_event_loop()
+            # El evento se crea antes de arrancar el hilo: stop() puede llamarse enseguida
+            self._stop = asyncio.Event()
+            self._thread = threading.Thread(target=self._run, name="market-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            thread, loop, stop = self._thread, self._loop, self._stop
+        if thread is None:
+            return
+        try:
+            loop.call_soon_threadsafe(stop.set)
+        except RuntimeError:
+            pass  # el bucle ya terminó y está cerrado
+        thread.join(timeout=5)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._consume_forever())
+        self._loop.close()
+
+    async def _consume_forever(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self.status = "conectando"
+                async with websockets.connect(self.url, max_queue=None) as ws:
+                    self._ws = ws
+                    self.status = "autenticando"
+                    await self._authenticate(ws)
+                    self.connected, backoff = True, 1.0
+                    self.status, self.last_error = "conectado", None
+                    with self._lock:
+                        symbols = sorted(self.symbols)
+                    if symbols:
+                        await self._send_subscription(symbols)
+                    stop_task = asyncio.ensure_future(self._stop.wait())
+                    try:
+                        while not self._stop.is_set():
+                            recv_task = asyncio.ensure_future(ws.recv())
+                            done, _ = await asyncio.wait({recv_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+                            if recv_task not in done:
+                                recv_task.cancel()
+                                break
+                            self._handle(recv_task.result())
+                    finally:
+                        stop_task.cancel()
+            except StreamAuthError as e:
+                self.status, self.last_error = "autenticación rechazada", str(e)
+                # Reintentar en seguida con las mismas credenciales no sirve de nada
+                backoff = MAX_BACKOFF
+            except Exception as e:
+                self.status, self.last_error = "desconectado", str(e) or type(e).__name__
+            finally:
+                self.connected, self._ws = False, None
+            if not self._stop.is_set():
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, MAX_BACKOFF)
+        self.status = "detenido"
+
+    async def _authenticate(self, ws):
+        """
+        Envía las credenciales y espera la confirmación del servidor.
+
+        Raises:
+            StreamAuthError: Si el servidor responde con "T": "error".
+            asyncio.TimeoutError: Si no hay respuesta en AUTH_TIMEOUT segundos.
+        """
+        await ws.send(json.dumps({"action": "auth", "key": self.api_key, "secret": self.api_secret}))
+        deadline = time.monotonic() + AUTH_TIMEOUT
+        while True:
+            raw = await asyncio.wait_for(ws.recv(), timeout=max(deadline - time.monotonic(), 0.0))
+            messages = json.loads(raw)
+            for msg in messages if isinstance(messages, list) else [messages]:
+                if msg.get("T") == "error":
+                    raise StreamAuthError(f"{msg.get('code')}: {msg.get('msg')}")
+                if msg.get("T") == "success" and msg.get("msg") == "authenticated":
+                    return
+
+    async def _send_subscription(self, symbols, action="subscribe"):
+        if self._ws is not None:
+            await self._ws.send(json.dumps({"action": action, "quotes": symbols, "bars": symbols}))
+
+    # --- Suscripciones ---
+
+    def subscribe(self, symbols):
+        """Añade una referencia a cada símbolo y suscribe los nuevos (seguro desde cualquier hilo)."""
+        new = []
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                self._refs[symbol] = self._refs.get(symbol, 0) + 1
+                if self._refs[symbol] == 1:
+                    new.append(symbol)
+            self.symbols.update(new)
+        if new and self._loop is not None and self.connected:
+            asyncio.run_coroutine_threadsafe(self._send_subscription(new), self._loop)
+
+    def unsubscribe(self, symbols):
+        """Suelta una referencia a cada símbolo; los que se quedan sin ninguna se dan de baja."""
+        removed = []
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                count = self._refs.get(symbol, 0)
+                if count > 1:
+                    self._refs[symbol] = count - 1
+                elif count == 1:
+                    del self._refs[symbol]
+                    removed.append(symbol)
+            self.symbols.difference_update(removed)
+        if removed and self._loop is not None and self.connected:
+            asyncio.run_coroutine_threadsafe(self._send_subscription(removed, "unsubscribe"), self._loop)
+
+    def add_listener(self, callback):
+        """Registra callback(tipo, símbolo, fila) llamado en el hilo del stream por cada mensaje."""
+        self.listeners.append(callback)
+
+    # --- Mensajes ---
+
+    def _handle(self, raw):
+        received = time.time_ns()
+        messages = json.loads(raw)
+        if isinstance(messages, dict):
+            messages = [messages]
+        for msg in messages:
+            kind, symbol = msg.get("T"), msg.get("S")
+            if kind == "q":
+                row = (_parse_ts(msg.get("t")), msg.get("bp", np.nan), msg.get("ap", np.nan),
+                       msg.get("bs", np.nan), msg.get("as", np.nan), received)
+                buffers, dtype = self.quotes, QUOTE_DTYPE
+            elif kind == "b":
+                row = (_parse_ts(msg.get("t")), msg.get("o", np.nan), msg.get("h", np.nan), msg.get("l", np.nan),
+                       msg.get("c", np.nan), msg.get("v", np.nan), received)
+                buffers, dtype = self.bars, BAR_DTYPE
+            elif kind == "error":
+                # P. ej. 405 (límite de símbolos) o 406 (límite de conexiones)
+                self.last_error = f"{msg.get('code')}: {msg.get('msg')}"
+                continue
+            else:
+                continue
+            buffer = buffers.get(symbol)
+            if buffer is None:
+                buffer = buffers[symbol] = RingBuffer(dtype, self.capacity)
+            buffer.append(row)
+            self.versions[symbol] = self.versions.get(symbol, 0) + 1
+            self.messages += 1
+            for callback in self.listeners:
+                callback(kind, symbol, msg)
+
+    # --- Lectura ---
+
+    def version(self, symbol):
+        return self.versions.get(symbol, 0)
+
+    def latest_quote(self, symbol):
+        buffer = self.quotes.get(symbol)
+        return buffer.latest() if buffer is not None else None
+
+    def recent_bars(self, symbol, n=None):
+        """Últimas barras recibidas de un símbolo como DataFrame."""
+        buffer = self.bars.get(symbol)
+        if buffer is None:
+            return pd.DataFrame(columns=list(BAR_DTYPE.names[1:-1]))
+        data = buffer.snapshot(n)
+        index = pd.DatetimeIndex(pd.to_datetime(data["t"], utc=True), name="timestamp")
+        return pd.DataFrame({name: data[name] for name in BAR_DTYPE.names[1:-1]}, index=index)
+
+    def quotes_table(self, symbols):
+        """Tabla con el último quote de cada símbolo."""
+        rows = []
+        for symbol in symbols:
+            quote = self.latest_quote(symbol)
+            if quote is None:
+                continue
+            rows.append({
+                "symbol": symbol,
+                "bid": quote["bid"],
+                "ask": quote["ask"],
+                "bid_size": quote["bid_size"],
+                "ask_size": quote["ask_size"],
+                "time": pd.Timestamp(int(quote["t"]), tz="UTC")
+            })
+        return pd.DataFrame(rows)
+
+
+_STREAM = None
+_STREAM_LOCK = threading.Lock()
+
+
+def release_session_symbols(state):
+    """
+    Suelta las referencias de una sesión (state["live_subscribed"]) en el stream.
+
+    Se llama cuando la sesión sale de "Mercado en Vivo" y cuando
+    SessionRegistry.sweep olvida una sesión desconectada. No arranca el stream
+    si aún no existe.
+    """
+    if "live_subscribed" not in state:
+        return
+    held = state["live_subscribed"]
+    del state["live_subscribed"]
+    with _STREAM_LOCK:
+        stream = _STREAM
+    if stream is not None and held:
+        stream.unsubscribe(held)
+
+
+def get_market_stream():
+    """Stream único para todo el proceso; se arranca la primera vez que se pide."""
+    global _STREAM
+    with _STREAM_LOCK:
+        if _STREAM is None:
+            _STREAM = MarketStream().start()
+        return _STREAM
@@ -0,0 +1,193 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# Estados en los que una orden ya no puede cambiar
+FINAL_STATUSES = {"filled", "canceled", "expired", "rejected", "replaced", "done_for_day"}
+ORDER_BOOK_COLUMNS = ["client_order_id", "symbol", "side", "qty", "type", "status", "filled_qty",
+                      "filled_avg_price", "queue_ms", "latency_ms", "error"]
+
+
+def new_client_order_id(prefix="dbt"):
+    return f"{prefix}-{uuid.uuid4().hex[:20]}"
+
+
+class OrderManager:
+    """
+    Envío concurrente de órdenes con libro de órdenes local.
+
+    - Las órdenes de un lote se envían en paralelo desde un pool de hilos que
+      comparte la sesión HTTP (y su pool de conexiones) del cliente.
+    - Todas las peticiones pasan por el RateLimiter del cliente, el mismo que
+      usan AccountService y la caché de barras.
+    - Cada orden lleva un client_order_id: si ya está en el libro no se vuelve
+      a enviar, y si el envío falla sin respuesta clara se consulta por ese id
+      antes de darla por perdida.
+    - El libro se actualiza con poll() (o con apply_update() desde un stream de
+      trade_updates) y guarda, por separado, la espera en el rate limiter y la
+      latencia envío-confirmación de cada orden.
+    - En la app, poll() lo ejecuta el hilo de AccountService (ver
+      get_order_manager); la interfaz solo lee el libro de memoria.
+    """
+
+    def __init__(self, client=None, max_workers=8):
+        if client is None:
+            from services.shared_resources import get_alpaca_client
+            client = get_alpaca_client()
+        self.client = client
+        self.max_workers = max_workers
+        self.limiter = client.limiter
+        self.book = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="orders")
+
+    def _record(self, client_order_id, **fields):
+        with self._lock:
+            entry = self.book.setdefault(client_order_id, {"client_order_id": client_order_id})
+            entry.update(fields)
+            self.version += 1
+            return dict(entry)
+
+    # --- Envío ---
+
+    def submit(self, symbol, qty, side, type="market", time_in_force="day", limit_price=None, client_order_id=None):
+        """
+        Envía una orden y la registra en el libro.
+
+        Returns:
+            dict: Entrada del libro (con "error" si el broker la rechazó).
+        """
+        client_order_id = client_order_id or new_client_order_id()
+        with self._lock:
+            existing = self.book.get(client_order_id)
+            if existing is not None and existing.get("id"):
+                # Idempotencia: ya confirmada, no se reenvía
+                return dict(existing)
+        self._record(client_order_id, symbol=symbol, qty=float(qty), side=side, type=type,
+                     status="pending_submit", error=None)
+
+        # La espera en el rate limiter se mide aparte: en un lote grande domina y
+        # ocultaría la latencia real del broker
+        queued = time.perf_counter()
+        response = self.client.submit_order(symbol, qty, side, type=type, time_in_force=time_in_force,
+                                            limit_price=limit_price, client_order_id=client_order_id)
+        queue_ms = self.client.last_rate_wait() * 1000
+        latency_ms = (time.perf_counter() - queued) * 1000 - queue_ms
+        if "error" in response and response.get("status") in (None, 422, 500, 502, 503, 504):
+            # La orden pudo llegar al broker aunque la respuesta fallase (o el
+            # reintento chocó con el id duplicado): se comprueba por client_order_id
+            found = self.client.get_order_by_client_id(client_order_id)
+            if "error" not in found:
+                response = found
+        if "error" in response:
+            return self._record(client_order_id, status="error", error=response["error"],
+                                queue_ms=queue_ms, latency_ms=latency_ms)
+        return self._record(client_order_id, queue_ms=queue_ms, latency_ms=latency_ms, **self._order_fields(response))
+
+    def submit_batch(self, orders):
+        """
+        Envía una lista de órdenes en paralelo.
+
+        Args:
+            orders (list): Diccionarios con los argumentos de submit().
+
+        Returns:
+            list: Entradas del libro en el mismo orden que orders.
+        """
+        orders = [dict(order, client_order_id=order.get("client_order_id") or new_client_order_id())
+                  for order in orders]
+        futures = [self._pool.submit(self.submit, **order) for order in orders]
+        return [future.result() for future in futures]
+
+    def cancel(self, client_order_id):
+        with self._lock:
+            order_id = self.book.get(client_order_id, {}).get("id")
+        if not order_id:
+            return {"error": f"Orden {client_order_id} sin confirmar"}
+        return self.client.cancel_order(order_id)
+
+    # --- Seguimiento ---
+
+    @staticmethod
+    def _order_fields(order):
+        return {
+            "id": order.get("id"),
+            "status": order.get("status"),
+            "filled_qty": float(order.get("filled_qty") or 0),
+            "filled_avg_price": float(order["filled_avg_price"]) if order.get("filled_avg_price") else np.nan,
+        }
+
+    def apply_update(self, order):
+        """Aplica una orden recibida del broker (polling o stream) al libro local."""
+        client_order_id = order.get("client_order_id")
+        with self._lock:
+            known = client_order_id in self.book
+        if known:
+            self._record(client_order_id, **self._order_fields(order))
+
+    def poll(self):
+        """Actualiza las órdenes no finalizadas del libro con una sola consulta al broker."""
+        with self._lock:
+            pending = any(e.get("id") and e.get("status") not in FINAL_STATUSES for e in self.book.values())
+        if not pending:
+            return 0
+        orders = self.client.get_orders(status="all")
+        if isinstance(orders, dict) and "error" in orders:
+            return 0
+        for order in orders:
+            self.apply_update(order)
+        return len(orders)
+
+    # --- Consulta ---
+
+    def order_book(self):
+        with self._lock:
+            rows = [dict(entry) for entry in self.book.values()]
+        return pd.DataFrame(rows).reindex(columns=ORDER_BOOK_COLUMNS)
+
+    def latency_stats(self):
+        """
+        Percentiles de la latencia envío-confirmación (ms) de las órdenes confirmadas.
+
+        queue_p50/queue_p95 son la espera previa en el rate limiter, que no se
+        incluye en la latencia.
+        """
+        with self._lock:
+            confirmed = [e for e in self.book.values() if e.get("id") and "latency_ms" in e]
+            latencies = np.array([e["latency_ms"] for e in confirmed])
+            queued = np.array([e.get("queue_ms", 0.0) for e in confirmed])
+        if not len(latencies):
+            return {}
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        queue_p50, queue_p95 = np.percentile(queued, [50, 95])
+        return {"count": len(latencies), "p50": p50, "p95": p95, "p99": p99, "max": latencies.max(),
+                "queue_p50": queue_p50, "queue_p95": queue_p95}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_order_manager():
+    """
+    Gestor de órdenes único para todo el proceso.
+
+    Su poll() se engancha al hilo de AccountService, así que el libro se
+    actualiza una vez por intervalo para todo el proceso y no por sesión.
+    """
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            from services.account_service import get_account_service
+            _MANAGER = OrderManager()
+            get_account_service().subscribe(_MANAGER.poll)
+        return _MANAGER
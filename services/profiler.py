@@ -0,0 +1,165 @@
+"""
+Instrumentación ligera de rendimiento.
+
+- span(nombre): context manager que mide un tramo. Con la instrumentación
+  desactivada devuelve un contexto vacío compartido, sin llamar al reloj.
+- timed(nombre): decorador equivalente para funciones.
+- begin_rerun()/end_rerun(): agrupan los tramos de cada rerun del script
+  (por hilo, que en Streamlit es por sesión) para ver su desglose.
+- start_profile()/stop_profile(): captura con pyinstrument (si está
+  instalado) o cProfile de un rerun completo.
+
+Solo usa la biblioteca estándar para que importarlo no encarezca el arranque.
+"""
+import io
+import time
+import functools
+import threading
+import contextlib
+from collections import deque
+
+from config import Config
+
+MAX_SAMPLES = 500
+MAX_RERUNS = 20
+
+_enabled = Config.PERF_TRACING
+_samples = {}
+_reruns = deque(maxlen=MAX_RERUNS)
+_lock = threading.Lock()
+_local = threading.local()
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(value):
+    """Activa o desactiva la instrumentación para todo el proceso."""
+    global _enabled
+    _enabled = bool(value)
+
+
+def _record(name, start, elapsed):
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=MAX_SAMPLES)
+        samples.append(elapsed)
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace["spans"].append((name, start - trace["start"], elapsed, _local.depth))
+
+
+@contextlib.contextmanager
+def _span(name):
+    _local.depth = getattr(_local, "depth", 0) + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.depth -= 1
+        _record(name, start, elapsed)
+
+
+def span(name):
+    """Mide el bloque `with span("nombre"):`; no hace nada si la instrumentación está desactivada."""
+    return _span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name=None):
+    """Decorador que mide cada llamada a la función bajo `name` (por defecto, su nombre cualificado)."""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin_rerun():
+    """Empieza a agrupar los tramos del rerun actual de este hilo."""
+    _local.depth = 0
+    _local.trace = {"start": time.perf_counter(), "wall": time.time(), "spans": []} if _enabled else None
+
+
+def end_rerun(label):
+    """Cierra el rerun actual (etiquetado con el módulo mostrado) y lo guarda entre los recientes."""
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    if trace is None:
+        return None
+    trace["label"] = label
+    trace["total"] = time.perf_counter() - trace["start"]
+    _record("rerun", trace["start"], trace["total"])
+    with _lock:
+        _reruns.append(trace)
+    return trace
+
+
+def _percentile(ordered, q):
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def get_stats():
+    """Resumen por tramo de las últimas MAX_SAMPLES medidas (tiempos en ms)."""
+    with _lock:
+        snapshot = {name: sorted(samples) for name, samples in _samples.items()}
+    return [
+        {
+            "span": name,
+            "count": len(ordered),
+            "p50_ms": _percentile(ordered, 0.50) * 1000,
+            "p95_ms": _percentile(ordered, 0.95) * 1000,
+            "max_ms": ordered[-1] * 1000,
+            "total_ms": sum(ordered) * 1000,
+        }
+        for name, ordered in sorted(snapshot.items()) if ordered
+    ]
+
+
+def get_recent_reruns():
+    """Reruns recientes (del más nuevo al más antiguo) con sus tramos."""
+    with _lock:
+        return list(reversed(_reruns))
+
+
+def reset_stats():
+    with _lock:
+        _samples.clear()
+        _reruns.clear()
+
+
+# --- Perfilado de un rerun completo ---
+
+def start_profile():
+    """Arranca un perfilador (pyinstrument si está disponible, si no cProfile)."""
+    try:
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+    except ImportError:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler, limit=40):
+    """Detiene el perfilador y devuelve el informe en texto."""
+    if hasattr(profiler, "output_text"):
+        profiler.stop()
+        return profiler.output_text(unicode=True, color=False)
+    import pstats
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,224 @@
+"""
+Screener sobre todo el universo de símbolos con una tabla de features precalculada.
+
+- build_feature_table(): trabajo batch (nocturno o bajo demanda) que descarga
+  barras diarias con el endpoint multi-símbolo, calcula las features de todos
+  los símbolos a la vez sobre matrices fecha x símbolo y las guarda en disco.
+- FeatureTable: abre la tabla con memoria mapeada y filtra/ordena el universo
+  entero con predicados vectorizados, sin llamar a la API.
+
+Estructura en disco (cada feature es una matriz float32 [fechas, símbolos], con
+las filas contiguas para que leer una fecha sea un único bloque):
+    cache/screener/
+        meta.json      (símbolos, features, fecha de cálculo)
+        dates.npy      (int64, ns UTC)
+        ret_1d.npy
+        ...
+
+Uso desde cron:
+    python -m services.screener --start 2023-01-01
+"""
+import json
+import operator
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.indicators import sma, ema, rsi
+
+DEFAULT_TABLE_DIR = os.path.join("cache", "screener")
+SYMBOLS_PER_REQUEST = 200
+FEATURES = ["close", "ret_1d", "ret_5d", "ret_20d", "vol_20d", "gap", "volume_z", "dollar_volume",
+            "rsi_14", "above_sma_50", "macd_bullish"]
+OPERATORS = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne,
+}
+
+
+def compute_features(open_, high, low, close, volume):
+    """
+    Calcula las features diarias de todos los símbolos a la vez.
+
+    Args:
+        open_, high, low, close, volume (pd.DataFrame): Matrices fecha x símbolo.
+
+    Returns:
+        dict: {feature: pd.DataFrame fecha x símbolo}
+    """
+    returns = close.pct_change(fill_method=None)
+    volume_mean = volume.rolling(20, min_periods=10).mean()
+    volume_std = volume.rolling(20, min_periods=10).std()
+    # Los indicadores batch operan columna a columna, así que sirven para la matriz entera
+    macd_line = ema(close, 12) - ema(close, 26)
+    macd_signal = ema(macd_line, 9)
+    return {
+        "close": close,
+        "ret_1d": returns,
+        "ret_5d": close.pct_change(5, fill_method=None),
+        "ret_20d": close.pct_change(20, fill_method=None),
+        "vol_20d": returns.rolling(20, min_periods=10).std() * np.sqrt(252),
+        "gap": open_ / close.shift(1) - 1,
+        "volume_z": (volume - volume_mean) / volume_std.replace(0, np.nan),
+        "dollar_volume": close * volume,
+        "rsi_14": rsi(close, 14),
+        "above_sma_50": (close > sma(close, 50)).astype(np.float32).where(close.notna()),
+        "macd_bullish": (macd_line > macd_signal).astype(np.float32).where(close.notna()),
+    }
+
+
+def _write_table(table_dir, dates, symbols, features):
+    """
+    Escribe la tabla en una carpeta temporal y la sustituye con un renombrado.
+
+    dates son enteros en ns (FeatureTable los lee tal cual).
+    """
+    tmp_dir = f"{table_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "dates.npy"), dates)
+    for name, frame in features.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(frame.to_numpy(dtype=np.float32)))
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"symbols": list(symbols), "features": list(features), "built_at": time.time()}, f)
+    old_dir = f"{table_dir}.old-{os.getpid()}"
+    if os.path.exists(table_dir):
+        os.rename(table_dir, old_dir)
+    os.rename(tmp_dir, table_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def build_feature_table(symbols=None, start=None, client=None, table_dir=DEFAULT_TABLE_DIR,
+                        symbols_per_request=SYMBOLS_PER_REQUEST, progress_callback=None):
+    """
+    Descarga barras diarias del universo y guarda la tabla de features.
+
+    Args:
+        symbols (list): Universo; por defecto, todos los activos negociables de Alpaca.
+        start (str): Fecha inicial del histórico (al menos ~60 sesiones para las ventanas).
+        progress_callback (callable): Recibe la fracción completada (0-1).
+
+    Returns:
+        dict: Metadatos de la tabla (símbolos, fechas, segundos empleados).
+    """
+    t0 = time.perf_counter()
+    if client is None:
+        from services.shared_resources import get_alpaca_client
+        client = get_alpaca_client()
+    if symbols is None:
+        assets = client.get_assets()
+        if isinstance(assets, dict) and "error" in assets:
+            raise RuntimeError(f"Error al obtener el universo: {assets['error']}")
+        symbols = sorted(a["symbol"] for a in assets if a.get("tradable"))
+    start = start or (pd.Timestamp.today(tz="UTC") - pd.Timedelta(days=180)).strftime("%Y-%m-%d")
+
+    # {campo: {símbolo: Series}}; el endpoint multi-símbolo devuelve varias páginas por lote
+    columns = {name: {} for name in ("open", "high", "low", "close", "volume")}
+    batches = [symbols[i:i + symbols_per_request] for i in range(0, len(symbols), symbols_per_request)]
+    for done, batch in enumerate(batches, start=1):
+        parts = {}
+        for page in client.iter_bars_multi(batch, "1Day", start=start):
+            for symbol, frame in page.items():
+                parts.setdefault(symbol, []).append(frame)
+        for symbol, frames in parts.items():
+            frame = pd.concat(frames) if len(frames) > 1 else frames[0]
+            for name in columns:
+                columns[name][symbol] = frame[name]
+        if progress_callback:
+            progress_callback(done / len(batches))
+
+    fetched = sorted(columns["close"])
+    if not fetched:
+        raise RuntimeError("No se descargaron barras para ningún símbolo.")
+    wide = {
+        name: pd.DataFrame(series).reindex(columns=fetched).sort_index().astype(np.float64)
+        for name, series in columns.items()
+    }
+    # Todas las matrices comparten el mismo eje de fechas (unión de sesiones)
+    dates = wide["close"].index
+    wide = {name: frame.reindex(dates) for name, frame in wide.items()}
+    features = compute_features(wide["open"], wide["high"], wide["low"], wide["close"], wide["volume"])
+    # pandas 3 puede inferir us o s: el eje de fechas se guarda siempre en ns
+    _write_table(table_dir, dates.as_unit("ns").asi8, fetched, features)
+    return {"symbols": len(fetched), "dates": len(dates), "seconds": time.perf_counter() - t0}
+
+
+class FeatureTable:
+    """Tabla de features abierta con memoria mapeada; las consultas no copian la matriz completa."""
+
+    def __init__(self, table_dir=DEFAULT_TABLE_DIR):
+        with open(os.path.join(table_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.table_dir = table_dir
+        self.symbols = np.array(meta["symbols"])
+        self.features = meta["features"]
+        self.built_at = meta["built_at"]
+        self.dates = np.load(os.path.join(table_dir, "dates.npy"))
+        self.columns = {name: np.load(os.path.join(table_dir, f"{name}.npy"), mmap_mode="r") for name in self.features}
+        self._symbol_pos = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @staticmethod
+    def version(table_dir=DEFAULT_TABLE_DIR):
+        """Marca de versión de la tabla en disco (para invalidar cachés), o None si no existe."""
+        try:
+            return os.stat(os.path.join(table_dir, "meta.json")).st_mtime_ns
+        except OSError:
+            return None
+
+    def _row(self, date=None):
+        if date is None:
+            return len(self.dates) - 1
+        date = pd.Timestamp(date)
+        date = date.tz_localize("UTC") if date.tz is None else date.tz_convert("UTC")
+        return max(0, int(np.searchsorted(self.dates, date.value, side="right")) - 1)
+
+    def snapshot(self, date=None, features=None):
+        """Features de todos los símbolos en una fecha (por defecto, la última) como arrays."""
+        row = self._row(date)
+        return {name: np.asarray(self.columns[name][row]) for name in (features or self.features)}
+
+    def screen(self, filters=(), sort_by=None, ascending=False, limit=100, date=None, columns=None):
+        """
+        Filtra y ordena el universo con predicados vectorizados.
+
+        Args:
+            filters (list): Tuplas (feature, operador, valor), p. ej. ("rsi_14", "<", 30).
+            sort_by (str): Feature por la que ordenar.
+            limit (int): Máximo de filas devueltas.
+
+        Returns:
+            pd.DataFrame: Una fila por símbolo que cumple todos los filtros.
+        """
+        needed = set(columns or self.features) | {f[0] for f in filters} | ({sort_by} if sort_by else set())
+        data = self.snapshot(date, [name for name in self.features if name in needed])
+        mask = np.isfinite(data["close"]) if "close" in data else np.ones(len(self.symbols), dtype=bool)
+        for feature, op, value in filters:
+            with np.errstate(invalid="ignore"):
+                mask &= OPERATORS[op](data[feature], value)
+        idx = np.flatnonzero(mask)
+        if sort_by:
+            values = data[sort_by][idx]
+            # NaN al final en ambos sentidos
+            order = np.argsort(np.where(np.isnan(values), np.inf, values if ascending else -values), kind="stable")
+            idx = idx[order]
+        idx = idx[:limit]
+        result = pd.DataFrame({name: data[name][idx] for name in (columns or self.features)})
+        result.insert(0, "symbol", self.symbols[idx])
+        return result
+
+    def history(self, symbol, feature):
+        """Serie temporal de una feature para un símbolo."""
+        col = self._symbol_pos[symbol]
+        index = pd.DatetimeIndex(pd.to_datetime(self.dates, unit="ns", utc=True), name="timestamp")
+        return pd.Series(np.asarray(self.columns[feature][:, col]), index=index, name=feature)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Calcula la tabla de features del screener.")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--symbols", nargs="*", default=None)
+    args = parser.parse_args()
+    print(build_feature_table(args.symbols, args.start, progress_callback=lambda f: print(f"{f:.0%}")))
@@ -0,0 +1,157 @@
+"""
+Recursos compartidos por todas las sesiones del servidor.
+
+Con varios usuarios conectados al mismo proceso de Streamlit, todo lo que no
+depende de la sesión se crea una sola vez con st.cache_resource: el cliente
+de Alpaca (y su pool de conexiones) y la caché de barras en disco. Cada
+objeto es seguro entre hilos por sí mismo (locks propios), de modo que las
+sesiones lo usan en paralelo sin copias. El índice de addons
+(addons_manager.scan_addons) y el registro de datasets
+(dataset_store.get_dataset_store) ya son únicos por proceso.
+
+Además, SessionRegistry lleva la cuenta de la memoria de cada sesión y vacía
+las cachés de las sesiones inactivas: las claves de EVICTABLE_SESSION_KEYS y
+cualquier otra que mida al menos EVICT_MIN_BYTES, salvo las de estado de
+navegación (PERSISTENT_SESSION_KEYS).
+"""
+import sys
+import threading
+import time
+
+import streamlit as st
+
+from config import Config
+
+# Claves de session_state que son cachés reconstruibles (se vacían al expulsar una sesión)
+EVICTABLE_SESSION_KEYS = ("live_quotes_cache", "account_cache", "last_profile", "trade_analysis_cache")
+# Estado ligero que no se toca aunque la sesión esté inactiva (navegación, selección de datasets)
+PERSISTENT_SESSION_KEYS = frozenset({
+    "module", "datasets", "active_dataset", "dataset_file_hashes", "show_create_form", "imported_zip_id",
+    "live_symbols", "live_subscribed", "refresh_intervals", "profile_next_rerun",
+})
+# Cualquier otra clave que mida al menos esto se trata como caché y se expulsa
+EVICT_MIN_BYTES = 1024 * 1024
+
+
+@st.cache_resource
+def get_alpaca_client():
+    """Cliente de Alpaca único: todas las sesiones comparten sesión HTTP y pool de conexiones."""
+    from services.alpaca_integration import AlpacaIntegration
+    return AlpacaIntegration(pool_size=Config.ALPACA_POOL_SIZE)
+
+
+@st.cache_resource
+def get_market_data_cache():
+    """Caché de barras en disco única, con lock por símbolo para no duplicar descargas."""
+    from services.market_data_cache import MarketDataCache
+    return MarketDataCache(client=get_alpaca_client())
+
+
+# --- Contabilidad de memoria por sesión ---
+
+def estimate_bytes(value, depth=2):
+    """Estimación barata del tamaño de un valor de session_state (DataFrames, arrays y contenedores)."""
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    size = sys.getsizeof(value)
+    if depth and isinstance(value, dict):
+        size += sum(estimate_bytes(v, depth - 1) for v in value.values())
+    elif depth and isinstance(value, (list, tuple, set)):
+        size += sum(estimate_bytes(v, depth - 1) for v in value)
+    return size
+
+
+def _current_session():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return (ctx.session_id, ctx.session_state) if ctx is not None else (None, None)
+
+
+def _is_active(session_id):
+    from streamlit import runtime
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+
+class SessionRegistry:
+    """
+    Registro de sesiones del proceso con su memoria estimada y su última actividad.
+
+    touch() se llama en cada rerun. sweep() expulsa las cachés de las sesiones
+    que llevan más de idle_seconds sin actividad (las claves conocidas y las que
+    pesaban al menos EVICT_MIN_BYTES en su último rerun) y olvida las desconectadas,
+    soltando antes sus suscripciones al stream de mercado.
+    """
+
+    def __init__(self, idle_seconds=None):
+        self.idle_seconds = idle_seconds or Config.SESSION_IDLE_SECONDS
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self.evictions = 0
+
+    def touch(self, module=None):
+        session_id, state = _current_session()
+        if session_id is None:
+            return
+        keys = list(state.filtered_state.items())
+        by_key = {key: estimate_bytes(value) for key, value in keys}
+        with self._lock:
+            self._sessions[session_id] = {
+                "state": state,
+                "module": module,
+                "last_seen": time.time(),
+                "bytes": sum(by_key.values()),
+                "by_key": by_key,
+                "evicted": False,
+            }
+
+    def sweep(self, min_interval=30.0):
+        """Vacía las cachés de las sesiones inactivas (como mucho cada min_interval s). Devuelve cuántas se han expulsado."""
+        now = time.time()
+        evicted = 0
+        with self._lock:
+            if now - self._last_sweep < min_interval:
+                return 0
+            self._last_sweep = now
+            for session_id, info in list(self._sessions.items()):
+                if not _is_active(session_id):
+                    # Una sesión desconectada no volverá a soltar sus símbolos del stream
+                    from services.market_stream import release_session_symbols
+                    release_session_symbols(info["state"])
+                    del self._sessions[session_id]
+                    continue
+                if info["evicted"] or now - info["last_seen"] < self.idle_seconds:
+                    continue
+                state = info["state"]
+                heavy = [key for key, size in info["by_key"].items()
+                         if size >= EVICT_MIN_BYTES and key not in PERSISTENT_SESSION_KEYS]
+                for key in dict.fromkeys((*EVICTABLE_SESSION_KEYS, *heavy)):
+                    if key in state:
+                        del state[key]
+                info.update(evicted=True, bytes=0, by_key={})
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    def report(self):
+        """Una fila por sesión: id abreviado, módulo, segundos inactiva y memoria estimada."""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "session": session_id[:8],
+                    "module": info["module"],
+                    "idle_s": round(now - info["last_seen"], 1),
+                    "mb": info["bytes"] / 1e6,
+                    "top_key": max(info["by_key"], key=info["by_key"].get) if info["by_key"] else None,
+                    "evicted": info["evicted"],
+                }
+                for session_id, info in self._sessions.items()
+            ]
+
+
+@st.cache_resource
+def get_session_registry():
+    return SessionRegistry()
@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+NS_PER_SECOND = 1_000_000_000
+
+
+def side_sign(side):
+    """
+    Convierte la columna de lado (buy/sell, B/S, compra/venta...) en +1/-1.
+
+    Con columnas categóricas solo se evalúan las categorías, no cada fila.
+    """
+    side = pd.Series(side)
+    if not isinstance(side.dtype, pd.CategoricalDtype):
+        side = side.astype("category")
+    categories = side.cat.categories.astype(str).str.strip().str.lower()
+    signs = np.where(categories.str.startswith(("b", "c", "long")), 1, np.where(categories.str.startswith(("s", "v", "short")), -1, 0))
+    codes = side.cat.codes.to_numpy()
+    return np.where(codes >= 0, signs[codes], 0).astype(np.int8)
+
+
+def _group_starts(codes):
+    """Índices donde empieza cada grupo en un array ordenado de códigos."""
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+
+def fifo_match(symbol_codes, timestamps, signed_qty, prices):
+    """
+    Empareja compras y ventas por FIFO para todos los símbolos a la vez.
+
+    La unidad k-ésima comprada de un símbolo se empareja con la unidad k-ésima
+    vendida, lo que equivale a FIFO tanto para largos como para cortos (incluido
+    el cambio de lado). Se calcula con sumas acumuladas y búsquedas binarias sobre
+    los extremos de cada lote, sin recorrer las filas en Python.
+
+    Los arrays deben venir ordenados por (símbolo, timestamp).
+
+    Returns:
+        dict: Segmentos emparejados ("buy_row", "sell_row", "close_row", "qty",
+            "pnl", "holding_ns") y "open_qty" por símbolo.
+    """
+    n = len(signed_qty)
+    buy_qty = np.maximum(signed_qty, 0.0)
+    sell_qty = np.maximum(-signed_qty, 0.0)
+
+    starts = _group_starts(symbol_codes) if n else np.empty(0, dtype=np.int64)
+    group_id = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+
+    # Cantidad acumulada dentro de cada símbolo
+    buy_cum = np.cumsum(buy_qty)
+    sell_cum = np.cumsum(sell_qty)
+    buy_base = np.r_[0.0, buy_cum][starts]
+    sell_base = np.r_[0.0, sell_cum][starts]
+    buy_total = np.add.reduceat(buy_qty, starts) if n else np.empty(0)
+    sell_total = np.add.reduceat(sell_qty, starts) if n else np.empty(0)
+
+    # Cada símbolo ocupa un tramo propio del eje de unidades para no mezclar símbolos
+    span = np.maximum(buy_total, sell_total)
+    offset = np.cumsum(span) - span
+    matched = np.minimum(buy_total, sell_total)
+
+    is_buy = buy_qty > 0
+    is_sell = sell_qty > 0
+    buy_rows = np.flatnonzero(is_buy)
+    sell_rows = np.flatnonzero(is_sell)
+    buy_ends = buy_cum[buy_rows] + (offset - buy_base)[group_id[buy_rows]]
+    sell_ends = sell_cum[sell_rows] + (offset - sell_base)[group_id[sell_rows]]
+
+    # Todos los extremos son tramos ya ordenados: una ordenación estable (timsort) los fusiona
+    # y las sumas acumuladas por tipo de extremo sustituyen a las búsquedas binarias
+    points = np.concatenate([buy_ends, sell_ends, offset, offset + matched])
+    kinds = np.repeat(np.arange(4, dtype=np.int8), [len(buy_ends), len(sell_ends), len(offset), len(offset)])
+    perm = np.argsort(points, kind="stable")
+    points, kinds = points[perm], kinds[perm]
+    # Para cada valor distinto, cuántos extremos de cada tipo son <= que él (side="right")
+    last = np.r_[points[1:] != points[:-1], True] if len(points) else np.empty(0, dtype=bool)
+    breaks = points[last]
+    buy_before = np.cumsum(kinds == 0)[last][:-1]
+    sell_before = np.cumsum(kinds == 1)[last][:-1]
+    seg_group = np.cumsum(kinds == 2)[last][:-1] - 1
+    seg_start = breaks[:-1]
+    seg_len = np.diff(breaks)
+    valid = (seg_len > 0) & (seg_group >= 0)
+    valid &= seg_start < (offset + matched)[np.clip(seg_group, 0, None)]
+    seg_start, seg_len = seg_start[valid], seg_len[valid]
+
+    buy_row = buy_rows[buy_before[valid]]
+    sell_row = sell_rows[sell_before[valid]]
+    # La operación que cierra el segmento es la posterior de las dos
+    close_row = np.where(timestamps[buy_row] > timestamps[sell_row], buy_row, sell_row)
+
+    return {
+        "buy_row": buy_row,
+        "sell_row": sell_row,
+        "close_row": close_row,
+        "qty": seg_len,
+        "pnl": seg_len * (prices[sell_row] - prices[buy_row]),
+        "holding_ns": np.abs(timestamps[sell_row] - timestamps[buy_row]),
+        "open_qty": buy_total - sell_total,
+    }
+
+
+def _ratio(numerator, denominator):
+    return float(numerator / denominator) if denominator else float("nan")
+
+
+def analyze_trades(df, initial_capital=100_000.0):
+    """
+    Calcula las métricas de trading de un DataFrame de operaciones.
+
+    Espera las columnas normalizadas de services.data_loader: symbol, side,
+    quantity, price, timestamp y opcionalmente commission / fees.
+
+    Returns:
+        dict: Métricas agregadas ("summary"), P&L por símbolo ("by_symbol"),
+            curva de equity y drawdown ("equity") y tiempos de tenencia ("holding").
+    """
+    n = len(df)
+    symbols = df["symbol"]
+    if not isinstance(symbols.dtype, pd.CategoricalDtype):
+        symbols = symbols.astype("category")
+    sym_codes = symbols.cat.codes.to_numpy()
+    # int64 en ns sin pasar por objetos (to_numpy de una columna con zona horaria devuelve objetos)
+    timestamps = pd.DatetimeIndex(pd.to_datetime(df["timestamp"], utc=True)).as_unit("ns").asi8
+    qty = np.abs(df["quantity"].to_numpy(dtype=np.float64))
+    prices = df["price"].to_numpy(dtype=np.float64)
+    signed_qty = qty * side_sign(df["side"])
+    costs = np.zeros(n)
+    for column in ("commission", "fees"):
+        if column in df.columns:
+            costs += np.abs(np.nan_to_num(df[column].to_numpy(dtype=np.float64)))
+
+    # Orden temporal y, a partir de él, orden por (símbolo, timestamp) para el FIFO: dos
+    # ordenaciones estables (los códigos de símbolo son enteros pequeños) en lugar de lexsort
+    time_order = np.argsort(timestamps, kind="stable")
+    order = time_order[np.argsort(sym_codes[time_order], kind="stable")]
+    sorted_codes = sym_codes[order]
+    match = fifo_match(sorted_codes, timestamps[order], signed_qty[order], prices[order])
+
+    # P&L realizado por fila original (en la fila que cierra) menos costes
+    close_rows = order[match["close_row"]]
+    realized = np.bincount(close_rows, weights=match["pnl"], minlength=n)
+    net = realized - costs
+
+    # Curva de equity en orden temporal
+    equity = initial_capital + np.cumsum(net[time_order])
+    peak = np.maximum.accumulate(equity) if n else equity
+    drawdown = equity - peak
+    drawdown_pct = np.divide(drawdown, peak, out=np.zeros_like(drawdown), where=peak != 0)
+
+    # Operaciones cerradas: filas con P&L realizado
+    closed_mask = np.zeros(n, dtype=bool)
+    closed_mask[close_rows] = True
+    closed_pnl = net[closed_mask]
+    wins = closed_pnl[closed_pnl > 0]
+    losses = closed_pnl[closed_pnl < 0]
+    win_rate = _ratio(len(wins), len(closed_pnl))
+    avg_win = float(wins.mean()) if len(wins) else 0.0
+    avg_loss = float(losses.mean()) if len(losses) else 0.0
+
+    # Rentabilidades diarias para Sharpe / Sortino
+    days = timestamps[time_order] // (86_400 * NS_PER_SECOND)
+    if n:
+        day_starts = _group_starts(days)
+        daily_pnl = np.add.reduceat(net[time_order], day_starts)
+        day_open_equity = np.r_[initial_capital, equity[day_starts[1:] - 1]]
+        daily_ret = daily_pnl / day_open_equity
+    else:
+        daily_ret = np.empty(0)
+    std = daily_ret.std(ddof=1) if len(daily_ret) > 1 else 0.0
+    downside = daily_ret[daily_ret < 0]
+    downside_std = np.sqrt(np.mean(downside ** 2)) if len(downside) else 0.0
+    sharpe = _ratio(daily_ret.mean() * np.sqrt(TRADING_DAYS), std) if len(daily_ret) else float("nan")
+    sortino = _ratio(daily_ret.mean() * np.sqrt(TRADING_DAYS), downside_std) if len(daily_ret) else float("nan")
+
+    # P&L por símbolo
+    categories = symbols.cat.categories
+    n_symbols = len(categories)
+    valid_codes = sym_codes >= 0
+    by_symbol = pd.DataFrame({
+        "realized_pnl": np.bincount(sym_codes[valid_codes], weights=realized[valid_codes], minlength=n_symbols),
+        "costs": np.bincount(sym_codes[valid_codes], weights=costs[valid_codes], minlength=n_symbols),
+        "trades": np.bincount(sym_codes[valid_codes], minlength=n_symbols),
+        "volume": np.bincount(sym_codes[valid_codes], weights=(qty * prices)[valid_codes], minlength=n_symbols),
+    }, index=pd.Index(categories, name="symbol"))
+    by_symbol["net_pnl"] = by_symbol["realized_pnl"] - by_symbol["costs"]
+    open_qty = np.zeros(n_symbols)
+    if n:
+        group_codes = sorted_codes[_group_starts(sorted_codes)]
+        known = group_codes >= 0
+        open_qty[group_codes[known]] = match["open_qty"][known]
+    by_symbol["open_qty"] = open_qty
+
+    # Distribución de tiempos de tenencia (ponderada por cantidad)
+    holding_hours = match["holding_ns"] / (3600 * NS_PER_SECOND)
+    if len(holding_hours):
+        sort_idx = np.argsort(holding_hours)
+        weights = np.cumsum(match["qty"][sort_idx])
+        levels = np.array([0.1, 0.25, 0.5, 0.75, 0.9])
+        # Cuantiles ponderados (CDF inversa) en una sola búsqueda; solo se leen las filas elegidas
+        picked = holding_hours[sort_idx[np.searchsorted(weights, levels * weights[-1])]]
+        quantiles = {f"p{int(q * 100)}": float(v) for q, v in zip(levels, picked)}
+        hist, edges = np.histogram(np.log10(np.maximum(holding_hours, 1 / 3600)), bins=30, weights=match["qty"])
+    else:
+        quantiles, hist, edges = {}, np.empty(0), np.empty(0)
+
+    summary = {
+        "trades": n,
+        "closed_trades": int(closed_mask.sum()),
+        "net_pnl": float(net.sum()),
+        "gross_pnl": float(realized.sum()),
+        "costs": float(costs.sum()),
+        "win_rate": win_rate,
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "expectancy": float(closed_pnl.mean()) if len(closed_pnl) else float("nan"),
+        "max_drawdown": float(drawdown.min()) if n else 0.0,
+        "max_drawdown_pct": float(drawdown_pct.min()) if n else 0.0,
+        "sharpe": sharpe,
+        "sortino": sortino,
+    }
+    equity_frame = pd.DataFrame(
+        {"equity": equity, "drawdown": drawdown, "drawdown_pct": drawdown_pct},
+        index=pd.DatetimeIndex(timestamps[time_order].view("M8[ns]"), name="timestamp").tz_localize("UTC")
+    )
+    return {
+        "summary": summary,
+        "by_symbol": by_symbol,
+        "equity": equity_frame,
+        "holding": {"quantiles_hours": quantiles, "hist": hist, "log10_hour_edges": edges},
+    }
@@ -0,0 +1,387 @@
+"""
+Diario de operaciones persistente, append-only y particionado por día.
+
+Cada día es un fichero binario de registros de ancho fijo (array estructurado
+de NumPy) al que solo se añaden filas; se lee con memoria mapeada. Un índice
+pequeño (index.json) guarda por partición el número de filas, el rango de
+timestamps y los símbolos presentes, de modo que una consulta por fechas o
+símbolos solo abre las particiones que pueden contener resultados.
+
+Las filas se deduplican por fill_id (una huella de 64 bits del id de
+ejecución del broker o, si el CSV no lo trae, del contenido de la fila), así
+que reimportar el mismo CSV o las mismas actividades de Alpaca no duplica nada.
+
+Estructura:
+    data/journal/
+        index.json
+        symbols.json
+        2024-03-01.bin
+        ...
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services.trade_analytics import side_sign
+
+DEFAULT_JOURNAL_DIR = os.path.join("data", "journal")
+SOURCES = {"csv": 0, "alpaca": 1}
+JOURNAL_DTYPE = np.dtype([
+    ("t", "i8"),
+    ("fill_hash", "i8"),
+    ("symbol", "i4"),
+    ("side", "i1"),
+    ("source", "i1"),
+    ("quantity", "f8"),
+    ("price", "f8"),
+    ("commission", "f4"),
+    ("fees", "f4"),
+    ("fill_id", "S64"),
+    ("order_id", "S40"),
+])
+NS_PER_DAY = 86_400 * 10**9
+
+
+def _hash64(values):
+    """Huella de 64 bits con signo de cada cadena (estable entre procesos, a diferencia de hash())."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(v.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+         for v in values),
+        dtype=np.int64, count=len(values)
+    )
+
+
+def _to_ns(value):
+    """Fecha (naive = UTC, o con zona horaria) a nanosegundos UTC."""
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")).value
+
+
+def _content_fill_ids(df):
+    """
+    Id sintético para filas sin fill_id: contenido de la fila más su ordinal
+    entre filas idénticas, para no colapsar ejecuciones legítimamente iguales.
+    """
+    key = (
+        pd.to_datetime(df["timestamp"], utc=True).dt.as_unit("ns").astype("int64").astype(str) + "|" + df["symbol"].astype(str) + "|"
+        + df["side"].astype(str) + "|" + df["quantity"].astype(str) + "|" + df["price"].astype(str)
+    )
+    ordinal = key.groupby(key).cumcount().astype(str)
+    return ("row:" + key + "#" + ordinal).tolist()
+
+
+class TradeJournal:
+    def __init__(self, root=DEFAULT_JOURNAL_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self.symbols_path = os.path.join(root, "symbols.json")
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        self.symbols = self._load_json(self.symbols_path, [])
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.index = self._load_json(self.index_path, {})
+        self._reconcile()
+        self._known = None
+
+    # --- Índice ---
+
+    @staticmethod
+    def _load_json(path, default):
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                pass
+        return default
+
+    @staticmethod
+    def _save_json(path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _partition_path(self, day):
+        return os.path.join(self.root, f"{day}.bin")
+
+    def _read_partition(self, day, rows=None):
+        rows = self.index[day]["rows"] if rows is None else rows
+        if not rows:
+            return np.empty(0, dtype=JOURNAL_DTYPE)
+        return np.memmap(self._partition_path(day), dtype=JOURNAL_DTYPE, mode="r", shape=(rows,))
+
+    def _summarize(self, day, rows):
+        data = self._read_partition(day, rows)
+        return {
+            "rows": int(rows),
+            "min_t": int(data["t"].min()) if rows else None,
+            "max_t": int(data["t"].max()) if rows else None,
+            "symbols": np.unique(data["symbol"]).tolist(),
+        }
+
+    def _reconcile(self):
+        """Alinea el índice con los ficheros (p. ej. tras un corte entre el append y el guardado del índice)."""
+        changed = False
+        for name in os.listdir(self.root):
+            if not name.endswith(".bin"):
+                continue
+            day = name[:-4]
+            rows = os.path.getsize(self._partition_path(day)) // JOURNAL_DTYPE.itemsize
+            if self.index.get(day, {}).get("rows") != rows:
+                self.index[day] = self._summarize(day, rows)
+                changed = True
+        if changed:
+            self._save_json(self.index_path, self.index)
+
+    def _known_hashes(self):
+        """Huellas ya guardadas (ordenadas) para deduplicar; se construyen una vez y se mantienen al añadir."""
+        if self._known is None:
+            parts = [np.asarray(self._read_partition(day)["fill_hash"]) for day in self.index]
+            self._known = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        return self._known
+
+    def _symbol_id(self, symbol):
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    # --- Escritura ---
+
+    def append(self, df, source="csv"):
+        """
+        Añade operaciones al diario descartando las ya registradas.
+
+        Args:
+            df (pd.DataFrame): Operaciones con el esquema de data_loader (symbol, side,
+                quantity, price, timestamp y, opcionalmente, fill_id, order_id, commission, fees).
+            source (str): "csv" o "alpaca".
+
+        Returns:
+            dict: {"added": filas nuevas, "duplicates": filas ya presentes,
+                   "invalid": filas sin fecha o con lado desconocido}
+        """
+        required = {"symbol", "side", "quantity", "price", "timestamp"}
+        missing = required - set(df.columns)
+        if missing:
+            raise ValueError(f"Faltan columnas: {', '.join(sorted(missing))}")
+        signs = side_sign(df["side"].reset_index(drop=True))
+        valid = df["timestamp"].notna().to_numpy() & (signs != 0)
+        invalid = int((~valid).sum())
+        df, signs = df[valid], signs[valid]
+        if df.empty:
+            return {"added": 0, "duplicates": 0, "invalid": invalid}
+
+        if "fill_id" in df.columns:
+            fill_ids = df["fill_id"].astype("string")
+            synthetic = _content_fill_ids(df)
+            fill_ids = [f if isinstance(f, str) and f else s for f, s in zip(fill_ids.fillna("").tolist(), synthetic)]
+        else:
+            fill_ids = _content_fill_ids(df)
+        hashes = _hash64(fill_ids)
+        # Siempre en ns: según la versión de pandas la columna puede venir en us o s
+        timestamps = pd.to_datetime(df["timestamp"], utc=True).dt.as_unit("ns").astype("int64").to_numpy()
+
+        with self._lock:
+            # Duplicados contra el diario y dentro del propio lote
+            _, first = np.unique(hashes, return_index=True)
+            keep = np.zeros(len(hashes), dtype=bool)
+            keep[first] = True
+            keep &= ~np.isin(hashes, self._known_hashes())
+            duplicates = int(len(hashes) - keep.sum())
+            if not keep.any():
+                return {"added": 0, "duplicates": duplicates, "invalid": invalid}
+
+            idx = np.flatnonzero(keep)
+            records = np.zeros(len(idx), dtype=JOURNAL_DTYPE)
+            records["t"] = timestamps[idx]
+            records["fill_hash"] = hashes[idx]
+            symbols = df["symbol"].astype(str).to_numpy()[idx]
+            records["symbol"] = [self._symbol_id(s) for s in symbols]
+            records["side"] = signs[idx]
+            records["source"] = SOURCES[source]
+            records["quantity"] = df["quantity"].to_numpy(dtype=np.float64)[idx]
+            records["price"] = df["price"].to_numpy(dtype=np.float64)[idx]
+            for name in ("commission", "fees"):
+                if name in df.columns:
+                    records[name] = df[name].fillna(0).to_numpy(dtype=np.float32)[idx]
+            # Los ids se guardan truncados solo para mostrarlos; la deduplicación usa la huella completa
+            records["fill_id"] = [fill_ids[i].encode("utf-8")[:64] for i in idx]
+            if "order_id" in df.columns:
+                records["order_id"] = [str(v).encode("utf-8")[:40] for v in df["order_id"].fillna("").to_numpy()[idx]]
+
+            # Un append por partición diaria; los registros se ordenan por tiempo dentro del lote
+            records.sort(order="t")
+            days = records["t"] // NS_PER_DAY
+            bounds = np.r_[0, np.flatnonzero(np.diff(days)) + 1, len(records)].tolist()
+            updates = {}
+            written = {}
+            try:
+                for lo, hi in zip(bounds[:-1], bounds[1:]):
+                    day = pd.Timestamp(int(days[lo]) * NS_PER_DAY, tz="UTC").strftime("%Y-%m-%d")
+                    path = self._partition_path(day)
+                    written[path] = os.path.getsize(path) if os.path.exists(path) else 0
+                    with open(path, "ab") as f:
+                        f.write(records[lo:hi].tobytes())
+                    previous = self.index.get(day)
+                    min_t, max_t = int(records["t"][lo]), int(records["t"][hi - 1])
+                    chunk_symbols = np.unique(records["symbol"][lo:hi]).tolist()
+                    updates[day] = {
+                        "rows": int(previous["rows"] if previous else 0) + int(hi - lo),
+                        "min_t": min(min_t, int(previous["min_t"])) if previous else min_t,
+                        "max_t": max(max_t, int(previous["max_t"])) if previous else max_t,
+                        "symbols": sorted(set(chunk_symbols) | set(previous["symbols"] if previous else [])),
+                    }
+            except Exception:
+                # Se deshacen los appends parciales para que un reintento no duplique filas
+                for path, size in written.items():
+                    with open(path, "r+b") as f:
+                        f.truncate(size)
+                raise
+            # El índice y las huellas conocidas solo cambian cuando todas las particiones se han escrito
+            self.index.update(updates)
+            self._save_json(self.symbols_path, self.symbols)
+            self._save_json(self.index_path, self.index)
+            self._known = np.union1d(self._known_hashes(), records["fill_hash"])
+        return {"added": len(records), "duplicates": duplicates, "invalid": invalid}
+
+    def import_csv(self, source, progress_callback=None):
+        """Parsea un CSV de broker (ver data_loader) y lo añade al diario."""
+        from services.data_loader import load_trades_csv
+        return self.append(load_trades_csv(source, progress_callback=progress_callback), source="csv")
+
+    def import_alpaca_activities(self, client=None, after=None, page_size=100):
+        """
+        Importa las ejecuciones (actividades FILL) de la cuenta de Alpaca.
+
+        Por defecto continúa desde la última ejecución de Alpaca ya registrada.
+        """
+        if client is None:
+            from services.shared_resources import get_alpaca_client
+            client = get_alpaca_client()
+        if after is None:
+            last = self.last_timestamp(source="alpaca")
+            after = pd.Timestamp(last, tz="UTC").isoformat() if last is not None else None
+        activities = []
+        page_token = None
+        while True:
+            page = client.get_activities("FILL", after=after, page_size=page_size, page_token=page_token)
+            if isinstance(page, dict) and "error" in page:
+                raise RuntimeError(f"Error al obtener actividades de Alpaca: {page['error']}")
+            activities.extend(page)
+            if len(page) < page_size:
+                break
+            page_token = page[-1]["id"]
+        if not activities:
+            return {"added": 0, "duplicates": 0, "invalid": 0}
+        df = pd.DataFrame({
+            "fill_id": [a.get("id") for a in activities],
+            "order_id": [a.get("order_id") for a in activities],
+            "symbol": [a.get("symbol") for a in activities],
+            "side": [a.get("side") for a in activities],
+            "quantity": pd.to_numeric([a.get("qty") for a in activities]),
+            "price": pd.to_numeric([a.get("price") for a in activities]),
+            "timestamp": pd.to_datetime([a.get("transaction_time") for a in activities], utc=True),
+        })
+        return self.append(df, source="alpaca")
+
+    # --- Lectura ---
+
+    def _days_in_range(self, start, end, symbol_ids):
+        start_ns = _to_ns(start) if start is not None else None
+        end_ns = _to_ns(end) if end is not None else None
+        days = []
+        for day, info in sorted(self.index.items()):
+            if not info["rows"]:
+                continue
+            if start_ns is not None and info["max_t"] < start_ns:
+                continue
+            if end_ns is not None and info["min_t"] > end_ns:
+                continue
+            if symbol_ids is not None and not symbol_ids.intersection(info["symbols"]):
+                continue
+            days.append(day)
+        return days, start_ns, end_ns
+
+    def query(self, start=None, end=None, symbols=None):
+        """
+        Operaciones en [start, end] (y de los símbolos indicados) con el esquema de data_loader.
+
+        Solo se abren las particiones que el índice señala como candidatas.
+        """
+        with self._lock:
+            symbol_ids = None
+            if symbols:
+                symbol_ids = {self._symbol_ids[s] for s in symbols if s in self._symbol_ids}
+            days, start_ns, end_ns = self._days_in_range(start, end, symbol_ids)
+            parts = [self._read_partition(day) for day in days]
+            categories = list(self.symbols)
+        data = np.concatenate(parts) if parts else np.empty(0, dtype=JOURNAL_DTYPE)
+        mask = np.ones(len(data), dtype=bool)
+        if start_ns is not None:
+            mask &= data["t"] >= start_ns
+        if end_ns is not None:
+            mask &= data["t"] <= end_ns
+        if symbol_ids is not None:
+            mask &= np.isin(data["symbol"], list(symbol_ids))
+        data = data[mask]
+        data = data[np.argsort(data["t"], kind="stable")]
+        return pd.DataFrame({
+            "fill_id": pd.array(np.char.decode(data["fill_id"], "utf-8", "ignore"), dtype="string"),
+            "order_id": pd.array(np.char.decode(data["order_id"], "utf-8", "ignore"), dtype="string"),
+            "symbol": pd.Categorical.from_codes(data["symbol"], categories=categories),
+            "side": pd.Categorical.from_codes((data["side"] < 0).astype(np.int8), categories=["buy", "sell"]),
+            "quantity": data["quantity"].astype(np.float32),
+            "price": data["price"].astype(np.float32),
+            "commission": data["commission"],
+            "fees": data["fees"],
+            "timestamp": pd.to_datetime(data["t"], unit="ns", utc=True),
+        })
+
+    def last_timestamp(self, source=None):
+        """Timestamp (ns) de la última operación registrada, opcionalmente de una fuente."""
+        with self._lock:
+            for day in sorted(self.index, reverse=True):
+                data = self._read_partition(day)
+                if source is not None:
+                    data = data[data["source"] == SOURCES[source]]
+                if len(data):
+                    return int(data["t"].max())
+        return None
+
+    def version(self):
+        """Marca que cambia con cada escritura (para claves de caché)."""
+        with self._lock:
+            return sum(info["rows"] for info in self.index.values()), len(self.index)
+
+    def stats(self):
+        with self._lock:
+            rows = sum(info["rows"] for info in self.index.values())
+            days = sorted(day for day, info in self.index.items() if info["rows"])
+        return {
+            "rows": rows,
+            "partitions": len(days),
+            "symbols": len(self.symbols),
+            "first_day": days[0] if days else None,
+            "last_day": days[-1] if days else None,
+            "bytes": rows * JOURNAL_DTYPE.itemsize,
+        }
+
+
+_JOURNAL = None
+_JOURNAL_LOCK = threading.Lock()
+
+
+def get_trade_journal():
+    """Diario único para todo el proceso (los appends se serializan con su lock)."""
+    global _JOURNAL
+    with _JOURNAL_LOCK:
+        if _JOURNAL is None:
+            _JOURNAL = TradeJournal()
+        return _JOURNAL
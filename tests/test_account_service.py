@@ -0,0 +1,91 @@
+import threading
+
+import pandas as pd
+
+from services.account_service import EQUITY_DTYPE, AccountService
+
+
+class FakeClient:
+    def __init__(self):
+        self.account = {"equity": "1000", "cash": "500", "buying_power": "2000"}
+        self.positions = [{"symbol": "AAPL", "qty": "10", "market_value": "1500"},
+                          {"symbol": "MSFT", "qty": "5", "market_value": "2000"}]
+        self.orders = [{"id": "o1", "status": "new", "filled_qty": "0"}]
+
+    def get_account(self):
+        return dict(self.account)
+
+    def get_positions(self):
+        return [dict(p) for p in self.positions]
+
+    def get_orders(self):
+        return [dict(o) for o in self.orders]
+
+
+def test_poll_diff_reports_added_removed_and_changed(tmp_path):
+    client = FakeClient()
+    service = AccountService(client=client, interval=60, history_path=str(tmp_path / "equity.bin"))
+    service.poll()
+    _, diff = service.get_snapshot()
+    assert diff["positions"] == {"added": ["AAPL", "MSFT"], "removed": [], "changed": []}
+
+    client.positions = [{"symbol": "AAPL", "qty": "12", "market_value": "1800"},
+                        {"symbol": "TSLA", "qty": "1", "market_value": "200"}]
+    client.orders = [{"id": "o1", "status": "filled", "filled_qty": "2"}, {"id": "o2", "status": "new"}]
+    service.poll()
+    snapshot, diff = service.get_snapshot()
+    assert diff["positions"] == {"added": ["TSLA"], "removed": ["MSFT"], "changed": ["AAPL"]}
+    assert diff["orders"] == {"added": ["o2"], "removed": [], "changed": ["o1"]}
+    assert set(snapshot["positions"]) == {"AAPL", "TSLA"}
+    assert service.version == 2
+
+
+def test_api_error_keeps_the_previous_snapshot(tmp_path):
+    client = FakeClient()
+    service = AccountService(client=client, interval=60, history_path=str(tmp_path / "equity.bin"))
+    service.poll()
+    client.get_orders = lambda: {"error": "503"}
+    assert service.poll() is None
+    assert service.version == 1 and "503" in service.last_error
+
+
+def test_equity_history_appends_only_on_change(tmp_path):
+    path = tmp_path / "equity.bin"
+    client = FakeClient()
+    service = AccountService(client=client, interval=60, history_path=str(path))
+    assert service.equity_history().empty
+    service.poll()
+    service.poll()  # sin cambios: no se añade nada
+    client.account = {"equity": "1100", "cash": "500", "buying_power": "2200"}
+    service.poll()
+    assert path.stat().st_size == 2 * EQUITY_DTYPE.itemsize
+
+    history = service.equity_history()
+    assert history["equity"].tolist() == [1000.0, 1100.0]
+    assert history["buying_power"].tolist() == [2000.0, 2200.0]
+    assert history.index.tz is not None
+    assert history.index.is_monotonic_increasing
+    assert abs(history.index[-1] - pd.Timestamp.now(tz="UTC")) < pd.Timedelta(minutes=1)
+
+    # Un proceso nuevo sigue el histórico existente sin reescribirlo
+    reopened = AccountService(client=client, interval=60, history_path=str(path))
+    assert reopened.equity_history()["equity"].tolist() == [1000.0, 1100.0]
+
+
+def test_failing_subscriber_does_not_stop_the_poller(tmp_path):
+    service = AccountService(client=FakeClient(), interval=60, history_path=str(tmp_path / "equity.bin"))
+    polled = threading.Event()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    service.subscribe(broken)
+    service.subscribe(polled.set)
+    service.subscribe(broken)  # no se registra dos veces
+    service.start()
+    try:
+        assert polled.wait(5)
+    finally:
+        service.stop()
+    assert service._subscribers == [broken, polled.set]
+    assert "boom" in service.last_error
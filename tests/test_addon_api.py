@@ -0,0 +1,96 @@
+import inspect
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from services.addon_api import AddonCapabilityError, AddonContext, SharedBarStore, validate_manifest
+from services.addon_loader import load_addon_ui
+
+ADDONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "addons")
+
+
+class SlowCache:
+    """Caché falsa que tarda en descargar y cuenta las descargas por clave."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_bars(self, symbol, timeframe, start=None):
+        with self._lock:
+            self.calls.append((symbol, timeframe, start))
+        time.sleep(self.delay)
+        index = pd.date_range("2024-01-01", periods=3, freq="D", tz="UTC", unit="s", name="timestamp")
+        return pd.DataFrame({"close": [1.0, 2.0, 3.0]}, index=index)
+
+
+def test_validate_manifest():
+    assert validate_manifest({"name": "antiguo"}) == []
+    assert validate_manifest({"api_version": 1, "requires": {"bars": {"symbols": ["aapl"]}}}) == []
+    assert validate_manifest({"api_version": 2})[0].startswith("api_version 2 no soportada")
+    assert validate_manifest({"requires": {"bars": {"symbols": ["AAPL"]}}}) == [
+        "El addon declara barras pero no api_version"]
+    assert validate_manifest({"api_version": 1, "requires": {"bars": {"symbols": ["AAPL"], "timeframes": ["7Min"]}}}) == [
+        "Timeframe no soportado: 7Min"]
+
+
+def test_context_only_serves_declared_capabilities():
+    config = {"api_version": 1, "requires": {"bars": {"symbols": ["aapl"], "timeframes": ["1Day"]}}}
+    context = AddonContext("demo", config, bar_store=SharedBarStore(cache=SlowCache()))
+    assert context.bars("AAPL")["close"].tolist() == [1.0, 2.0, 3.0]
+    with pytest.raises(AddonCapabilityError):
+        context.bars("MSFT")
+    with pytest.raises(AddonCapabilityError):
+        context.dataset()
+
+
+def test_concurrent_requests_share_one_download():
+    cache = SlowCache(delay=0.2)
+    store = SharedBarStore(cache=cache)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get("AAPL"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.calls == [("AAPL", "1Day", None)]
+    assert all(r is results[0] for r in results)
+    assert not results[0]["close"].flags.writeable
+    # Timestamps siempre en ns aunque la caché devuelva otra resolución
+    assert results[0]["timestamp"][0] == pd.Timestamp("2024-01-01", tz="UTC").value
+    assert store.stats()["fetches"] == 1 and store.stats()["hits"] == 7
+
+
+def test_store_is_bounded_by_lru_and_age(monkeypatch):
+    cache = SlowCache()
+    store = SharedBarStore(cache=cache, max_entries=2, max_age=60)
+    store.get("A")
+    store.get("B")
+    store.get("A")  # A pasa a ser la más reciente
+    store.get("C")
+    assert list(store._entries) == [("A", "1Day", None), ("C", "1Day", None)]
+    assert set(store._key_locks) <= set(store._entries)
+
+    now = time.monotonic()
+    monkeypatch.setattr("services.addon_api.time.monotonic", lambda: now + 120)
+    store.get("D")  # las caducadas se descartan al añadir
+    assert list(store._entries) == [("D", "1Day", None)]
+    assert store.stats()["evictions"] == 3
+
+
+@pytest.mark.parametrize("folder", ["prueba2", "dashbottrade_example"])
+def test_bundled_addons_use_the_addon_api(folder):
+    with open(os.path.join(ADDONS_DIR, folder, "config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    assert config["api_version"] == 1
+    assert validate_manifest(config) == []
+    ui_module = load_addon_ui(folder, ADDONS_DIR)
+    assert list(inspect.signature(ui_module.render).parameters) == ["ctx"]
+    bars = {"close": [10.0, 12.5]}
+    context = AddonContext(folder, config, addons_dir=ADDONS_DIR)
+    assert context.run("last_close", bars) == 12.5
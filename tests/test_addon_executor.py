@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from services.addon_api import AddonContext
+from services.addon_executor import AddonExecutor, AddonTimeoutError, run_addon_function
+
+SOURCE = '''import time
+
+import numpy as np
+
+
+def big(n, fail=False):
+    if fail:
+        raise ValueError("fallo")
+    return np.arange(n, dtype=np.float64)
+
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+'''
+
+
+def _make_addon(root, folder, execution="process"):
+    os.makedirs(os.path.join(root, folder, "src"))
+    with open(os.path.join(root, folder, "src", f"{folder}.py"), "w", encoding="utf-8") as f:
+        f.write(SOURCE)
+    with open(os.path.join(root, folder, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"name": folder, "active": True, "execution": execution}, f)
+
+
+def _segments():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+@pytest.fixture
+def addons_dir(tmp_path):
+    root = str(tmp_path / "addons")
+    _make_addon(root, "calc_a")
+    _make_addon(root, "calc_b")
+    return root
+
+
+def test_timeout_does_not_fail_other_addons_in_the_shared_pool(addons_dir):
+    executor = AddonExecutor(max_workers=2, addons_dir=addons_dir)
+    results = {}
+    try:
+        assert executor.run("calc_b", "slow", 0) == 0  # arranca los procesos del pool
+        other = threading.Thread(target=lambda: results.setdefault("b", executor.run("calc_b", "slow", 1.0)))
+        other.start()
+        with pytest.raises(AddonTimeoutError):
+            executor.run("calc_a", "slow", 30, timeout=0.3)
+        other.join(30)
+        assert results["b"] == 1.0
+        assert executor.run("calc_a", "slow", 0) == 0
+    finally:
+        executor.shutdown()
+
+
+def test_map_releases_shared_memory_on_error(addons_dir):
+    executor = AddonExecutor(max_workers=2, addons_dir=addons_dir)
+    before = _segments()
+    try:
+        n = 1_000_000
+        results = executor.map("calc_a", "big", [(n,), (n,)])
+        assert all(np.array_equal(r, np.arange(n, dtype=np.float64)) for r in results)
+        with pytest.raises(ValueError):
+            executor.map("calc_a", "big", [(n, True), (n,), (n,)])
+    finally:
+        executor.shutdown()
+    assert _segments() == before
+
+
+def test_run_addon_function_uses_addons_dir_in_process_mode(addons_dir):
+    assert run_addon_function("calc_a", "slow", 0, addons_dir=addons_dir) == 0
+
+
+def test_addon_context_runs_in_process_mode(addons_dir):
+    with open(os.path.join(addons_dir, "calc_a", "config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    context = AddonContext("calc_a", config, addons_dir=addons_dir)
+    assert np.array_equal(context.run("big", 3), np.arange(3, dtype=np.float64))
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+
+from services.addon_loader import get_addon_stats, load_addon_source, render_addon, unload_addon
+
+
+def _write_source(root, folder, value):
+    os.makedirs(os.path.join(root, folder, "src"), exist_ok=True)
+    path = os.path.join(root, folder, "src", f"{folder}.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"VALUE = {value}\n")
+    return path
+
+
+def test_source_is_imported_lazily_and_cached(tmp_path):
+    root = str(tmp_path / "addons")
+    _write_source(root, "lazy_addon", 1)
+    assert "lazy_addon" not in sys.modules
+    assert get_addon_stats("lazy_addon") == {}
+    first = load_addon_source("lazy_addon", root)
+    second = load_addon_source("lazy_addon", root)
+    assert first is second and first.VALUE == 1
+    assert get_addon_stats("lazy_addon")["imports"] == 1
+    unload_addon("lazy_addon", root)
+
+
+def test_reload_when_mtime_changes(tmp_path):
+    root = str(tmp_path / "addons")
+    path = _write_source(root, "hot_addon", 1)
+    assert load_addon_source("hot_addon", root).VALUE == 1
+    stat = os.stat(path)
+    _write_source(root, "hot_addon", 2)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_addon_source("hot_addon", root).VALUE == 2
+    assert get_addon_stats("hot_addon")["imports"] == 2
+    unload_addon("hot_addon", root)
+    assert get_addon_stats("hot_addon") == {}
+
+
+def test_concurrent_renders_are_all_counted():
+    class Ui:
+        @staticmethod
+        def render():
+            pass
+
+    def worker():
+        for _ in range(500):
+            render_addon("stats_addon", Ui)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert get_addon_stats("stats_addon")["renders"] == 4000
+    unload_addon("stats_addon")
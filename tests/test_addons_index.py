@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+import services.addons_manager as addons_manager
+from services.addons_manager import invalidate_addon_index, scan_addons
+
+
+def _write_config(root, folder, **config):
+    os.makedirs(os.path.join(root, folder), exist_ok=True)
+    path = os.path.join(root, folder, "config.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": folder, "active": True, **config}, f)
+    return path
+
+
+@pytest.fixture
+def addons_dir(tmp_path):
+    root = str(tmp_path / "addons")
+    _write_config(root, "uno", version="1.0.0")
+    invalidate_addon_index()
+    yield root
+    invalidate_addon_index()
+
+
+def test_new_folder_invalidates_by_dir_mtime(addons_dir):
+    assert [a["folder"] for a in scan_addons(addons_dir)] == ["uno"]
+    stat = os.stat(addons_dir)
+    _write_config(addons_dir, "dos")
+    # Fuerza un mtime distinto aunque el sistema de ficheros tenga poca resolución
+    os.utime(addons_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert [a["folder"] for a in scan_addons(addons_dir)] == ["dos", "uno"]
+
+
+def test_config_edit_is_seen_after_revalidation(addons_dir, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(addons_manager.time, "monotonic", lambda: clock[0])
+    reads = []
+    original = addons_manager._read_addon_config
+    monkeypatch.setattr(addons_manager, "_read_addon_config",
+                        lambda path, folder: reads.append(folder) or original(path, folder))
+    _write_config(addons_dir, "tres")
+    assert {a["folder"]: a.get("version") for a in scan_addons(addons_dir)}["uno"] == "1.0.0"
+    assert sorted(reads) == ["tres", "uno"]
+
+    path = _write_config(addons_dir, "uno", version="2.0.0")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    # Dentro de la ventana de revalidación se sirve el índice en memoria
+    clock[0] += addons_manager.ADDON_INDEX_REVALIDATE_SECONDS / 2
+    assert {a["folder"]: a.get("version") for a in scan_addons(addons_dir)}["uno"] == "1.0.0"
+    # Pasada la ventana se relee solo el config.json que cambió
+    clock[0] += addons_manager.ADDON_INDEX_REVALIDATE_SECONDS
+    assert {a["folder"]: a.get("version") for a in scan_addons(addons_dir)}["uno"] == "2.0.0"
+    assert sorted(reads) == ["tres", "uno", "uno"]
+
+
+def test_returned_configs_are_copies(addons_dir):
+    scan_addons(addons_dir)[0]["active"] = False
+    assert scan_addons(addons_dir)[0]["active"] is True
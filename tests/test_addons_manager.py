@@ -0,0 +1,47 @@
+import os
+import stat
+
+from benchmarks.synthetic import build_addon_bundle
+from services.addons_manager import import_addon, refresh_addons
+
+
+def test_imported_addon_dir_is_not_private(tmp_path):
+    bundle = build_addon_bundle(str(tmp_path / "demo_addon.zip"), "demo_addon", files=3, file_size=16)
+    addons_dir = str(tmp_path / "addons")
+    with open(bundle, "rb") as f:
+        config = import_addon(f, temp_dir=str(tmp_path / "temp"), addons_dir=addons_dir)
+    assert config["name"] == "demo_addon"
+    mode = stat.S_IMODE(os.stat(os.path.join(addons_dir, "demo_addon")).st_mode)
+    assert mode == 0o755
+    assert os.listdir(str(tmp_path / "temp")) == []
+
+
+def test_reimport_keeps_the_backup_out_of_the_addon_list(tmp_path, monkeypatch):
+    bundle = build_addon_bundle(str(tmp_path / "demo_addon.zip"), "demo_addon", files=1, file_size=16)
+    addons_dir = str(tmp_path / "addons")
+    temp_dir = str(tmp_path / "temp")
+    with open(bundle, "rb") as f:
+        import_addon(f, temp_dir=temp_dir, addons_dir=addons_dir)
+
+    listed = []
+    rename = os.rename
+
+    def spying_rename(src, dst):
+        rename(src, dst)
+        # Entre los dos renombrados la copia anterior ya está apartada
+        listed.append(sorted(os.listdir(addons_dir)))
+        refresh_addons(addons_dir)
+
+    monkeypatch.setattr(os, "rename", spying_rename)
+    with open(bundle, "rb") as f:
+        assert import_addon(f, temp_dir=temp_dir, addons_dir=addons_dir) is not None
+    assert listed[0] == []
+    assert listed[-1] == ["demo_addon"]
+    assert os.listdir(temp_dir) == []
+
+
+def test_scan_skips_hidden_dirs(tmp_path):
+    addons_dir = tmp_path / "addons"
+    (addons_dir / ".old-demo").mkdir(parents=True)
+    (addons_dir / "demo").mkdir()
+    assert [addon["folder"] for addon in refresh_addons(str(addons_dir))] == ["demo"]
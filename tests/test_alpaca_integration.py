@@ -0,0 +1,55 @@
+import threading
+
+from benchmarks.stub_alpaca_server import StubAlpacaServer
+from services.alpaca_integration import AlpacaIntegration, bars_to_frame
+
+
+def test_bars_to_frame_uses_ns_resolution():
+    frame = bars_to_frame([
+        {"t": "2024-01-02T00:00:00Z", "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 100},
+        {"t": "2024-01-03T00:00:00Z", "o": 1.5, "h": 2.5, "l": 1.0, "c": 2.0, "v": 200},
+    ])
+    assert str(frame.index.dtype) == "datetime64[ns, UTC]"
+    assert frame.index.asi8[0] == 1_704_153_600 * 10**9
+    assert list(frame.columns) == ["open", "high", "low", "close", "volume"]
+    assert str(bars_to_frame([]).index.dtype) == "datetime64[ns, UTC]"
+
+
+def test_post_without_client_order_id_is_not_retried():
+    with StubAlpacaServer(rate_limit_every=1, retry_after=0.01) as server:
+        client = AlpacaIntegration(max_retries=2)
+        client.base_url = server.url
+        assert client.submit_order("AAPL", 1, "buy")["status"] == 429
+        assert server.request_count == 1
+        client.submit_order("AAPL", 1, "buy", client_order_id="abc")
+        assert server.request_count == 4
+        client.get_account()
+        assert server.request_count == 7
+        client.close()
+
+
+class CountingClient(AlpacaIntegration):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = self.max_in_flight = 0
+        self._count_lock = threading.Lock()
+
+    def get_bars(self, *args, **kwargs):
+        with self._count_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return super().get_bars(*args, **kwargs)
+        finally:
+            with self._count_lock:
+                self.in_flight -= 1
+
+
+def test_get_bars_many_timeout_keeps_concurrency_limit():
+    with StubAlpacaServer(latency=0.3) as server:
+        client = CountingClient(max_retries=0)
+        client.base_url = server.url
+        results = client.get_bars_many([f"S{i}" for i in range(6)], max_concurrency=2, timeout=0.1)
+        client.close()
+    assert all("error" in result for result in results.values())
+    assert client.max_in_flight <= 2
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fake_feed_server import FakeFeedServer
+from benchmarks.stub_alpaca_server import StubAlpacaServer
+from benchmarks.synthetic import trades_frame
+from config import Config
+from services import account_service, market_stream, order_manager, trade_journal
+from services.dataset_store import get_dataset_store
+from services.shared_resources import get_alpaca_client, get_market_data_cache
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+MODULES = ["Inicio", "Carga de Datos", "Análisis de Trading", "Módulo de Gráficos", "Backtesting",
+           "Mercado en Vivo", "Cuenta", "Screener", "Diario", "Configuración", "Gestor de Addons", "Rendimiento"]
+
+
+@pytest.fixture
+def offline_app(tmp_path, monkeypatch):
+    """La app contra servidores locales, en un directorio temporal y sin singletons de otras pruebas."""
+    with StubAlpacaServer() as server, FakeFeedServer() as feed:
+        monkeypatch.setattr(Config, "ALPACA_BASE_URL", server.url)
+        monkeypatch.setattr(Config, "ALPACA_STREAM_URL", feed.url)
+        for module, name in ((account_service, "_SERVICE"), (market_stream, "_STREAM"),
+                             (order_manager, "_MANAGER"), (trade_journal, "_JOURNAL")):
+            monkeypatch.setattr(module, name, None)
+        get_alpaca_client.clear()
+        get_market_data_cache.clear()
+        monkeypatch.chdir(tmp_path)
+        yield
+        if account_service._SERVICE is not None:
+            account_service._SERVICE.stop()
+        if market_stream._STREAM is not None:
+            market_stream._STREAM.stop()
+        if order_manager._MANAGER is not None:
+            order_manager._MANAGER.shutdown()
+    get_alpaca_client.clear()
+    get_market_data_cache.clear()
+
+
+@pytest.mark.parametrize("with_dataset", [False, True], ids=["vacia", "con_datos"])
+@pytest.mark.parametrize("module", MODULES)
+def test_every_module_renders_with_deferred_imports(offline_app, module, with_dataset):
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["module"] = module
+    if with_dataset:
+        # Un dataset ya cargado recorre las ramas que importan pandas/numpy en diferido
+        get_dataset_store().add("test-trades", trades_frame(500, n_days=20, n_symbols=5), name="trades.csv")
+        at.session_state["datasets"] = {"trades.csv": "test-trades"}
+        at.session_state["active_dataset"] = "trades.csv"
+    at.run()
+    assert not at.exception, [e.message for e in at.exception]
+    assert at.session_state["module"] == module
+
+
+def test_leaving_live_market_releases_the_session_symbols(offline_app):
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["module"] = "Mercado en Vivo"
+    at.run()
+    assert at.session_state["live_subscribed"] == ["AAPL", "MSFT"]
+    assert market_stream._STREAM.symbols == {"AAPL", "MSFT"}
+    at.session_state["module"] = "Inicio"
+    at.run()
+    assert "live_subscribed" not in at.session_state
+    assert market_stream._STREAM.symbols == set()
@@ -0,0 +1,40 @@
+import warnings
+
+import numpy as np
+
+from benchmarks.synthetic import bar_series
+from services.backtesting import backtest, bars_to_arrays, parameter_sweep, sma_crossover
+
+
+def _arrays(opens, highs, lows, closes):
+    return {name: np.asarray(values, dtype=np.float64)
+            for name, values in zip(("open", "high", "low", "close"), (opens, highs, lows, closes))}
+
+
+def test_stop_gap_fills_at_open():
+    # Entrada larga a 100 en la barra 1; la barra 2 abre con hueco por debajo del stop (95)
+    arrays = _arrays([100, 100, 90, 91], [101, 101, 92, 92], [99, 99, 88, 90], [100, 100, 91, 91])
+    result = backtest(arrays, np.array([1.0, 1.0, 1.0, 1.0]), stop_loss=0.05)
+    assert result["pnl"].sum() == 90.0 - 100.0
+
+
+def test_short_stop_gap_fills_at_open():
+    arrays = _arrays([100, 100, 110, 109], [101, 101, 112, 110], [99, 99, 108, 108], [100, 100, 109, 109])
+    result = backtest(arrays, np.array([-1.0, -1.0, -1.0, -1.0]), stop_loss=0.05)
+    assert result["pnl"].sum() == -(110.0 - 100.0)
+
+
+def test_stop_inside_bar_fills_at_stop():
+    arrays = _arrays([100, 100, 98, 96], [101, 101, 99, 97], [99, 99, 94, 95], [100, 100, 96, 96])
+    result = backtest(arrays, np.array([1.0, 1.0, 1.0, 1.0]), stop_loss=0.05)
+    assert result["pnl"].sum() == 95.0 - 100.0
+
+
+def test_parameter_sweep_matches_serial():
+    arrays = bars_to_arrays(bar_series(500)["S0000"])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        table = parameter_sweep(arrays, "sma_crossover", {"fast": [5, 10], "slow": [30]}, processes=2)
+    for row in table.itertuples():
+        expected = backtest(arrays, sma_crossover(arrays, fast=row.fast, slow=row.slow))
+        assert row.total_return == expected["total_return"]
@@ -0,0 +1,46 @@
+import io
+
+import pandas as pd
+import pytest
+
+from benchmarks.run_suite import UploadedBytes
+from services.data_loader import load_trades_csv
+
+DATE_TIME_CSV = (
+    "ID,Trade_ID,Date,Time,Ticker,Action,Qty,Price\n"
+    "1,T1,2024-01-02,09:30:00,AAPL,buy,10,185.5\n"
+    "2,T2,2024-01-02,15:59:59,AAPL,sell,10,186.0\n"
+)
+
+
+def test_alias_collisions_keep_first_and_join_date_time():
+    df = load_trades_csv(io.StringIO(DATE_TIME_CSV))
+    assert list(df.columns) == ["fill_id", "Trade_ID", "timestamp", "symbol", "side", "quantity", "price"]
+    assert df["timestamp"].tolist() == [pd.Timestamp("2024-01-02 09:30:00", tz="UTC"),
+                                        pd.Timestamp("2024-01-02 15:59:59", tz="UTC")]
+    assert df["fill_id"].tolist() == ["1", "2"]
+
+
+def test_canonical_name_wins_over_alias():
+    csv = "date,timestamp,symbol\n2024-01-01,2024-01-02T10:00:00Z,AAPL\n"
+    df = load_trades_csv(io.StringIO(csv))
+    assert list(df.columns) == ["date", "timestamp", "symbol"]
+    assert df["timestamp"].iloc[0] == pd.Timestamp("2024-01-02 10:00", tz="UTC")
+
+
+def test_chunked_and_uploaded_input_match():
+    rows = "".join(f"{i},T{i},2024-01-02,10:00:{i % 60:02d},S{i % 3},buy,1,{i}.5\n" for i in range(50))
+    data = (DATE_TIME_CSV.splitlines()[0] + "\n" + rows).encode("utf-8")
+    progress = []
+    chunked = load_trades_csv(UploadedBytes(data, "trades.csv"), chunksize=7, progress_callback=progress.append)
+    whole = load_trades_csv(io.BytesIO(data))
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert isinstance(chunked["symbol"].dtype, pd.CategoricalDtype)
+    assert len(chunked) == 50 and progress[-1] == 1.0
+
+
+def test_empty_file_and_header_only():
+    with pytest.raises(ValueError):
+        load_trades_csv(io.StringIO(""))
+    df = load_trades_csv(io.StringIO("Date,Time,Ticker\n"))
+    assert df.empty and list(df.columns) == ["timestamp", "symbol"]
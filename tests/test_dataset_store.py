@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+from benchmarks.run_suite import UploadedBytes
+from services.dataset_store import DatasetStore, content_hash, get_dataset, get_dataset_store, load_uploaded_dataset
+
+
+def _frame(rows):
+    return pd.DataFrame({"x": np.arange(rows, dtype=np.int64)})
+
+
+def test_lru_eviction_keeps_the_most_recent():
+    size = int(_frame(1000).memory_usage(deep=True).sum())
+    store = DatasetStore(max_bytes=2 * size)
+    store.add("a", _frame(1000))
+    store.add("b", _frame(1000))
+    assert store.get("a") is not None  # "a" pasa a ser el más reciente
+    store.add("c", _frame(1000))
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.size_bytes() <= 2 * size
+
+
+def test_oversized_dataset_is_kept_alone():
+    store = DatasetStore(max_bytes=1)
+    store.add("a", _frame(10))
+    store.add("b", _frame(10))
+    assert store.get("a") is None and store.get("b") is not None
+
+
+@pytest.fixture
+def session():
+    for key in list(st.session_state):
+        del st.session_state[key]
+    get_dataset_store.clear()
+    yield st.session_state
+
+
+def test_same_content_is_parsed_once(session):
+    calls = []
+
+    def parser(source, progress_callback=None):
+        calls.append(source.name)
+        return pd.read_csv(source)
+
+    data = b"a,b\n1,2\n3,4\n"
+    digest, first = load_uploaded_dataset(UploadedBytes(data, "uno.csv"), parser)
+    _, again = load_uploaded_dataset(UploadedBytes(data, "uno.csv"), parser)
+    _, renamed = load_uploaded_dataset(UploadedBytes(data, "dos.csv"), parser)
+    assert digest == content_hash(data)
+    assert calls == ["uno.csv"]
+    assert again is first and renamed is first
+    assert get_dataset("uno.csv") is first and session["active_dataset"] == "dos.csv"
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from services.indicators import IndicatorEngine, compute_indicators
+
+
+def make_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=n, freq="min", tz="UTC", name="timestamp")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.001, n)) * close
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(100, 1000, n).astype(float),
+    }, index=index)
+
+
+def test_incremental_update_matches_batch():
+    bars = make_bars(3000)
+    engine = IndicatorEngine()
+    seeded = engine.update(bars.iloc[:2000])
+    np.testing.assert_array_equal(seeded.to_numpy(), compute_indicators(bars.iloc[:2000]).to_numpy())
+
+    # Llegan las barras nuevas junto al histórico ya procesado y en varios trozos
+    engine.update(bars.iloc[:2500])
+    result = engine.update(bars.iloc[2400:])
+    expected = compute_indicators(bars)
+    assert len(result) == len(bars)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-7, atol=1e-9, equal_nan=True)
+    assert result.index.equals(expected.index.as_unit("ns"))
+
+
+def test_update_without_new_bars_returns_cached_frame():
+    bars = make_bars(500)
+    engine = IndicatorEngine()
+    first = engine.update(bars)
+    assert engine.update(bars) is first
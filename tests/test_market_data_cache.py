@@ -0,0 +1,89 @@
+import json
+import os
+
+import pandas as pd
+
+from services.alpaca_integration import bars_to_frame
+from services.market_data_cache import MarketDataCache, TIMINGS_WINDOW
+
+
+class FakeClient:
+    """Devuelve barras diarias sintéticas en el rango pedido y cuenta las descargas."""
+
+    def __init__(self, unit="us"):
+        self.unit = unit
+        self.calls = 0
+
+    def iter_bars(self, symbol, timeframe, start=None, end=None):
+        self.calls += 1
+        days = pd.date_range(start or "2024-01-01", end or "2024-03-01", freq="D", tz="UTC")
+        frame = bars_to_frame([
+            {"t": day.isoformat(), "o": 1.0, "h": 2.0, "l": 0.5, "c": float(i), "v": 10}
+            for i, day in enumerate(days)
+        ])
+        # Simula un índice con otra resolución (p. ej. pandas 3 sin normalizar)
+        frame.index = frame.index.as_unit(self.unit)
+        yield frame
+
+
+def test_warm_cache_returns_rows_with_non_ns_index(tmp_path):
+    client = FakeClient(unit="us")
+    cache = MarketDataCache(client=client, cache_dir=str(tmp_path / "cache"))
+    cold = cache.get_bars("AAPL", "1Day", "2024-01-01", "2024-02-01")
+    warm = cache.get_bars("AAPL", "1Day", "2024-01-10", "2024-01-20")
+    assert client.calls == 1
+    assert len(cold) == 32
+    assert len(warm) == 11
+    assert warm.index[0] == pd.Timestamp("2024-01-10", tz="UTC")
+
+
+def test_timings_are_bounded(tmp_path):
+    cache = MarketDataCache(client=FakeClient(), cache_dir=str(tmp_path / "cache"))
+    for _ in range(TIMINGS_WINDOW + 10):
+        cache.get_bars("AAPL", "1Day", "2024-01-01", "2024-01-05")
+    assert len(cache.stats["timings"]["hit"]) == TIMINGS_WINDOW
+    assert cache.report()["requests"] == TIMINGS_WINDOW + 10
+
+
+class LiveClient:
+    """Barras diarias hasta "hoy"; la última se devuelve en curso y cambia en cada descarga."""
+
+    def __init__(self):
+        self.calls = 0
+        self.starts = []
+
+    def iter_bars(self, symbol, timeframe, start=None, end=None):
+        self.calls += 1
+        self.starts.append(start)
+        days = pd.date_range(pd.Timestamp(start or "2024-01-01"), pd.Timestamp("2024-01-10", tz="UTC"), freq="D")
+        yield bars_to_frame([
+            {"t": day.isoformat(), "o": 1.0, "h": 2.0, "l": 0.5,
+             "c": 100.0 + self.calls if day == days[-1] else 1.0, "v": 10}
+            for day in days
+        ])
+
+
+def test_tail_refresh_replaces_the_last_stored_bar(tmp_path):
+    client = LiveClient()
+    cache = MarketDataCache(client=client, cache_dir=str(tmp_path / "cache"), max_age=0)
+    first = cache.get_bars("AAPL", "1Day", "2024-01-01")
+    second = cache.get_bars("AAPL", "1Day", "2024-01-01")
+    assert first["close"].iloc[-1] == 101.0
+    assert second["close"].iloc[-1] == 102.0
+    assert len(second) == 10 and second.index.is_unique
+    assert pd.Timestamp(client.starts[-1]) == pd.Timestamp("2024-01-10", tz="UTC")
+    # La carpeta anterior se sustituye por una nueva versión
+    assert len([name for name in os.listdir(tmp_path / "cache") if name != "index.json"]) == 1
+
+
+def test_hits_throttle_index_writes(tmp_path):
+    cache = MarketDataCache(client=FakeClient(), cache_dir=str(tmp_path / "cache"))
+    cache.get_bars("AAPL", "1Day", "2024-01-01", "2024-01-05")
+    with open(cache.index_path, encoding="utf-8") as f:
+        saved = json.load(f)["AAPL_1Day"]["last_access"]
+    cache.get_bars("AAPL", "1Day", "2024-01-01", "2024-01-05")
+    with open(cache.index_path, encoding="utf-8") as f:
+        assert json.load(f)["AAPL_1Day"]["last_access"] == saved
+    cache.flush()
+    with open(cache.index_path, encoding="utf-8") as f:
+        assert json.load(f)["AAPL_1Day"]["last_access"] > saved
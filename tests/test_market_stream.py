@@ -0,0 +1,50 @@
+import time
+
+from benchmarks.fake_feed_server import FakeFeedServer
+from services.market_stream import MarketStream
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_rejected_auth_is_not_reported_as_connected():
+    with FakeFeedServer(reject_auth=True) as server:
+        stream = MarketStream(url=server.url, api_key="x", api_secret="y").start()
+        try:
+            assert _wait(lambda: stream.last_error is not None)
+            assert not stream.connected
+            assert stream.status == "autenticación rechazada"
+            assert "auth failed" in stream.last_error
+        finally:
+            stream.stop()
+
+
+def test_unsubscribe_is_reference_counted():
+    with FakeFeedServer(rate=200) as server:
+        stream = MarketStream(url=server.url, api_key="x", api_secret="y").start()
+        try:
+            assert _wait(lambda: stream.connected)
+            stream.subscribe(["AAPL", "MSFT"])
+            stream.subscribe(["AAPL"])
+            assert _wait(lambda: server.subscribed == {"AAPL", "MSFT"})
+            stream.unsubscribe(["AAPL", "MSFT"])
+            assert _wait(lambda: server.subscribed == {"AAPL"})
+            assert stream.symbols == {"AAPL"}
+            stream.unsubscribe(["AAPL"])
+            assert _wait(lambda: server.subscribed == set())
+            assert stream.status == "conectado"
+        finally:
+            stream.stop()
+
+
+def test_stop_right_after_start_stops_the_thread():
+    with FakeFeedServer() as server:
+        stream = MarketStream(url=server.url, api_key="x", api_secret="y").start()
+        stream.stop()
+        assert not stream._thread.is_alive()
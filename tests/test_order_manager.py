@@ -0,0 +1,57 @@
+import threading
+
+from benchmarks.stub_alpaca_server import StubAlpacaServer
+from services.account_service import AccountService
+from services.alpaca_integration import AlpacaIntegration
+from services.order_manager import OrderManager
+
+
+def _client(url, rate_per_minute=60_000):
+    client = AlpacaIntegration(rate_per_minute=rate_per_minute)
+    client.base_url = url
+    return client
+
+
+def test_rate_limiter_wait_is_not_counted_as_latency():
+    with StubAlpacaServer() as server:
+        # Ráfaga de 1 y 600/min: la segunda orden espera ~100 ms en el limiter
+        manager = OrderManager(client=_client(server.url, rate_per_minute=600), max_workers=1)
+        manager.limiter.capacity = manager.limiter.tokens = 1
+        manager.submit("AAPL", 1, "buy")
+        second = manager.submit("AAPL", 1, "buy")
+        manager.shutdown()
+    assert second["queue_ms"] > 50
+    assert second["latency_ms"] < second["queue_ms"]
+    stats = manager.latency_stats()
+    assert stats["count"] == 2 and stats["queue_p95"] > 0
+
+
+def test_order_book_is_polled_from_the_account_service_thread(tmp_path):
+    with StubAlpacaServer() as server:
+        client = _client(server.url)
+        manager = OrderManager(client=client, max_workers=1)
+        manager.submit("AAPL", 1, "buy")
+        service = AccountService(client=client, interval=60, history_path=str(tmp_path / "equity.bin"))
+        polled = threading.Event()
+        service.subscribe(manager.poll)
+        service.subscribe(polled.set)
+        service.start()
+        try:
+            assert polled.wait(5)
+        finally:
+            service.stop()
+            manager.shutdown()
+    assert manager.order_book()["status"].tolist() == ["filled"]
+
+
+def test_account_polling_and_orders_share_one_limiter(tmp_path):
+    with StubAlpacaServer() as server:
+        client = _client(server.url, rate_per_minute=600)
+        client.limiter.capacity = client.limiter.tokens = 1
+        manager = OrderManager(client=client, max_workers=1)
+        assert manager.limiter is client.limiter
+        # El sondeo de la cuenta gasta el único token de la ráfaga: la orden espera
+        AccountService(client=client, interval=60, history_path=str(tmp_path / "equity.bin")).poll()
+        order = manager.submit("AAPL", 1, "buy")
+        manager.shutdown()
+    assert order["queue_ms"] > 50
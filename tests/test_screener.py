@@ -0,0 +1,23 @@
+from benchmarks.synthetic import bar_series
+from services.screener import FeatureTable, build_feature_table
+
+
+class FakeClient:
+    def __init__(self, bars):
+        self.bars = bars
+
+    def iter_bars_multi(self, symbols, timeframe, start=None):
+        # Índice en us, como lo infiere pandas 3 de las cadenas de la API
+        yield {symbol: self.bars[symbol].set_axis(self.bars[symbol].index.as_unit("us")) for symbol in symbols}
+
+
+def test_feature_table_dates_are_ns(tmp_path):
+    bars = bar_series(120, symbols=("AAA", "BBB"))
+    table_dir = str(tmp_path / "features")
+    build_feature_table(["AAA", "BBB"], start="2020-01-01", client=FakeClient(bars), table_dir=table_dir)
+    table = FeatureTable(table_dir)
+    index = bars["AAA"].index
+    assert table.dates[-1] == index[-1].value
+    assert table._row(index[10]) == 10
+    assert table._row(str(index[10].date())) == 10
+    assert table.history("AAA", "close").index.equals(index)
@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+
+from services import market_stream, shared_resources
+from services.market_stream import MarketStream
+from services.shared_resources import SessionRegistry, estimate_bytes
+
+
+def test_sweep_evicts_heavy_keys_but_keeps_navigation_state():
+    state = {
+        "module": "Análisis de Trading",
+        "datasets": {"trades.csv": "abc"},
+        "account_cache": {"key": 1},
+        "addon_frame": np.zeros(1_000_000),
+        "small_flag": True,
+    }
+    registry = SessionRegistry(idle_seconds=60)
+    registry._sessions["s1"] = {
+        "state": state, "module": state["module"], "last_seen": time.time() - 120,
+        "bytes": 0, "by_key": {key: estimate_bytes(value) for key, value in state.items()}, "evicted": False,
+    }
+    assert registry.sweep(min_interval=0) == 1
+    assert set(state) == {"module", "datasets", "small_flag"}
+
+
+def test_sweep_releases_stream_symbols_of_disconnected_sessions(monkeypatch):
+    stream = MarketStream(url="ws://127.0.0.1:9")
+    stream.subscribe(["AAPL", "MSFT"])
+    stream.subscribe(["AAPL"])
+    monkeypatch.setattr(market_stream, "_STREAM", stream)
+    monkeypatch.setattr(shared_resources, "_is_active", lambda session_id: session_id == "alive")
+    registry = SessionRegistry(idle_seconds=60)
+    for session_id in ("alive", "gone"):
+        registry._sessions[session_id] = {
+            "state": {"live_subscribed": ["AAPL", "MSFT"]}, "module": "Mercado en Vivo",
+            "last_seen": time.time(), "bytes": 0, "by_key": {}, "evicted": False,
+        }
+    registry.sweep(min_interval=0)
+    assert list(registry._sessions) == ["alive"]
+    assert stream.symbols == {"AAPL"} and stream._refs == {"AAPL": 1}
+
+
+def test_release_does_not_start_the_stream(monkeypatch):
+    monkeypatch.setattr(market_stream, "_STREAM", None)
+    state = {"live_subscribed": ["AAPL"]}
+    market_stream.release_session_symbols(state)
+    assert state == {} and market_stream._STREAM is None
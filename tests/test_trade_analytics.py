@@ -0,0 +1,25 @@
+import pandas as pd
+
+from services.trade_analytics import analyze_trades
+
+
+def test_fifo_pnl_with_second_resolution_timestamps():
+    df = pd.DataFrame({
+        "fill_id": list("abcd"),
+        "order_id": list("abcd"),
+        "symbol": ["A", "A", "A", "B"],
+        "side": ["buy", "sell", "sell", "sell"],
+        "quantity": [10.0, 4.0, 6.0, 5.0],
+        "price": [100.0, 110.0, 90.0, 50.0],
+        "commission": [0.0, 0.0, 0.0, 0.0],
+        "timestamp": pd.to_datetime(["2024-01-01 10:00", "2024-01-01 11:00",
+                                     "2024-01-01 12:00", "2024-01-01 13:00"], utc=True).as_unit("s"),
+    })
+    result = analyze_trades(df, initial_capital=100_000)
+    summary = result["summary"]
+    assert summary["closed_trades"] == 2
+    assert summary["net_pnl"] == -20.0
+    assert result["equity"]["equity"].tolist() == [100_000.0, 100_040.0, 99_980.0, 99_980.0]
+    assert result["equity"].index[0] == pd.Timestamp("2024-01-01 10:00", tz="UTC")
+    assert result["by_symbol"].loc["B", "open_qty"] == -5.0
+    assert result["holding"]["quantiles_hours"]["p50"] == 2.0
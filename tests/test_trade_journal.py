@@ -0,0 +1,44 @@
+import pandas as pd
+
+from services.trade_journal import TradeJournal
+
+
+def make_trades(fill_ids, timestamps, unit="ns"):
+    return pd.DataFrame({
+        "fill_id": fill_ids,
+        "symbol": ["AAPL", "MSFT"] * (len(fill_ids) // 2) + ["AAPL"] * (len(fill_ids) % 2),
+        "side": ["buy", "sell"] * (len(fill_ids) // 2) + ["buy"] * (len(fill_ids) % 2),
+        "quantity": [10.0] * len(fill_ids),
+        "price": [100.0] * len(fill_ids),
+        "timestamp": pd.to_datetime(timestamps, utc=True).as_unit(unit),
+    })
+
+
+def test_append_twice_and_reopen(tmp_path):
+    root = str(tmp_path / "journal")
+    journal = TradeJournal(root)
+    first = make_trades(["a", "b", "c"], ["2024-03-01 10:00", "2024-03-01 11:00", "2024-03-04 09:30"])
+    assert journal.append(first) == {"added": 3, "duplicates": 0, "invalid": 0}
+
+    second = make_trades(["c", "d"], ["2024-03-04 09:30", "2024-03-05 15:00"])
+    assert journal.append(second) == {"added": 1, "duplicates": 1, "invalid": 0}
+
+    reopened = TradeJournal(root)
+    assert reopened.stats()["rows"] == 4
+    assert reopened.stats()["partitions"] == 3
+    assert reopened.append(first)["added"] == 0
+    result = reopened.query()
+    assert result["fill_id"].tolist() == ["a", "b", "c", "d"]
+    assert result["side"].tolist() == ["buy", "sell", "buy", "sell"]
+
+
+def test_timestamp_resolution_is_normalized(tmp_path):
+    journal = TradeJournal(str(tmp_path / "journal"))
+    trades = make_trades(["a", "b"], ["2024-03-01 10:00", "2024-03-02 10:00"], unit="us")
+    journal.append(trades)
+    assert sorted(journal.index) == ["2024-03-01", "2024-03-02"]
+
+    day = journal.query(start="2024-03-02", end="2024-03-02 23:59")
+    assert day["fill_id"].tolist() == ["b"]
+    assert day["timestamp"].iloc[0] == pd.Timestamp("2024-03-02 10:00", tz="UTC")
+    assert journal.query(symbols=["MSFT"])["fill_id"].tolist() == ["b"]
@@ -0,0 +1,62 @@
+import pytest
+import streamlit as st
+
+import utils
+from utils import get_refresh_interval, refresh_panel
+
+
+@pytest.fixture
+def fragments(monkeypatch):
+    """Sustituye st.fragment por uno que anota el run_every de cada llamada."""
+    calls = []
+
+    def fake_fragment(func, run_every=None):
+        def run(*args, **kwargs):
+            calls.append(run_every)
+            return func(*args, **kwargs)
+        return run
+
+    monkeypatch.setattr(utils, "_fragment", lambda: fake_fragment)
+    monkeypatch.setattr(utils, "REFRESH_PANELS", {})
+    st.session_state.pop("refresh_intervals", None)
+    yield calls
+    st.session_state.pop("refresh_intervals", None)
+
+
+def test_panel_runs_as_fragment_with_its_default_interval(fragments):
+    @refresh_panel("Cotizaciones", 2)
+    def render(value):
+        """Panel de prueba."""
+        return value * 2
+
+    assert render(21) == 42
+    assert fragments == [2]
+    assert render.__name__ == "render" and render.__doc__ == "Panel de prueba."
+    assert utils.REFRESH_PANELS == {"Cotizaciones": 2}
+
+
+def test_session_override_is_read_on_every_call(fragments):
+    @refresh_panel("Cuenta", 5)
+    def render():
+        return None
+
+    render()
+    st.session_state["refresh_intervals"] = {"Cuenta": 30}
+    render()
+    assert get_refresh_interval("Cuenta") == 30
+    # 0 desactiva el refresco: el fragmento se ejecuta sin run_every
+    st.session_state["refresh_intervals"] = {"Cuenta": 0}
+    render()
+    assert fragments == [5, 30, None]
+
+
+def test_without_fragment_support_the_panel_runs_inline(monkeypatch):
+    monkeypatch.setattr(utils, "_fragment", lambda: None)
+    monkeypatch.setattr(utils, "REFRESH_PANELS", {})
+
+    @refresh_panel("Órdenes", 1)
+    def render():
+        return "ok"
+
+    assert render() == "ok"
+    assert get_refresh_interval("Desconocido") == 0
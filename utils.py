@@ -1,6 +1,48 @@
+import functools
 import streamlit as st
-import time
+
+# Paneles con refresco automático: {nombre: intervalo por defecto en segundos}
+REFRESH_PANELS = {}
+
+
+def _fragment():
+    # st.fragment (>=1.37) o st.experimental_fragment (1.33-1.36)
+    return getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def get_refresh_interval(name):
+    """Intervalo efectivo de un panel: el configurado en la sesión o el por defecto (0 = sin refresco)."""
+    overrides = st.session_state.get("refresh_intervals", {})
+    return overrides.get(name, REFRESH_PANELS.get(name, 0))
+
+
+def refresh_panel(name, interval):
+    """
+    Decorador que convierte una función de renderizado en un panel con refresco propio.
+
+    El panel se ejecuta como fragmento de Streamlit con run_every=interval: solo se
+    vuelve a ejecutar esa función, no el script completo, y el hilo del script
+    nunca duerme. El intervalo se puede cambiar por sesión en "Configuración".
+
+    Ejemplo (también desde un addon):
+        @refresh_panel("Cotizaciones", 2)
+        def render_quotes():
+            ...
+    """
+    REFRESH_PANELS[name] = interval
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            fragment = _fragment()
+            run_every = get_refresh_interval(name)
+            if fragment is None:
+                return func(*args, **kwargs)
+            return fragment(func, run_every=run_every or None)(*args, **kwargs)
+        return wrapper
+    return decorator
+
 
 def refrescar():
-    time.sleep(10)
-    st.experimental_rerun()  # Actualiza la UI
\ No newline at end of file
+    """Fuerza un rerun inmediato (sin esperas). Para refrescos periódicos usa refresh_panel."""
+    st.rerun()